@@ -0,0 +1,213 @@
+import sys
+import asyncio
+import concurrent.futures
+
+from pylx16a.lx16a import *
+
+# asyncio 版的舵机接口：
+#   LX16A 的调用都是阻塞的，而且共用一个类级别的串口。
+#   这里所有总线操作都排进一个队列，由一个专门的线程按顺序执行（串口上永远只有一个请求），
+#   协程这边 await 就行：move / read / snapshot 都可以带超时（deadline），也可以被取消。
+#   还没轮到就过期或被取消的请求直接丢掉，不占总线。
+#
+#   这样 开机自检、读姿态、步态回放 可以在同一个事件循环里并发跑：
+#     python asyncservo.py          # 真机
+#     python asyncservo.py --sim    # 模拟总线
+
+PORT = "/dev/ttyUSB0"
+
+ANGLE_MIN = 40
+ANGLE_MAX = 200
+
+SERVO_IDS = list(range(1, 9))
+
+
+class AsyncBus:
+    """
+    bus = AsyncBus(PORT)
+    await bus.open()
+    await bus.move(7, 100)
+    a = await bus.read_angle(7, timeout=0.05)
+    pose = await bus.snapshot()
+    """
+
+    def __init__(self, port=PORT, ids=SERVO_IDS):
+        self.port = port
+        self.ids = list(ids)
+        self.servos = {}
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="bus")
+        self.queue = None
+        self.worker = None
+        self.done = 0       # 执行了多少请求
+        self.expired = 0    # 轮到时已经过期的
+        self.cancelled = 0  # 轮到时已经被取消的
+
+    # ---- 开 / 关 ----
+
+    async def open(self):
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self._dispatch())
+        await self._submit(self._init_servos)
+
+    def _init_servos(self):
+        LX16A.initialize(self.port)
+        for sid in self.ids:
+            s = LX16A(sid)
+            s.set_angle_limits(ANGLE_MIN, ANGLE_MAX)
+            self.servos[sid] = s
+
+    async def close(self):
+        if self.worker:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=True)
+
+    # ---- 调度 ----
+
+    async def _dispatch(self):
+        """一次只把一个请求交给总线线程，保证串口上不会交错"""
+        loop = asyncio.get_running_loop()
+        while True:
+            fn, args, fut, deadline = await self.queue.get()
+            if fut.done():                    # 等的那一方已经取消 / 超时了
+                self.cancelled += 1
+                continue
+            if deadline is not None and loop.time() > deadline:
+                self.expired += 1
+                fut.set_exception(asyncio.TimeoutError())
+                continue
+            try:
+                result = await loop.run_in_executor(self.executor, fn, *args)
+            except Exception as e:
+                if not fut.done():
+                    fut.set_exception(e)
+            else:
+                if not fut.done():
+                    fut.set_result(result)
+            self.done += 1
+
+    async def _submit(self, fn, *args, timeout=None):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        deadline = loop.time() + timeout if timeout is not None else None
+        self.queue.put_nowait((fn, args, fut, deadline))
+        if timeout is None:
+            return await fut
+        # 超时的时候 wait_for 会取消 fut，调度那边看到就跳过
+        return await asyncio.wait_for(fut, timeout)
+
+    # ---- 对外接口 ----
+
+    async def move(self, sid, angle, timeout=None):
+        return await self._submit(self._move, sid, angle, timeout=timeout)
+
+    async def move_pose(self, pose, timeout=None):
+        """一帧：所有关节的 move 打包成一个请求"""
+        return await self._submit(self._move_pose, pose, timeout=timeout)
+
+    async def read_angle(self, sid, timeout=None):
+        return await self._submit(self.servos[sid].get_physical_angle, timeout=timeout)
+
+    async def snapshot(self, ids=None, timeout=None):
+        """所有（或指定）关节的当前角度 {id: angle}，读不到的是 None"""
+        return await self._submit(self._snapshot, ids or self.ids, timeout=timeout)
+
+    async def call(self, sid, method, *args, timeout=None):
+        """任意 LX16A 方法，比如 call(1, "get_vin")"""
+        return await self._submit(getattr(self.servos[sid], method), *args, timeout=timeout)
+
+    # ---- 在总线线程里跑的部分 ----
+
+    def _move(self, sid, angle):
+        lo, hi = self.servos[sid].get_angle_limits()
+        self.servos[sid].move(max(lo, min(hi, angle)))
+
+    def _move_pose(self, pose):
+        for sid, angle in pose.items():
+            self._move(sid, angle)
+
+    def _snapshot(self, ids):
+        pose = {}
+        for sid in ids:
+            try:
+                pose[sid] = self.servos[sid].get_physical_angle()
+            except ServoError:
+                pose[sid] = None
+        return pose
+
+
+# ========== 示例：三件事并发 ==========
+
+async def boot_test(bus, min_mv=5000):
+    """boottest.py 的异步版：查位置、查电压、依次闪灯（不挡住别人用总线）"""
+    pose = await bus.snapshot(timeout=0.5)
+    ok_comm = all(a is not None for a in pose.values())
+    print("[boot] all motors responded" if ok_comm else "[boot] comm error")
+
+    try:
+        vin = await bus.call(bus.ids[0], "get_vin", timeout=0.2)
+        ok_v = vin >= min_mv
+        print(f"[boot] bus voltage: {vin / 1000:.2f} V")
+    except (ServoError, asyncio.TimeoutError) as e:
+        print(f"[boot] could not read voltage: {e!r}")
+        ok_v = False
+
+    for sid in (1, 2, 7, 8, 3, 4, 5, 6):
+        await bus.call(sid, "led_power_on")
+        await asyncio.sleep(0.1)
+        await bus.call(sid, "led_power_off")
+
+    print("[boot] PASS" if ok_comm and ok_v else "[boot] FAIL")
+
+
+async def telemetry(bus, period=0.2, stop=None):
+    """每 period 秒读一次姿态；读得慢了就跳过，不积压"""
+    while not (stop and stop.is_set()):
+        try:
+            pose = await bus.snapshot(timeout=period)
+            print("[tel] " + " ".join(f"{a:.0f}" if a is not None else "--"
+                                      for a in pose.values()))
+        except asyncio.TimeoutError:
+            print("[tel] snapshot late, skipped")
+        await asyncio.sleep(period)
+
+
+async def gait(bus, cycles=4):
+    """trotsinwalk 的正弦小跑，按绝对时间节拍回放"""
+    from trotsinwalk import trot_pose_at, STEPS_PER_CYCLE, STEP_TIME
+    loop = asyncio.get_running_loop()
+    next_t = loop.time()
+    for step in range(cycles * STEPS_PER_CYCLE):
+        try:
+            await bus.move_pose(trot_pose_at(step), timeout=STEP_TIME)
+        except asyncio.TimeoutError:
+            print(f"[gait] frame {step} dropped")
+        next_t += STEP_TIME
+        await asyncio.sleep(max(0.0, next_t - loop.time()))
+
+
+async def demo():
+    bus = AsyncBus(PORT)
+    await bus.open()
+    stop = asyncio.Event()
+    tel = asyncio.create_task(telemetry(bus, stop=stop))
+    await asyncio.gather(boot_test(bus), gait(bus))
+    stop.set()
+    await tel
+    print(f"[bus] done {bus.done}, expired {bus.expired}, cancelled {bus.cancelled}")
+    await bus.close()
+
+
+def main():
+    if "--sim" in sys.argv:
+        from simbus import install
+        install()
+    asyncio.run(demo())
+
+
+if __name__ == "__main__":
+    main()
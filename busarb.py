@@ -0,0 +1,191 @@
+import sys
+import math
+import time
+import heapq
+import itertools
+
+from pylx16a.lx16a import *
+
+# 总线仲裁：
+#   步态旁边一加上 温度 / 电压 / 位置 轮询，大家就抢 LX16A.initialize 打开的那一个串口。
+#   这里把每个总线操作当成一个“事务”排队，按 (优先级, deadline) 执行：
+#       PRIO_FRAME     这一帧的 move —— 永远先发，永远不推迟
+#       PRIO_FEEDBACK  闭环 / 延迟补偿的读回
+#       PRIO_HEALTH    温度、电压 —— 只用每个周期剩下的空闲时间
+#   每个控制周期只拿 TICK_BUDGET 这么多比例的时间占总线；
+#   估计放不下的事务留到下个周期（算一次 deferred），过了 deadline 的直接丢掉（expired）。
+#
+# 用法：
+#   arb = BusArbiter(STEP_TIME)
+#   arb.start()
+#   每个周期：
+#       arb.submit(PRIO_FRAME, send_frame, servos, pose)
+#       arb.submit(PRIO_FEEDBACK, servos[3].get_physical_angle, deadline=arb.tick_end)
+#       arb.run_tick()
+#       arb.wait_next_tick()
+#   print(arb.summary())
+
+PRIO_FRAME = 0
+PRIO_FEEDBACK = 1
+PRIO_HEALTH = 2
+
+PRIO_NAMES = {PRIO_FRAME: "frame", PRIO_FEEDBACK: "feedback", PRIO_HEALTH: "health"}
+
+TICK_BUDGET = 0.7    # 每个周期最多用多少比例的时间占总线（剩下的留给计算和抖动）
+COST_ALPHA = 0.2     # 每种事务耗时估计的平滑系数
+COST_GUESS = 0.004   # 没测过的事务先按 4 ms 估
+
+
+class BusArbiter:
+    def __init__(self, period, budget=TICK_BUDGET, clock=time.perf_counter,
+                 sleep=time.sleep):
+        self.period = period
+        self.budget = budget
+        self.clock = clock
+        self.sleep = sleep
+        self.heap = []
+        self.seq = itertools.count()
+        self.cost = {}            # 事务种类 -> 估计耗时（秒）
+        self.tick_start = None
+        self.tick_end = None      # 本周期预算用完的时刻；反馈读一般把 deadline 设成它
+        self.ticks = 0
+        self.overruns = 0         # 一个周期整个超时（光帧就发不完，或者计算太慢）
+        self.stats = {p: {"run": 0, "deferred": 0, "expired": 0, "failed": 0, "busy": 0.0}
+                      for p in PRIO_NAMES}
+
+    # ---- 节拍 ----
+
+    def start(self):
+        self.tick_start = self.clock()
+        self.tick_end = self.tick_start + self.budget * self.period
+
+    def wait_next_tick(self):
+        """睡到下一个周期开始（按绝对时间，不累积漂移）"""
+        nxt = self.tick_start + self.period
+        now = self.clock()
+        if now > nxt:
+            # 错过了：跳到下一个还没开始的周期，保持相位
+            self.overruns += 1
+            nxt += self.period * math.ceil((now - nxt) / self.period)
+        self.sleep(max(0.0, nxt - self.clock()))
+        self.tick_start = nxt
+        self.tick_end = nxt + self.budget * self.period
+        self.ticks += 1
+
+    # ---- 事务 ----
+
+    def submit(self, prio, fn, *args, deadline=None, key=None, on_done=None):
+        """
+        排一个事务；返回 job 字典，跑完以后 job["done"] 为 True，
+        结果在 job["result"]，舵机报错在 job["error"]。
+        key: 用来估计耗时的种类名，默认是函数名。
+        on_done(job): 跑完（或过期）以后调用。
+        """
+        job = {
+            "prio": prio, "fn": fn, "args": args, "deadline": deadline,
+            "key": key or getattr(fn, "__name__", "job"), "on_done": on_done,
+            "done": False, "result": None, "error": None,
+        }
+        dl = deadline if deadline is not None else math.inf
+        heapq.heappush(self.heap, (prio, dl, next(self.seq), job))
+        return job
+
+    def pending(self, prio=None):
+        if prio is None:
+            return len(self.heap)
+        return sum(1 for item in self.heap if item[0] == prio)
+
+    def run_tick(self):
+        """按优先级把本周期放得下的事务跑完"""
+        if self.tick_start is None:
+            self.start()
+        while self.heap:
+            prio, dl, _, job = self.heap[0]
+            now = self.clock()
+            if now > dl:
+                heapq.heappop(self.heap)
+                self.stats[prio]["expired"] += 1
+                job["error"] = "expired"
+                self._finish(job)
+                continue
+            if prio != PRIO_FRAME:
+                est = self.cost.get(job["key"], COST_GUESS)
+                if now + est > self.tick_end:
+                    break   # 后面的优先级只会更低，一起留到下个周期
+            heapq.heappop(self.heap)
+            self._run(job)
+
+        for prio, _, _, _ in self.heap:
+            self.stats[prio]["deferred"] += 1
+
+    def _run(self, job):
+        st = self.stats[job["prio"]]
+        t0 = self.clock()
+        try:
+            job["result"] = job["fn"](*job["args"])
+        except ServoError as e:
+            job["error"] = e
+            st["failed"] += 1
+        dt = self.clock() - t0
+
+        old = self.cost.get(job["key"])
+        self.cost[job["key"]] = dt if old is None else old + COST_ALPHA * (dt - old)
+        st["run"] += 1
+        st["busy"] += dt
+        self._finish(job)
+
+    def _finish(self, job):
+        job["done"] = True
+        if job["on_done"]:
+            job["on_done"](job)
+
+    # ---- 统计 ----
+
+    def summary(self):
+        total = self.ticks * self.period
+        lines = [f"  ticks {self.ticks}, overruns {self.overruns}"]
+        for prio, name in PRIO_NAMES.items():
+            st = self.stats[prio]
+            busy = st["busy"] / total * 100 if total > 0 else 0.0
+            lines.append(f"  {name:8s}: run {st['run']}, deferred {st['deferred']}, "
+                         f"expired {st['expired']}, failed {st['failed']}, bus {busy:.0f}%")
+        return "\n".join(lines)
+
+
+def send_frame(servos, pose):
+    """一帧：按顺序把姿态发出去（调用前应已夹紧）"""
+    for sid, angle in pose.items():
+        servos[sid].move(angle)
+
+
+# ========== 模拟总线上演示 ==========
+
+def main():
+    if "--sim" in sys.argv:
+        from simbus import install
+        install()
+
+    from trotsinwalk import (init_servos, trot_pose_at, clamp_angle,
+                             STEPS_PER_CYCLE, STEP_TIME)
+    servos = init_servos()
+    arb = BusArbiter(STEP_TIME)
+    ids = list(servos)
+    arb.start()
+    for step in range(8 * STEPS_PER_CYCLE):
+        pose = {sid: clamp_angle(servos, sid, a) for sid, a in trot_pose_at(step).items()}
+        arb.submit(PRIO_FRAME, send_frame, servos, pose)
+        sid = ids[step % len(ids)]
+        arb.submit(PRIO_FEEDBACK, servos[sid].get_physical_angle, deadline=arb.tick_end)
+        # 故意塞多一点健康读取，看它们是怎么被推到空闲时间里的
+        for k in range(3):
+            hid = ids[(3 * step + k) % len(ids)]
+            arb.submit(PRIO_HEALTH, servos[hid].get_temp, key="get_temp")
+        arb.run_tick()
+        arb.wait_next_tick()
+    print("Bus arbiter:")
+    print(arb.summary())
+    print(f"  health backlog: {arb.pending(PRIO_HEALTH)}")
+
+
+if __name__ == "__main__":
+    main()
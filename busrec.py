@@ -0,0 +1,304 @@
+import sys
+import time
+import runpy
+import struct
+
+from pylx16a.lx16a import *
+
+# 总线录制 / 回放：
+#   机器人上步态出问题的时候，我们不知道线上到底走了什么。
+#   录制：把 LX16A._controller 包一层，每一次 write / read 的字节连同
+#         time.monotonic_ns() 时间戳一起追加到一个二进制文件里（每条 11 字节头 + 数据）。
+#   回放：ReplaySerial 按顺序对上脚本发出来的包，把当时录下的应答原样喂回去，
+#         整套软件不接硬件、在一模一样的“总线条件”下再跑一遍；
+#         最后对比 录制 / 回放 两边的发包节奏和吞吐量。
+#
+# 用法：
+#   python busrec.py --record run.lxrec trotsinwalk.py [--sim]
+#   python busrec.py --replay run.lxrec trotsinwalk.py [--timing]
+#   python busrec.py --info run.lxrec
+#
+# 文件格式（小端）：
+#   头    : b"LXBUS\x01\x00\x00" + 开始时的 time.time()（double）
+#   每一条: t_ns (u64) + 方向 (u8: 0 = 发出, 1 = 收到) + 长度 (u16) + 数据
+
+MAGIC = b"LXBUS\x01\x00\x00"
+HEADER = struct.Struct("<8sd")
+RECORD = struct.Struct("<QBH")
+
+DIR_TX = 0
+DIR_RX = 1
+
+
+# ========== 录制 ==========
+
+class RecordingSerial:
+    """包在真串口（或 SimSerial）外面，所有进出的字节都记下来"""
+
+    def __init__(self, path):
+        self.inner = None
+        self.path = path
+        self.f = open(path, "wb")
+        self.f.write(HEADER.pack(MAGIC, time.time()))
+        self.records = 0
+
+    def wrap(self, inner):
+        self.inner = inner
+
+    def _log(self, direction, data):
+        self.f.write(RECORD.pack(time.monotonic_ns(), direction, len(data)))
+        self.f.write(data)
+        self.records += 1
+
+    def write(self, data):
+        data = bytes(data)
+        self._log(DIR_TX, data)
+        return self.inner.write(data)
+
+    def read(self, size=1):
+        data = self.inner.read(size)
+        self._log(DIR_RX, data)   # 超时读到 0 字节也记，回放时照样超时
+        return data
+
+    def readinto(self, buf):
+        # fastcodec 用的是 readinto；不接住就会经 __getattr__ 直接读，应答录不下来
+        readinto = getattr(self.inner, "readinto", None)
+        if readinto is not None:
+            got = readinto(buf) or 0
+        else:
+            data = self.inner.read(len(buf))
+            got = len(data)
+            buf[:got] = data
+        self._log(DIR_RX, bytes(buf[:got]))
+        return got
+
+    @property
+    def timeout(self):
+        return self.inner.timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self.inner.timeout = value
+
+    @property
+    def write_timeout(self):
+        return self.inner.write_timeout
+
+    @write_timeout.setter
+    def write_timeout(self, value):
+        self.inner.write_timeout = value
+
+    def __getattr__(self, name):
+        # reset_input_buffer / flushInput / in_waiting ... 直接转给里面的串口
+        return getattr(self.inner, name)
+
+    def close(self):
+        self.f.flush()
+        if self.inner is not None:
+            self.inner.close()
+
+    def finish(self):
+        self.f.close()
+
+
+def install_recorder(path):
+    """之后 LX16A.initialize 打开的串口（真的或模拟的）都会被录下来"""
+    rec = RecordingSerial(path)
+    orig = LX16A.initialize
+
+    def initialize(port, timeout=0.02):
+        if LX16A._controller is rec:
+            LX16A._controller = rec.inner   # 让原来的 initialize 关掉旧串口，文件留着
+        orig(port, timeout)
+        rec.wrap(LX16A._controller)
+        LX16A._controller = rec
+
+    LX16A.initialize = staticmethod(initialize)
+    return rec
+
+
+def read_records(path):
+    """-> (开始时的 time.time(), [(t_ns, 方向, bytes), ...])"""
+    with open(path, "rb") as f:
+        buf = f.read()
+    magic, wall0 = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a bus recording")
+    out = []
+    pos = HEADER.size
+    while pos + RECORD.size <= len(buf):
+        t_ns, direction, n = RECORD.unpack_from(buf, pos)
+        pos += RECORD.size
+        out.append((t_ns, direction, buf[pos:pos + n]))
+        pos += n
+    return wall0, out
+
+
+# ========== 回放 ==========
+
+class ReplaySerial:
+    """
+    脚本每写一个包，就对上录制里的下一个发出的包，
+    把它后面录到的应答放进接收缓冲，read 的时候吐出来。
+    timing=True 时应答按录制时的延迟才“到”（read 会等）。
+    """
+
+    def __init__(self, path, timing=False):
+        _, records = read_records(path)
+        # [发出时间, 发出的包, 之后收到的字节, 第一次收到的时间]
+        self.steps = []
+        for t_ns, direction, data in records:
+            if direction == DIR_TX:
+                self.steps.append([t_ns, data, bytearray(), None])
+            elif self.steps:
+                step = self.steps[-1]
+                step[2].extend(data)
+                if data and step[3] is None:
+                    step[3] = t_ns
+
+        self.timing = timing
+        self.timeout = 0.02
+        self.write_timeout = 0.02
+        self.pos = 0
+        self.rx = bytearray()
+        self.reply_at = None
+        self.sent = []          # [(录制时的 t_ns, 回放时的 t_ns)]
+        self.mismatches = 0
+        self.examples = []      # 前几个对不上的包
+        self.extra = 0          # 录制里已经没有的多余写
+
+    def write(self, data):
+        data = bytes(data)
+        now = time.monotonic_ns()
+        if self.pos >= len(self.steps):
+            self.extra += 1
+            self.rx.clear()
+            return len(data)
+
+        t_ns, tx, rx, rx_t = self.steps[self.pos]
+        self.pos += 1
+        if data != tx:
+            self.mismatches += 1
+            if len(self.examples) < 5:
+                self.examples.append((self.pos - 1, tx.hex(" "), data.hex(" ")))
+        self.sent.append((t_ns, now))
+        self.rx = bytearray(rx)
+        self.reply_at = now + (rx_t - t_ns) if self.timing and rx_t is not None else None
+        return len(data)
+
+    def read(self, size=1):
+        if self.reply_at is not None:
+            wait = (self.reply_at - time.monotonic_ns()) / 1e9
+            if wait > 0:
+                time.sleep(wait)
+            self.reply_at = None
+        out = bytes(self.rx[:size])
+        del self.rx[:size]
+        return out
+
+    def reset_input_buffer(self):
+        pass   # 应答已经“在线上”了，不能清掉
+
+    def reset_output_buffer(self):
+        pass
+
+    def flushInput(self):
+        pass
+
+    def close(self):
+        pass
+
+    def report(self):
+        rec = gap_stats([t for t, _ in self.sent])
+        rep = gap_stats([t for _, t in self.sent])
+        lines = [
+            f"  packets: {len(self.sent)} / {len(self.steps)} replayed, "
+            f"{self.mismatches} differ, {self.extra} extra",
+            f"  recorded: {rec}",
+            f"  replayed: {rep}",
+        ]
+        for idx, want, got in self.examples:
+            lines.append(f"  #{idx}: recorded {want}")
+            lines.append(f"  {' ' * len(str(idx))}   replayed {got}")
+        return "\n".join(lines)
+
+
+def install_replay(path, timing=False):
+    rep = ReplaySerial(path, timing)
+
+    def initialize(port, timeout=0.02):
+        rep.timeout = timeout
+        LX16A._controller = rep
+
+    LX16A.initialize = staticmethod(initialize)
+    LX16A._controller = rep
+    return rep
+
+
+# ========== 统计 ==========
+
+def gap_stats(ts_ns):
+    """一串发包时间 -> 总时长 / 包率 / 相邻间隔（平均、p95、最大）"""
+    if len(ts_ns) < 2:
+        return f"{len(ts_ns)} packets"
+    gaps = sorted(b - a for a, b in zip(ts_ns, ts_ns[1:]))
+    span = (ts_ns[-1] - ts_ns[0]) / 1e9
+    mean = sum(gaps) / len(gaps) / 1e6
+    p95 = gaps[int(0.95 * (len(gaps) - 1))] / 1e6
+    return (f"{span:.2f} s, {len(ts_ns) / span:.0f} pkt/s, gap mean {mean:.2f} ms, "
+            f"p95 {p95:.2f} ms, max {gaps[-1] / 1e6:.2f} ms")
+
+
+def info(path):
+    wall0, records = read_records(path)
+    tx = [(t, d) for t, k, d in records if k == DIR_TX]
+    rx = [(t, d) for t, k, d in records if k == DIR_RX]
+    span = (records[-1][0] - records[0][0]) / 1e9 if records else 0.0
+    n_bytes = sum(len(d) for _, _, d in records)
+    print(f"{path}: recorded {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(wall0))}")
+    print(f"  {len(tx)} packets out, {len(rx)} reads, {n_bytes} bytes in {span:.2f} s "
+          f"({n_bytes / span if span else 0:.0f} B/s)")
+    print(f"  out: {gap_stats([t for t, _ in tx])}")
+    timeouts = sum(1 for _, d in rx if not d)
+    if timeouts:
+        print(f"  {timeouts} reads timed out")
+
+
+def run_script(script):
+    sys.argv = [script]
+    runpy.run_path(script, run_name="__main__")
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) >= 2 and args[0] == "--info":
+        info(args[1])
+        return
+    if len(args) < 3 or args[0] not in ("--record", "--replay"):
+        print("usage: python busrec.py --record FILE SCRIPT.py [--sim]\n"
+              "       python busrec.py --replay FILE SCRIPT.py [--timing]\n"
+              "       python busrec.py --info FILE")
+        return
+    mode, path, script = args[:3]
+
+    if mode == "--record":
+        if "--sim" in args:
+            from simbus import install
+            install()
+        rec = install_recorder(path)
+        try:
+            run_script(script)
+        finally:
+            rec.finish()
+        print(f"[busrec] {rec.records} records -> {path}")
+    else:
+        rep = install_replay(path, timing="--timing" in args)
+        try:
+            run_script(script)
+        finally:
+            print(f"[busrec] replay of {path}:")
+            print(rep.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 from pylx16a.lx16a import *
 import time
 
+import evlog
+from feedback import (make_corrections, corr_apply, corr_readback,
+                      corr_update, corr_summary, save_corrections)
+
 PORT = "/dev/ttyUSB0"
 
 ANGLE_MIN = 40
@@ -32,6 +36,10 @@ STEP_DURATION = 0.2  # 每个相位时间
 STEP_STEPS    = 5    # 每个相位插值步数
 NUM_CYCLES    = 10     # 走几轮（每轮两步：对角1 + 对角2）
 
+# 闭环修正：读回实际角度，在线学每个关节的 offset / gain（见 feedback.py），
+# 学到的值存在 learned_corrections_dance.json，下次自动接着用
+CLOSED_LOOP = False
+
 
 # ========== 基础函数 ==========
 
@@ -42,29 +50,34 @@ def init_servos():
         s = LX16A(sid)
         s.set_angle_limits(ANGLE_MIN, ANGLE_MAX)
         servos[sid] = s
-        print(f"Servo {sid} init OK")
+        evlog.info("servo_init", "Servo {sid} init OK", sid=sid)
     time.sleep(0.5)
     return servos
 
 
 def read_current_pose(servos):
     pose = {}
-    print("Current pose:")
     for sid, s in servos.items():
-        a = s.get_physical_angle()
-        pose[sid] = a
-        print(f"  ID{sid}: {a:.1f}°")
+        pose[sid] = s.get_physical_angle()
+    evlog.info("pose", evlog.fmt_pose, pose=dict(pose))
     return pose
 
 
 def smooth_move(servos, start_pose, target_pose,
-                duration=STEP_DURATION, steps=STEP_STEPS):
+                duration=STEP_DURATION, steps=STEP_STEPS, corr=None):
     for step in range(steps + 1):
         alpha = step / steps
+        want = {}
+        cmd = {}
+        sent = {}
         for sid in range(1, 9):
             a0 = start_pose[sid]
             a1 = target_pose[sid]
             a  = a0 + (a1 - a0) * alpha
+            want[sid] = a
+            if corr:
+                a = corr_apply(corr, {sid: a})[sid]
+            cmd[sid] = a
 
             # 夹在舵机限位内
             min_ang, max_ang = servos[sid].get_angle_limits()
@@ -74,6 +87,9 @@ def smooth_move(servos, start_pose, target_pose,
                 a = max_ang
 
             servos[sid].move(a)
+            sent[sid] = a
+        if corr:
+            corr_readback(corr, servos, want, cmd, sent)
         time.sleep(duration / steps)
 
 
@@ -137,28 +153,37 @@ def main():
     servos = init_servos()
 
     # 先站到 STAND_POSE
-    print("\nMove to STAND_POSE ...")
+    evlog.info("stage", "\nMove to STAND_POSE ...")
     cur = read_current_pose(servos)
     smooth_move(servos, cur, STAND_POSE, duration=1.0, steps=40)
     cur = clone_pose(STAND_POSE)
 
+    corr = make_corrections(STAND_POSE, "dance") if CLOSED_LOOP else None
+
     # 多轮对角小跑
     for cycle in range(NUM_CYCLES):
-        print(f"\n=== Trot cycle {cycle+1}/{NUM_CYCLES} ===")
+        evlog.info("cycle", "\n=== Trot cycle {k}/{n} ===", k=cycle + 1, n=NUM_CYCLES)
         phases = make_trot_phases(STAND_POSE)  # 每轮都从 STAND_POSE 定义
 
         for idx, phase in enumerate(phases):
-            print(f"  phase {idx+1}/{len(phases)}")
+            evlog.debug("phase", "  phase {k}/{n}", k=idx + 1, n=len(phases))
             smooth_move(servos, cur, phase,
-                        duration=STEP_DURATION, steps=STEP_STEPS)
+                        duration=STEP_DURATION, steps=STEP_STEPS, corr=corr)
             cur = clone_pose(phase)
 
         # 每轮结束回到 STAND_POSE（消掉误差）
-        smooth_move(servos, cur, STAND_POSE, duration=0.3, steps=20)
+        smooth_move(servos, cur, STAND_POSE, duration=0.3, steps=20, corr=corr)
         cur = clone_pose(STAND_POSE)
         time.sleep(0.1)
 
-    print("\nDone; final pose = STAND_POSE.")
+        if corr:
+            corr_update(corr)
+
+    if corr:
+        save_corrections(corr)
+        evlog.info("summary", "\nLearned corrections:\n" + corr_summary(corr))
+
+    evlog.info("stage", "\nDone; final pose = STAND_POSE.")
 
 
 if __name__ == "__main__":
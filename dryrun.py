@@ -0,0 +1,132 @@
+import sys
+import csv
+import time
+import runpy
+
+from simbus import install as install_sim, load_model
+
+# 虚拟时钟 + 模拟总线的干跑：
+#   各个脚本的 main() 里到处是 time.sleep / time.time，
+#   想确认一下改过的 dance.py 跑完 24 个周期没问题，也得实打实等几分钟。
+#   这里把 time 模块的 sleep / time / monotonic / perf_counter 换成一个虚拟时钟：
+#   sleep 只是把虚拟时间往前拨，立刻返回；模拟总线的传输时间也走同一个时钟。
+#   整个脚本几毫秒到几百毫秒跑完，记下来的每一条 move 的时间戳
+#   和真机上按时跑出来的一样。
+#
+# 用法：
+#   python dryrun.py dance.py
+#   python dryrun.py trotsinwalk.py --out trot_frames.csv --model servo_model.json
+#
+# 注意：只管单线程的脚本（shmbus / multiport / asyncservo 里有线程或事件循环，各自有 --sim）。
+
+FRAMES_FILE = "dryrun_frames.csv"
+EPOCH = 1700000000.0   # 虚拟时间 0 对应的 time.time()，固定下来，同一个脚本每次的日志都一样
+
+
+class VirtualClock:
+    def __init__(self, epoch=EPOCH):
+        self.now = 0.0
+        self.epoch = epoch
+        self.sleeps = 0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.epoch + self.now
+
+    def monotonic_ns(self):
+        return int(round(self.now * 1e9))
+
+    def time_ns(self):
+        return int(round((self.epoch + self.now) * 1e9))
+
+    def sleep(self, seconds):
+        self.sleeps += 1
+        if seconds > 0:
+            self.now += seconds
+
+
+def install_clock(clock):
+    """把 time 模块里的时间函数换成虚拟的；返回一个恢复原样的函数"""
+    patched = {
+        "sleep": clock.sleep,
+        "time": clock.time,
+        "monotonic": clock.monotonic,
+        "perf_counter": clock.monotonic,
+        "time_ns": clock.time_ns,
+        "monotonic_ns": clock.monotonic_ns,
+        "perf_counter_ns": clock.monotonic_ns,
+    }
+    saved = {name: getattr(time, name) for name in patched}
+    for name, fn in patched.items():
+        setattr(time, name, fn)
+
+    def restore():
+        for name, fn in saved.items():
+            setattr(time, name, fn)
+    return restore
+
+
+def log_moves(sim, clock, rows):
+    """在模拟总线的 write 上挂个钩子，每条 move 记一行 (帧号, 时间, id, 角度)"""
+    write = sim.write
+    frame = {"n": 0, "ids": set()}
+
+    def logged_write(data):
+        data = bytes(data)
+        if len(data) >= 8 and data[4] == 1:
+            sid = data[2]
+            if sid in frame["ids"]:         # 同一个 ID 又来了：新的一帧
+                frame["n"] += 1
+                frame["ids"].clear()
+            frame["ids"].add(sid)
+            angle = (data[5] | (data[6] << 8)) * 6 / 25
+            rows.append((frame["n"], clock.monotonic(), sid, angle))
+        return write(data)
+
+    sim.write = logged_write
+
+
+def dry_run(script, model=None, out=FRAMES_FILE):
+    clock = VirtualClock()
+    rows = []
+    sim = install_sim(model, clock=clock.monotonic, sleep=clock.sleep)
+    log_moves(sim, clock, rows)
+
+    wall0 = time.perf_counter()
+    restore = install_clock(clock)
+    try:
+        sys.argv = [script]
+        runpy.run_path(script, run_name="__main__")
+    finally:
+        restore()
+    wall = time.perf_counter() - wall0
+
+    with open(out, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["frame", "t", "id", "angle"])
+        for n, t, sid, angle in rows:
+            w.writerow([n, f"{t:.6f}", sid, f"{angle:.2f}"])
+
+    return {"virtual": clock.now, "wall": wall, "moves": len(rows),
+            "frames": rows[-1][0] + 1 if rows else 0, "sleeps": clock.sleeps}
+
+
+def main():
+    args = sys.argv[1:]
+    if not args:
+        print("usage: python dryrun.py SCRIPT.py [--out frames.csv] [--model servo_model.json]")
+        return
+    script = args[0]
+    out = args[args.index("--out") + 1] if "--out" in args else FRAMES_FILE
+    model = load_model(args[args.index("--model") + 1]) if "--model" in args else None
+
+    st = dry_run(script, model, out)
+    print(f"[dryrun] {script}: {st['virtual']:.2f} s simulated in {st['wall'] * 1000:.0f} ms "
+          f"(x{st['virtual'] / max(st['wall'], 1e-9):.0f}), "
+          f"{st['frames']} frames / {st['moves']} moves -> {out}")
+
+
+if __name__ == "__main__":
+    main()
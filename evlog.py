@@ -0,0 +1,249 @@
+import sys
+import json
+import time
+import queue
+import atexit
+import threading
+import collections
+
+# 不阻塞的结构化日志：
+#   read_current_pose 每个关节 print 一行，走路循环在计时的那段里 print "phase k/n"，
+#   init_servos 每个舵机一行。SSH 终端慢的时候 print 会卡住，控制循环跟着一起卡。
+#   这里控制循环只做一件事：把 (时间, 级别, 事件, 消息, 字段) 塞进一个有界队列（put_nowait，不等）。
+#   后台线程把队列里攒着的一批一起格式化，一次 write + flush。
+#     - 低于当前级别的记录在入口就返回，连元组都不建；每帧的 DEBUG 关掉时几乎没有开销
+#     - 队列满了也不等：记录丢掉，按事件名计数，写线程下一批输出一行 “dropped N x 事件”
+#     - 格式化（msg.format / msg(**fields)）在写线程里做，控制循环不碰字符串；
+#       所以传进来的字段之后别再改
+#     - LOG_FILE 不为 None 时另外写一份 JSON Lines（每行一个记录，带全部字段）
+#
+# 用法：
+#   import evlog
+#   evlog.info("servo_init", "Servo {sid} init OK", sid=sid)
+#   evlog.debug("phase", "  phase {k}/{n}", k=k, n=n)
+#   if evlog.enabled(evlog.DEBUG):          # 字段本身要现算的时候先看一下级别
+#       evlog.debug("frame", step=step, pose=dict(pose))
+#   evlog.set_level("debug")                # 或者 python robot.py trot --log-level debug
+#   evlog.flush()                           # 等队列写完（一般不用，退出时会自动写完）
+#   python evlog.py > /dev/null             # 入口开销 / 满队列丢弃（结果打在 stderr）
+
+DEBUG = 10
+INFO = 20
+WARN = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARN: "warn", ERROR: "error"}
+
+LOG_LEVEL = INFO
+LOG_FILE = None        # 比如 "run_log.jsonl"
+QUEUE_MAX = 1024       # 队列最多攒多少条，满了就丢
+FLUSH_TIMEOUT = 2.0    # flush / 退出时最多等写线程多久（秒）
+
+_STOP = object()
+
+_st = {
+    "level": LOG_LEVEL,
+    "queue": None,
+    "thread": None,
+    "file": None,
+    "dropped": collections.Counter(),   # 事件名 -> 还没报告的丢弃条数
+    "written": 0,
+    "dropped_total": 0,
+}
+_start_lock = threading.Lock()
+
+
+# ========== 控制循环这边 ==========
+
+def enabled(level):
+    return level >= _st["level"]
+
+
+def log(level, event, msg="", **fields):
+    """
+    event: 事件名（短的英文，JSON 里的 "event"，丢弃计数也按它分）
+    msg:   给人看的一行；有字段时按 msg.format(**fields) 填，也可以是函数 msg(**fields)；
+           空的话输出 “event k=v ...”
+    """
+    if level < _st["level"]:
+        return
+    q = _st["queue"] or _start()
+    try:
+        q.put_nowait((time.time(), level, event, msg, fields))
+    except queue.Full:
+        _st["dropped"][event] += 1
+
+
+def debug(event, msg="", **fields):
+    log(DEBUG, event, msg, **fields)
+
+
+def info(event, msg="", **fields):
+    log(INFO, event, msg, **fields)
+
+
+def warn(event, msg="", **fields):
+    log(WARN, event, msg, **fields)
+
+
+def error(event, msg="", **fields):
+    log(ERROR, event, msg, **fields)
+
+
+def get_level():
+    return _st["level"]
+
+
+def set_level(level):
+    """数字或者名字（"debug" / "info" / "warn" / "error"）"""
+    if isinstance(level, str):
+        names = {name: lv for lv, name in LEVEL_NAMES.items()}
+        level = names[level.lower()]
+    _st["level"] = level
+
+
+def flush(timeout=FLUSH_TIMEOUT):
+    """等现在队列里的记录都写出去；写线程卡住了最多等 timeout 秒"""
+    q = _st["queue"]
+    if q is None:
+        return
+    done = threading.Event()
+    try:
+        q.put(done, timeout=timeout)
+    except queue.Full:
+        return
+    done.wait(timeout)
+
+
+def close():
+    q, th = _st["queue"], _st["thread"]
+    if q is None:
+        return
+    try:
+        q.put(_STOP, timeout=FLUSH_TIMEOUT)
+    except queue.Full:
+        pass
+    th.join(FLUSH_TIMEOUT)
+    _st["queue"] = _st["thread"] = None
+    if _st["file"]:
+        _st["file"].close()
+        _st["file"] = None
+
+
+def stats():
+    return {"written": _st["written"], "dropped": _st["dropped_total"] + sum(_st["dropped"].values()),
+            "queued": _st["queue"].qsize() if _st["queue"] else 0}
+
+
+# ========== 格式 ==========
+
+def fmt_pose(pose, title="Current pose:"):
+    """{id: 角度} -> 和原来 read_current_pose 一样的多行输出"""
+    return "\n".join([title] + [f"  ID{sid}: {a:.1f}°" for sid, a in pose.items()])
+
+
+def format_record(rec):
+    _, level, event, msg, fields = rec
+    try:
+        if callable(msg):
+            line = msg(**fields)
+        elif msg and fields:
+            line = msg.format(**fields)
+        elif msg:
+            line = msg
+        else:
+            line = " ".join([event] + [f"{k}={v}" for k, v in fields.items()])
+    except (KeyError, IndexError, ValueError, TypeError):
+        line = f"{event} {msg!r} {fields}"
+    if level >= WARN:
+        line = f"[{LEVEL_NAMES.get(level, level)}] {line}"
+    return line
+
+
+def json_record(rec):
+    t, level, event, _, fields = rec
+    out = {"t": round(t, 6), "level": LEVEL_NAMES.get(level, level), "event": event}
+    out.update(fields)
+    return json.dumps(out, default=str, ensure_ascii=False)
+
+
+# ========== 写线程 ==========
+
+def _start():
+    with _start_lock:
+        if _st["queue"] is None:
+            q = queue.Queue(maxsize=QUEUE_MAX)
+            if LOG_FILE:
+                _st["file"] = open(LOG_FILE, "a", encoding="utf-8")
+            th = threading.Thread(target=_writer, args=(q,), name="evlog", daemon=True)
+            _st["queue"], _st["thread"] = q, th
+            th.start()
+            atexit.register(close)
+        return _st["queue"]
+
+
+def _report_dropped(lines, records):
+    dropped, _st["dropped"] = _st["dropped"], collections.Counter()
+    for event, n in dropped.items():
+        _st["dropped_total"] += n
+        rec = (time.time(), WARN, "dropped", "", {"event": event, "count": n})
+        lines.append(f"[warn] evlog: dropped {n} x {event} (queue full)")
+        records.append(rec)
+
+
+def _writer(q):
+    while True:
+        batch = [q.get()]
+        while True:
+            try:
+                batch.append(q.get_nowait())
+            except queue.Empty:
+                break
+
+        lines, records, waiters, stop = [], [], [], False
+        _report_dropped(lines, records)
+        for rec in batch:
+            if rec is _STOP:
+                stop = True
+            elif isinstance(rec, threading.Event):
+                waiters.append(rec)
+            else:
+                lines.append(format_record(rec))
+                records.append(rec)
+
+        if lines:
+            try:
+                out = sys.stdout
+                out.write("\n".join(lines) + "\n")
+                out.flush()
+            except (OSError, ValueError):
+                pass
+            if _st["file"]:
+                _st["file"].write("".join(json_record(r) + "\n" for r in records))
+                _st["file"].flush()
+            _st["written"] += len(records)
+        for ev in waiters:
+            ev.set()
+        if stop:
+            return
+
+
+# ========== 压一下 ==========
+
+def main():
+    """假装一个 33 Hz 的控制循环，每帧打 DEBUG，看一下开 / 关时入口的开销和满队列时的丢弃"""
+    frames = 20000
+    pose = {sid: 120.0 for sid in range(1, 9)}
+    for level in (INFO, DEBUG):
+        set_level(level)
+        t0 = time.perf_counter()
+        for k in range(frames):
+            debug("frame", "frame {k} ID1 {a:.1f}", k=k, a=pose[1])
+        dt = (time.perf_counter() - t0) / frames
+        flush()
+        print(f"level {LEVEL_NAMES[level]}: {dt * 1e6:.2f} us per debug() call", file=sys.stderr)
+    print(f"stats: {stats()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import time
+
+from pylx16a.lx16a import *
+
+# 不分配内存的 LX-16A 收发包：
+#   pylx16a 每次 move() / get_physical_angle() 都新建 list、拼 bytes、Python 里求和算校验，
+#   应答再解析成新的 list。8 个关节 × 33 Hz 再加读回，控制循环里每秒几千次小对象分配。
+#   这里：
+#     - 每个 ID 一个预先填好的 move 包（bytearray），每次只改 角度 / 时间 4 个字节 + 校验
+#       （校验 = ~(固定部分的和 + 这 4 个字节) & 0xFF，固定部分的和提前算好）
+#     - 读命令的包是常量，提前做好
+#     - 应答读进一块复用的缓冲（readinto），用 memoryview 直接解，不拷贝
+#     - 出错的语义和 pylx16a 一样：读不够字节 ServoTimeoutError，校验不对 ServoChecksumError，
+#       角度越界 ServoArgumentError，没上扭矩 / 电机模式 ServoLogicalError
+#
+# 用法：
+#   import fastcodec; fastcodec.install()   # 之后 LX16A.move / get_physical_angle / get_temp / get_vin 都走这里
+#   python fastcodec.py                     # 和原版比每次调用的耗时
+#   python robot.py trot --fast-codec
+
+SERVO_IDS = list(range(1, 9))
+
+CMD_MOVE = 1
+CMD_TEMP = 26
+CMD_VIN = 27
+CMD_POS = 28
+READ_CMDS = (CMD_TEMP, CMD_VIN, CMD_POS)
+
+_orig = {}
+
+
+class PacketCodec:
+    def __init__(self, ids=SERVO_IDS):
+        self.move_tpl = {}
+        self.move_base = {}
+        self.read_tpl = {}
+        for sid in ids:
+            self._prepare(sid)
+        self.rx = bytearray(16)
+        self.rx_mv = memoryview(self.rx)
+        # readinto 要的就是“前 n 个字节”的视图，按长度提前切好
+        self.rx_views = {n: self.rx_mv[:n] for n in range(7, 11)}
+
+    def _prepare(self, sid):
+        # 0x55 0x55 id len=7 cmd=1 角度lo 角度hi 时间lo 时间hi 校验
+        self.move_tpl[sid] = bytearray([0x55, 0x55, sid, 7, CMD_MOVE, 0, 0, 0, 0, 0])
+        self.move_base[sid] = sid + 7 + CMD_MOVE
+        for cmd in READ_CMDS:
+            self.read_tpl[(sid, cmd)] = bytes([0x55, 0x55, sid, 3, cmd, (~(sid + 3 + cmd)) & 0xFF])
+
+    # ---- 发 ----
+
+    def send_move(self, sid, raw, time_ms=0):
+        tpl = self.move_tpl.get(sid)
+        if tpl is None:
+            self._prepare(sid)
+            tpl = self.move_tpl[sid]
+        a_lo = raw & 0xFF
+        a_hi = (raw >> 8) & 0xFF
+        t_lo = time_ms & 0xFF
+        t_hi = (time_ms >> 8) & 0xFF
+        tpl[5] = a_lo
+        tpl[6] = a_hi
+        tpl[7] = t_lo
+        tpl[8] = t_hi
+        tpl[9] = ~(self.move_base[sid] + a_lo + a_hi + t_lo + t_hi) & 0xFF
+        LX16A._controller.write(tpl)
+
+    # ---- 收 ----
+
+    def read(self, sid, cmd, n):
+        """发读命令，应答读进复用缓冲；返回 n 字节参数的 memoryview（下一次读之前有效）"""
+        if (sid, cmd) not in self.read_tpl:
+            self._prepare(sid)
+        ser = LX16A._controller
+        ser.write(self.read_tpl[(sid, cmd)])
+
+        view = self.rx_views[n + 6]
+        readinto = getattr(ser, "readinto", None)
+        if readinto is not None:
+            got = readinto(view) or 0
+        else:
+            data = ser.read(n + 6)
+            got = len(data)
+            view[:got] = data
+
+        if got != n + 6:
+            raise ServoTimeoutError(f"Servo {sid}: {got} bytes (expected {n})", sid)
+        if (~sum(view[2:n + 5])) & 0xFF != view[n + 5]:
+            raise ServoChecksumError(f"Servo {sid}: bad checksum", sid)
+        return view[5:n + 5]
+
+    def physical_angle(self, sid):
+        p = self.read(sid, CMD_POS, 2)
+        raw = p[0] | (p[1] << 8)
+        if raw > 32767:
+            raw -= 65536
+        return raw * 6 / 25
+
+    def temp(self, sid):
+        return self.read(sid, CMD_TEMP, 1)[0]
+
+    def vin(self, sid):
+        p = self.read(sid, CMD_VIN, 2)
+        return p[0] | (p[1] << 8)
+
+
+# ========== 装到 LX16A 上 ==========
+
+def install(ids=SERVO_IDS):
+    """把 LX16A 的 move / get_physical_angle / get_temp / get_vin 换成预分配版本"""
+    codec = PacketCodec(ids)
+    if not _orig:
+        for name in ("move", "get_physical_angle", "get_temp", "get_vin"):
+            _orig[name] = getattr(LX16A, name)
+    orig_move = _orig["move"]
+
+    def move(self, angle, time=0, relative=False, wait=False):
+        if relative or wait:
+            return orig_move(self, angle, time, relative, wait)   # 不常用，走原来的
+        if not self._torque_enabled:
+            raise ServoLogicalError(f"Servo {self._id}: torque must be enabled to move", self._id)
+        if self._motor_mode:
+            raise ServoLogicalError(
+                f"Servo {self._id}: motor mode must be disabled to control movement", self._id)
+        lo = self._angle_limits[0] * 6 / 25
+        hi = self._angle_limits[1] * 6 / 25
+        if angle < 0 or angle > 240:
+            raise ServoArgumentError(
+                f"Servo {self._id}: angle must be between 0 and 240 (received {angle})", self._id)
+        if angle < lo or angle > hi:
+            raise ServoArgumentError(
+                f"Servo {self._id}: angle must be between {lo} and {hi} (received {angle})", self._id)
+        raw = round(angle * 25 / 6)
+        codec.send_move(self._id, raw, time)
+        self._commanded_angle = raw
+
+    LX16A.move = move
+    LX16A.get_physical_angle = lambda self: codec.physical_angle(self._id)
+    LX16A.get_temp = lambda self: codec.temp(self._id)
+    LX16A.get_vin = lambda self: codec.vin(self._id)
+    return codec
+
+
+def uninstall():
+    for name, fn in _orig.items():
+        setattr(LX16A, name, fn)
+
+
+# ========== 对比 ==========
+
+class CannedSerial:
+    """不接硬件的最小“串口”：写进来就丢，读的时候给一个固定的位置应答"""
+
+    def __init__(self, sid=1, raw=500):
+        reply = [0x55, 0x55, sid, 5, CMD_POS, raw & 0xFF, raw >> 8]
+        reply.append((~sum(reply[2:])) & 0xFF)
+        self.reply = bytes(reply)
+        self.timeout = 0.02
+        self.write_timeout = 0.02
+
+    def write(self, data):
+        return len(data)
+
+    def read(self, size=1):
+        return self.reply[:size]
+
+    def readinto(self, buf):
+        n = min(len(buf), len(self.reply))
+        buf[:n] = self.reply[:n]
+        return n
+
+    def reset_input_buffer(self):
+        pass
+
+    def reset_output_buffer(self):
+        pass
+
+    def flushInput(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def bench(servo, calls=20000):
+    """-> (move 微秒/次, get_physical_angle 微秒/次)"""
+    out = []
+    for fn in (lambda k: servo.move(100 + (k & 15)), lambda k: servo.get_physical_angle()):
+        fn(0)
+        t0 = time.perf_counter()
+        for k in range(calls):
+            fn(k)
+        out.append((time.perf_counter() - t0) / calls * 1e6)
+    return out
+
+
+def main():
+    LX16A._controller = CannedSerial()
+    # 不经过 LX16A.__init__（它要读一堆寄存器），只填 move 用得到的状态
+    servo = LX16A.__new__(LX16A)
+    servo._id = 1
+    servo._torque_enabled = True
+    servo._motor_mode = False
+    servo._angle_limits = (0, 1000)
+    servo._commanded_angle = 0
+
+    t_move, t_read = bench(servo)
+    print(f"pylx16a : move {t_move:.2f} us, get_physical_angle {t_read:.2f} us")
+    install()
+    f_move, f_read = bench(servo)
+    print(f"fastcodec: move {f_move:.2f} us, get_physical_angle {f_read:.2f} us "
+          f"(x{t_move / f_move:.1f}, x{t_read / f_read:.1f})")
+    print(f"angle read back: {servo.get_physical_angle():.2f}")
+    uninstall()
+
+
+if __name__ == "__main__":
+    main()
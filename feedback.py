@@ -0,0 +1,163 @@
+import json
+import math
+import time
+
+from pylx16a.lx16a import *
+
+import evlog
+
+# 外环位置修正（闭环）：
+#   每帧轮流读一个关节的实际角度，和“想要的”角度比较，
+#   每个关节学两个量（积分式，慢慢改）：
+#       offset：平均值差多少（比如 LF 腿吃不住重量，整体往下掉）
+#       gain  ：摆幅差多少（比如 LF 髋摆不开，原来靠手调 HIP_GAIN["LF"] = 1.5）
+#   下发 = 中心 + gain * (想要的 - 中心) + offset
+#   两个量都有上下限；学到的值按脚本分开存（learned_corrections_<脚本>.json），下次直接从这里起步。
+#   文件里连中心姿态一起存，中心对不上（STAND_POSE 改过）就不加载，从头学。
+#
+#   比较的是一个窗口（几个周期）里的 均值 / 标准差，所以舵机延迟不影响结果。
+#   防积分饱和：下发的角度被舵机限位夹过的读数要标出来，一个关节这个窗口里只要被夹过一次，
+#   这个窗口就不学它（再往限位外推也没用，摆幅也是被削平的，比出来的 gain 不对）。
+
+CORR_FILE = "learned_corrections_{name}.json"
+
+KI_OFFSET = 0.3       # 每个窗口把剩下的平均误差补上多少
+KI_GAIN = 0.3         # 每个窗口把剩下的摆幅比例补上多少
+OFFSET_LIMIT = 12.0   # offset 最多 ±12 度
+GAIN_MIN = 0.6
+GAIN_MAX = 2.0
+MIN_SAMPLES = 6       # 窗口里一个关节至少要有这么多读数才更新
+MIN_SWING = 2.0       # 想要的摆幅（标准差）小于这个就不学 gain（站着不动时）
+CLAMP_EPS = 0.01      # 度，下发值和夹紧前的指令差这么多就算被限位夹过
+
+
+# ========== 状态 ==========
+
+def corr_file(name):
+    return CORR_FILE.format(name=name)
+
+
+def make_corrections(center_pose, name, load=True):
+    """
+    center_pose: 摆动中心（一般是 STAND_POSE）
+    name: 脚本 / 步态名，决定存到哪个文件（dance 和 trotsinwalk 的站姿、步态都不一样，不能共用）
+    load=True 时从文件读上次学到的值当初值。
+    """
+    path = corr_file(name)
+    corr = {
+        "path": path,
+        "center": dict(center_pose),
+        "offset": {sid: 0.0 for sid in center_pose},
+        "gain": {sid: 1.0 for sid in center_pose},
+        "samples": {sid: [] for sid in center_pose},   # [(想要的, 实际, 被夹过), ...]
+        "next_read": 0,
+        "updates": 0,
+        "clamped_windows": {sid: 0 for sid in center_pose},   # 因为被夹过跳过了几个窗口
+    }
+    if load:
+        try:
+            with open(path, "r") as f:
+                saved = json.load(f)
+            center = {int(k): v for k, v in saved.get("center", {}).items()}
+            if center != corr["center"]:
+                evlog.warn("corr_load", "{path}: saved for a different center pose, starting from scratch",
+                           path=path)
+                return corr
+            for key, vals in saved["joints"].items():
+                sid = int(key)
+                if sid in corr["offset"]:
+                    corr["offset"][sid] = clip(vals["offset"], -OFFSET_LIMIT, OFFSET_LIMIT)
+                    corr["gain"][sid] = clip(vals["gain"], GAIN_MIN, GAIN_MAX)
+            evlog.info("corr_load", "Loaded corrections from {path}", path=path)
+        except FileNotFoundError:
+            pass
+    return corr
+
+
+def clip(x, lo, hi):
+    return max(lo, min(hi, x))
+
+
+def save_corrections(corr):
+    data = {
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "updates": corr["updates"],
+        "center": {str(sid): a for sid, a in sorted(corr["center"].items())},
+        "joints": {
+            str(sid): {"offset": round(corr["offset"][sid], 3),
+                       "gain": round(corr["gain"][sid], 4)}
+            for sid in sorted(corr["offset"])
+        },
+    }
+    with open(corr["path"], "w") as f:
+        json.dump(data, f, indent=2)
+
+
+# ========== 每帧 ==========
+
+def corr_apply(corr, pose):
+    """想要的姿态 -> 修正以后要下发的姿态（还没夹紧）"""
+    out = {}
+    for sid, a in pose.items():
+        c = corr["center"].get(sid)
+        if c is None:
+            out[sid] = a
+            continue
+        out[sid] = c + corr["gain"][sid] * (a - c) + corr["offset"][sid]
+    return out
+
+
+def corr_readback(corr, servos, desired_pose, command_pose, sent_pose):
+    """
+    轮流读一个关节，记下 (想要的, 实际, 被夹过)。
+    desired_pose 是统计用的“想要的”；command_pose 是夹紧之前的指令（修正、延迟补偿都算上以后的），
+    sent_pose 是夹紧以后真正下发的，两个不一样就是被夹过。
+    """
+    sids = list(corr["center"])
+    sid = sids[corr["next_read"] % len(sids)]
+    corr["next_read"] += 1
+    try:
+        meas = servos[sid].get_physical_angle()
+    except ServoError:
+        return
+    clamped = abs(sent_pose[sid] - command_pose[sid]) > CLAMP_EPS
+    corr["samples"][sid].append((desired_pose[sid], meas, clamped))
+
+
+# ========== 每个窗口 ==========
+
+def mean_std(xs):
+    m = sum(xs) / len(xs)
+    return m, math.sqrt(sum((x - m) ** 2 for x in xs) / len(xs))
+
+
+def corr_update(corr):
+    """用这个窗口的读数积分一次 offset / gain，然后清空窗口"""
+    for sid, samples in corr["samples"].items():
+        if any(c for _, _, c in samples):
+            corr["clamped_windows"][sid] += 1
+            samples.clear()
+            continue
+        if len(samples) < MIN_SAMPLES:
+            continue
+        want_m, want_s = mean_std([d for d, _, _ in samples])
+        got_m, got_s = mean_std([m for _, m, _ in samples])
+
+        corr["offset"][sid] = clip(corr["offset"][sid] + KI_OFFSET * (want_m - got_m),
+                                   -OFFSET_LIMIT, OFFSET_LIMIT)
+        if want_s >= MIN_SWING and got_s > 1e-3:
+            ratio = want_s / got_s
+            g = corr["gain"][sid] * (1.0 + KI_GAIN * (ratio - 1.0))
+            corr["gain"][sid] = clip(g, GAIN_MIN, GAIN_MAX)
+        samples.clear()
+    corr["updates"] += 1
+
+
+def corr_summary(corr):
+    lines = []
+    for sid in sorted(corr["offset"]):
+        line = f"  ID{sid}: offset {corr['offset'][sid]:+.1f}°, gain {corr['gain'][sid]:.2f}"
+        if corr["clamped_windows"][sid]:
+            line += f" ({corr['clamped_windows'][sid]} windows skipped: command hit the limit)"
+        lines.append(line)
+    return "\n".join(lines)
@@ -1,6 +1,8 @@
 from pylx16a.lx16a import *
 import time
 
+import evlog
+
 PORT = "/dev/ttyUSB0"
 
 ANGLE_MIN = 40
@@ -42,18 +44,16 @@ def init_servos():
         s = LX16A(sid)
         s.set_angle_limits(ANGLE_MIN, ANGLE_MAX)
         servos[sid] = s
-        print(f"Servo {sid} init OK")
+        evlog.info("servo_init", "Servo {sid} init OK", sid=sid)
     time.sleep(0.5)
     return servos
 
 
 def read_current_pose(servos):
     pose = {}
-    print("Current pose:")
     for sid, s in servos.items():
-        a = s.get_physical_angle()
-        pose[sid] = a
-        print(f"  ID{sid}: {a:.1f}°")
+        pose[sid] = s.get_physical_angle()
+    evlog.info("pose", evlog.fmt_pose, pose=dict(pose))
     return pose
 
 
@@ -137,18 +137,18 @@ def main():
     servos = init_servos()
 
     # 先站到 STAND_POSE
-    print("\nMove to STAND_POSE ...")
+    evlog.info("stage", "\nMove to STAND_POSE ...")
     cur = read_current_pose(servos)
     smooth_move(servos, cur, STAND_POSE, duration=1.0, steps=40)
     cur = clone_pose(STAND_POSE)
 
     # 多轮对角小跑
     for cycle in range(NUM_CYCLES):
-        print(f"\n=== Trot cycle {cycle+1}/{NUM_CYCLES} ===")
+        evlog.info("cycle", "\n=== Trot cycle {k}/{n} ===", k=cycle + 1, n=NUM_CYCLES)
         phases = make_trot_phases(STAND_POSE)  # 每轮都从 STAND_POSE 定义
 
         for idx, phase in enumerate(phases):
-            print(f"  phase {idx+1}/{len(phases)}")
+            evlog.debug("phase", "  phase {k}/{n}", k=idx + 1, n=len(phases))
             smooth_move(servos, cur, phase,
                         duration=STEP_DURATION, steps=STEP_STEPS)
             cur = clone_pose(phase)
@@ -158,7 +158,7 @@ def main():
         cur = clone_pose(STAND_POSE)
         time.sleep(0.1)
 
-    print("\nDone; final pose = STAND_POSE.")
+    evlog.info("stage", "\nDone; final pose = STAND_POSE.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,184 @@
+import time
+import math
+
+import evlog
+from nodriftwalk import (init_servos, read_current_pose, smooth_move,
+                         clone_pose, build_stand_pose, make_step_phases,
+                         STEP_DURATION)
+from trotsinwalk import (HIP_AMP, KNEE_LIFT, HIP_GAIN, KNEE_GAIN,
+                         GROUP_A, STEPS_PER_CYCLE, STEP_TIME)
+
+# 连续步态混合：
+#   - 每轮之间不再回 stand_pose + sleep，直接接下一轮
+#   - 步态之间（crawl ↔ trot ↔ stand）用相位对齐的交叉淡化切换
+#   - 防漂移：每条腿落脚都是相对 stand_pose 的绝对角度，
+#     所以一轮走完以后的姿态是固定的（周期闭合），偏移不会累积
+
+# ----------------- 腿映射 -----------------
+LEG_MAP = {
+    "RF": (1, 2),  # right-front
+    "RR": (3, 4),  # right-rear
+    "LR": (5, 6),  # left-rear
+    "LF": (7, 8),  # left-front
+}
+
+# ----------------- 控制节奏 -----------------
+CONTROL_DT = 0.02      # 每帧间隔（秒）
+BLEND_CYCLES = 1.0     # 切换步态时用几个周期做交叉淡化
+
+# 每种步态一个周期多长（秒）
+GAIT_PERIOD = {
+    "stand": 1.0,
+    "crawl": 8 * STEP_DURATION,            # nodriftwalk 的 8 个相位
+    "trot":  STEPS_PER_CYCLE * STEP_TIME,  # trotsinwalk 的正弦小跑
+}
+
+# 走什么：[(步态, 周期数), ...]
+SCHEDULE = [
+    ("crawl", 4),
+    ("trot", 8),
+    ("crawl", 3),
+    ("stand", 1),
+]
+
+
+# ========== 各步态：相位 phi∈[0,1) -> 姿态 ==========
+
+def crawl_keyframes(base_pose):
+    """
+    连续爬行的 8 个关键帧。
+    先从 base_pose 走一轮得到稳态终点，再从这个终点出发生成一轮：
+    因为落脚是绝对角度，这一轮的终点和起点相同，可以无缝首尾相接。
+    """
+    warmup = make_step_phases(base_pose)
+    return make_step_phases(base_pose, start_pose=warmup[-1])
+
+
+def crawl_pose(frames, phi):
+    """第 k 段从 frames[k-1] 线性插到 frames[k]，k=0 时接上一轮的最后一帧"""
+    n = len(frames)
+    x = phi * n
+    k = min(int(x), n - 1)
+    alpha = x - k
+    p0 = frames[k - 1]
+    p1 = frames[k]
+    return {sid: p0[sid] + (p1[sid] - p0[sid]) * alpha for sid in p1}
+
+
+def trot_pose(base_pose, phi):
+    """和 trotsinwalk.trot_sine_walk 同一套公式，只是改成相位的函数"""
+    pose = clone_pose(base_pose)
+    for leg, (hip_id, knee_id) in LEG_MAP.items():
+        phase = 2.0 * math.pi * phi
+        if leg not in GROUP_A:
+            phase += math.pi
+        swing = math.sin(phase)
+
+        pose[hip_id] = base_pose[hip_id] + HIP_AMP * HIP_GAIN[leg] * swing
+        lift = KNEE_LIFT * KNEE_GAIN[leg] * max(0.0, swing)
+        pose[knee_id] = base_pose[knee_id] + lift
+    return pose
+
+
+def make_gaits(base_pose):
+    """返回 {名字: phi -> pose}"""
+    frames = crawl_keyframes(base_pose)
+    return {
+        "stand": lambda phi: clone_pose(base_pose),
+        "crawl": lambda phi: crawl_pose(frames, phi),
+        "trot":  lambda phi: trot_pose(base_pose, phi),
+    }
+
+
+# ========== 混合 ==========
+
+def smoothstep(w):
+    w = max(0.0, min(1.0, w))
+    return w * w * (3.0 - 2.0 * w)
+
+
+def blend_pose(pose_a, pose_b, w):
+    return {sid: pose_a[sid] + (pose_b[sid] - pose_a[sid]) * w
+            for sid in pose_a}
+
+
+def clamp_pose(servos, pose):
+    out = {}
+    for sid, a in pose.items():
+        min_ang, max_ang = servos[sid].get_angle_limits()
+        if a < min_ang:
+            a = min_ang
+        if a > max_ang:
+            a = max_ang
+        out[sid] = a
+    return out
+
+
+def run_schedule(servos, base_pose, schedule=SCHEDULE, dt=CONTROL_DT):
+    """
+    按 schedule 连续走，所有步态共用同一个相位 phi。
+    进入新步态的头 BLEND_CYCLES 个周期里，
+    姿态和周期长度都从上一个步态平滑过渡过去。
+    """
+    gaits = make_gaits(base_pose)
+    prev = "stand"
+    phi = 0.0
+    next_t = time.time()
+    pose = dict(base_pose)     # schedule 是空的时候直接返回站姿
+
+    for name, cycles in schedule:
+        evlog.info("cycle", "\n=== {prev} -> {name} ({cycles} cycles) ===",
+                   prev=prev, name=name, cycles=cycles)
+        done = 0.0   # 这一段已经走了几个周期
+
+        while done < cycles:
+            if prev == name or BLEND_CYCLES <= 0:
+                w = 1.0
+            else:
+                w = smoothstep(done / BLEND_CYCLES)
+
+            pose = blend_pose(gaits[prev](phi), gaits[name](phi), w)
+            pose = clamp_pose(servos, pose)
+            for sid in range(1, 9):
+                servos[sid].move(pose[sid])
+
+            # 周期长度也一起过渡，相位始终连续
+            period = GAIT_PERIOD[prev] + (GAIT_PERIOD[name] - GAIT_PERIOD[prev]) * w
+            dphi = dt / period
+            phi += dphi
+            done += dphi
+            if phi >= 1.0:
+                phi -= 1.0
+
+            # 按绝对时间节拍走，不让 move() 的耗时累积
+            next_t += dt
+            delay = next_t - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_t = time.time()
+
+        prev = name
+
+    return pose
+
+
+# ========== 主流程 ==========
+
+def main():
+    servos = init_servos()
+    stand_pose = build_stand_pose()
+
+    evlog.info("stage", "\nMove to stand_pose ...")
+    cur = read_current_pose(servos)
+    smooth_move(servos, cur, stand_pose, duration=1.0, steps=40)
+
+    cur = run_schedule(servos, stand_pose)
+
+    # 最后一段如果不是 stand，收回站姿
+    smooth_move(servos, cur, stand_pose, duration=0.4, steps=24)
+    evlog.info("stage", "\nDone; final pose is stand_pose.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+import os
+import sys
+import json
+import runpy
+import itertools
+
+import numpy as np
+
+from logarch import ArchiveReader, ARCHIVE_EXT
+
+# 步态质量分析（看数，不看图）：
+#   改了 HIP_GAIN / SERVO_AMP 以后小跑是变好了还是变差了，现在是盯着 angle_plot.png 看。
+#   这里把日志（t,id1..id8 的 CSV，或者 logarch 的 .lxa）一块一块流式读进来，
+#   内存只跟 SEG_LEN 有关，日志多长都行。每个关节算：
+#     - 主频：按名义采样率均匀重采样，Welch 法（SEG_LEN 点一段、一半重叠、Hann 窗）
+#       平均功率谱，找峰，再用抛物线插值细化
+#     - 幅度：半峰峰值 (max - min) / 2；还有主频分量的幅度 A1（峰附近几个 bin 的功率算回来）
+#     - 直流偏置：平均值 - STAND_POSE（站姿从 .lxa 的参数里拿，或者 --stand 脚本）
+#     - 削顶比例：贴着 ANGLE_MIN / ANGLE_MAX 的帧占多少
+#   整体的：
+#     - 对角腿相位差：LF/RR、RF/LR 两组内部（小跑应该 ~0°）、两组之间（应该 ~180°），
+#       用主频上的互功率谱的相位。先把每个关节乘上 SERVO_DIR（rt.py 有，.lxa 参数或 --stand 脚本里拿），
+#       换回“步态方向”再比，不然装反了的舵机会让相位差翻 180°、膝盖加起来还会互相抵消
+#     - 时间抖动：帧间隔的平均 / 标准差 / 最大，晚了 LATE_FACTOR 倍以上的帧数
+#
+# 用法：
+#   python gaitstats.py angle_log.csv [--stand trotsinwalk.py] [--limits 40 200]
+#   python gaitstats.py before.lxa after.lxa          # 多个日志最后给一张对比表
+#   python gaitstats.py run.lxa --json run_stats.json
+
+SEG_LEN = 512          # Welch 每段点数（33 Hz 下约 15 s，频率分辨率 ~0.06 Hz）
+READ_ROWS = 4096       # CSV 每次读多少行
+F_MIN = 0.2            # Hz，比这低的当成漂移，不算主频
+PEAK_BINS = 3          # 主频分量幅度：峰左右各算几个 bin（Hann 主瓣）
+LATE_FACTOR = 1.5      # 帧间隔超过名义的这么多倍算“晚了”
+CLIP_EPS = 0.05        # 度
+DEFAULT_LIMITS = (40, 200)
+
+SERVO_IDS = list(range(1, 9))
+HIP_IDS = [1, 3, 5, 7]
+
+LEG_MAP = {
+    "RF": (1, 2),  # right-front
+    "RR": (3, 4),  # right-rear
+    "LR": (5, 6),  # left-rear
+    "LF": (7, 8),  # left-front
+}
+
+# 相位差：(名字, A 组髋, B 组髋)；各自是几个关节的和
+PHASE_PAIRS = [
+    ("LF/RR hips (same diagonal)", [7], [3]),
+    ("RF/LR hips (same diagonal)", [1], [5]),
+    ("LF+RR vs RF+LR hips", [7, 3], [1, 5]),
+    ("LF+RR vs RF+LR knees", [8, 4], [2, 6]),
+]
+
+
+# ========== 读 ==========
+
+def iter_chunks(path, rows=READ_ROWS):
+    """一块一块给 (t, Q)；.lxa 按它自己的块，CSV 每次 rows 行"""
+    if path.endswith(ARCHIVE_EXT):
+        with ArchiveReader(path) as r:
+            yield from r.iter_chunks()
+        return
+    with open(path, newline="") as f:
+        header = f.readline().strip().split(",")
+        cols = [header.index("t")] + [header.index(f"id{sid}") for sid in SERVO_IDS]
+        while True:
+            lines = list(itertools.islice(f, rows))
+            if not lines:
+                return
+            lines = [ln.replace("None", "nan") for ln in lines if ln.strip()]
+            block = np.loadtxt(lines, delimiter=",", usecols=cols, ndmin=2)
+            yield block[:, 0], block[:, 1:]
+
+
+def log_params(path):
+    """.lxa 文件头里的脚本参数（CSV 没有）"""
+    if not path.endswith(ARCHIVE_EXT):
+        return {}
+    with ArchiveReader(path) as r:
+        return r.meta.get("params", {})
+
+
+def stand_from_params(params):
+    if "STAND_POSE" not in params:
+        return None
+    stand = {int(k): float(v) for k, v in params["STAND_POSE"].items()}
+    for sid, off in params.get("SERVO_OFF", {}).items():   # rt.py 的站姿 = STAND_POSE + SERVO_OFF
+        stand[int(sid)] += off
+    return stand
+
+
+def dirs_from_params(params):
+    """SERVO_DIR（舵机装反了是 -1）；没有就是全 +1"""
+    dirs = params.get("SERVO_DIR")
+    if not dirs:
+        return None
+    return {int(k): int(v) for k, v in dirs.items()}
+
+
+def from_script(path):
+    """-> (站姿, SERVO_DIR)，从脚本的常量里拿"""
+    ns = runpy.run_path(path, run_name="__meta__")
+    dirs = dirs_from_params(ns)
+    if "build_stand_pose" in ns:          # nodriftwalk：ROLL_ADJ 修正后的站姿
+        return {int(k): float(v) for k, v in ns["build_stand_pose"]().items()}, dirs
+    return stand_from_params({k: v for k, v in ns.items() if k in ("STAND_POSE", "SERVO_OFF")}), dirs
+
+
+# ========== 流式累加 ==========
+
+def make_stats(fs, nominal_dt, limits=DEFAULT_LIMITS, seg_len=SEG_LEN, dirs=None):
+    nbins = seg_len // 2 + 1
+    return {
+        "fs": fs,
+        "dirs": np.array([dirs[sid] if dirs else 1 for sid in SERVO_IDS], dtype=float),
+        "nominal_dt": nominal_dt,
+        "limits": limits,
+        "seg_len": seg_len,
+        "window": np.hanning(seg_len),
+        # 原始数据
+        "n": 0,
+        "sum": np.zeros(8),
+        "min": np.full(8, np.inf),
+        "max": np.full(8, -np.inf),
+        "clipped": np.zeros(8, dtype=np.int64),
+        # 帧间隔
+        "t_first": None,
+        "t_prev": None,
+        "dt_n": 0,
+        "dt_sum": 0.0,
+        "dt_sq": 0.0,
+        "dt_max": 0.0,
+        "late": 0,
+        # 均匀重采样 + Welch
+        "last": None,            # 上一块最后一行 (t, q)，跨块插值用
+        "next_tu": None,
+        "ubuf": np.empty((0, 8)),
+        "psd": np.zeros((nbins, 8)),
+        "csd": {name: np.zeros(nbins, dtype=complex) for name, _, _ in PHASE_PAIRS},
+        "wsum2": 0.0,            # 各段窗的平方和累加，算 A1 用
+        "segments": 0,
+    }
+
+
+def _welch_segment(st, U):
+    """一段（不够 SEG_LEN 点的用自己长度的窗，后面补零）"""
+    w = st["window"] if len(U) == st["seg_len"] else np.hanning(len(U))
+    X = np.fft.rfft((U - U.mean(axis=0)) * w[:, None], n=st["seg_len"], axis=0)
+    st["wsum2"] += float((w * w).sum())
+    st["psd"] += (X * X.conj()).real
+    X = X * st["dirs"]          # 相位按步态方向比
+    for name, a, b in PHASE_PAIRS:
+        xa = X[:, [sid - 1 for sid in a]].sum(axis=1)
+        xb = X[:, [sid - 1 for sid in b]].sum(axis=1)
+        st["csd"][name] += xa * xb.conj()
+    st["segments"] += 1
+
+
+def stats_update(st, t, Q):
+    if not len(t):
+        return
+    lo, hi = st["limits"]
+    good = np.isfinite(Q)
+    Qf = np.where(good, Q, np.nan)
+    st["n"] += len(t)
+    st["sum"] += np.nansum(Qf, axis=0)
+    st["min"] = np.fmin(st["min"], np.nanmin(Qf, axis=0))
+    st["max"] = np.fmax(st["max"], np.nanmax(Qf, axis=0))
+    st["clipped"] += ((Q <= lo + CLIP_EPS) | (Q >= hi - CLIP_EPS)).sum(axis=0)
+
+    # 帧间隔（接上上一块的最后一帧）
+    tt = t if st["t_prev"] is None else np.concatenate([[st["t_prev"]], t])
+    if st["t_first"] is None:
+        st["t_first"] = float(t[0])
+    dt = np.diff(tt)
+    if len(dt):
+        st["dt_n"] += len(dt)
+        st["dt_sum"] += float(dt.sum())
+        st["dt_sq"] += float((dt * dt).sum())
+        st["dt_max"] = max(st["dt_max"], float(dt.max()))
+        st["late"] += int((dt > LATE_FACTOR * st["nominal_dt"]).sum())
+    st["t_prev"] = float(t[-1])
+
+    # 均匀重采样到 fs，攒够 SEG_LEN 就做一段（一半重叠）
+    Qi = np.where(good, Q, np.nanmean(Qf, axis=0))       # 缺的点用这块的均值顶一下
+    if st["last"] is not None:
+        t_in = np.concatenate([[st["last"][0]], t])
+        Q_in = np.vstack([st["last"][1], Qi])
+    else:
+        t_in, Q_in = t, Qi
+        st["next_tu"] = float(t[0])
+    tu = np.arange(st["next_tu"], t_in[-1] + 1e-12, 1.0 / st["fs"])
+    if len(tu):
+        U = np.column_stack([np.interp(tu, t_in, Q_in[:, i]) for i in range(8)])
+        st["ubuf"] = np.vstack([st["ubuf"], U])
+        st["next_tu"] = float(tu[-1] + 1.0 / st["fs"])
+    st["last"] = (float(t[-1]), Qi[-1].copy())
+
+    L = st["seg_len"]
+    while len(st["ubuf"]) >= L:
+        _welch_segment(st, st["ubuf"][:L])
+        st["ubuf"] = st["ubuf"][L // 2:]
+
+
+def _peak(spec, freqs):
+    """功率谱峰的频率（抛物线插值）和下标；F_MIN 以下不算"""
+    valid = np.nonzero(freqs >= F_MIN)[0]
+    if not len(valid) or spec[valid].max() <= 0:
+        return float("nan"), None
+    k = int(valid[spec[valid].argmax()])
+    f = freqs[k]
+    if 0 < k < len(spec) - 1:
+        a, b, c = np.log(spec[k - 1:k + 2] + 1e-30)
+        denom = a - 2 * b + c
+        if denom < 0:
+            f += 0.5 * (a - c) / denom * (freqs[1] - freqs[0])
+    return float(f), k
+
+
+def stats_finish(st, stand=None):
+    L = st["seg_len"]
+    if st["segments"] == 0 and len(st["ubuf"]) >= 8:
+        # 日志比一段还短：剩下的补零做一段（频率分辨率差一些）
+        _welch_segment(st, st["ubuf"])
+    freqs = np.fft.rfftfreq(L, 1.0 / st["fs"])
+    psd = st["psd"]
+
+    joints = {}
+    mean = st["sum"] / max(st["n"], 1)
+    for i, sid in enumerate(SERVO_IDS):
+        f, k = _peak(psd[:, i], freqs)
+        a1 = float("nan")
+        if k is not None and st["segments"]:
+            lo, hi = max(1, k - PEAK_BINS), min(len(freqs), k + PEAK_BINS + 1)
+            power = psd[lo:hi, i].sum()
+            a1 = float(np.sqrt(4 * power / (L * st["wsum2"])))   # Parseval，正弦：P = L·A²·Σw²/4
+        joints[sid] = {
+            "freq_hz": f,
+            "amp": float((st["max"][i] - st["min"][i]) / 2),
+            "a1": a1,
+            "mean": float(mean[i]),
+            "dc_offset": float(mean[i] - stand[sid]) if stand else float("nan"),
+            "clip_ratio": float(st["clipped"][i] / max(st["n"], 1)),
+        }
+
+    gait_f, k0 = _peak(psd[:, [sid - 1 for sid in HIP_IDS]].sum(axis=1), freqs)
+    phase = {}
+    for name, csd in st["csd"].items():
+        if k0 is None:
+            phase[name] = float("nan")
+            continue
+        deg = round(float(np.degrees(np.angle(csd[k0]))), 1)
+        phase[name] = deg + 360.0 if deg <= -180.0 else deg     # (-180, 180]，反相统一显示 +180
+
+    dt_mean = st["dt_sum"] / st["dt_n"] if st["dt_n"] else float("nan")
+    dt_std = np.sqrt(max(st["dt_sq"] / st["dt_n"] - dt_mean ** 2, 0.0)) if st["dt_n"] else float("nan")
+    return {
+        "frames": st["n"],
+        "duration": (st["t_prev"] - st["t_first"]) if st["n"] else 0.0,
+        "segments": st["segments"],
+        "gait_freq_hz": gait_f,
+        "joints": joints,
+        "phase_deg": phase,
+        "servo_dir": st["dirs"].astype(int).tolist(),
+        "timing": {"nominal": st["nominal_dt"], "mean": dt_mean, "std": float(dt_std),
+                   "max": st["dt_max"], "late": st["late"]},
+        "limits": list(st["limits"]),
+    }
+
+
+# ========== 一个日志 ==========
+
+def analyze(path, stand=None, limits=None, seg_len=SEG_LEN, dirs=None):
+    params = log_params(path)
+    stand = stand or stand_from_params(params)
+    dirs = dirs or dirs_from_params(params)
+    if limits is None:
+        limits = (params["ANGLE_MIN"], params["ANGLE_MAX"]) if "ANGLE_MIN" in params else DEFAULT_LIMITS
+
+    chunks = iter_chunks(path)
+    try:
+        t, Q = next(chunks)
+    except StopIteration:
+        raise ValueError(f"{path}: empty log")
+    dt0 = np.diff(t)
+    nominal = params.get("STEP_TIME") or (float(np.median(dt0)) if len(dt0) else 0.03)
+    st = make_stats(1.0 / nominal, nominal, limits, seg_len, dirs)
+    stats_update(st, t, Q)
+    for t, Q in chunks:
+        stats_update(st, t, Q)
+    return stats_finish(st, stand)
+
+
+def report(path, res):
+    tm = res["timing"]
+    lines = [f"{path}: {res['frames']} frames, {res['duration']:.1f} s, "
+             f"{res['segments']} Welch segments, gait {res['gait_freq_hz']:.3f} Hz"]
+    lines.append("  joint     freq    amp     A1    mean   dc_off  clip%")
+    for leg, (hip, knee) in LEG_MAP.items():
+        for sid, kind in ((hip, "hip"), (knee, "knee")):
+            j = res["joints"][sid]
+            lines.append(f"  {leg} {kind:<4} {j['freq_hz']:6.3f} {j['amp']:6.1f} {j['a1']:6.1f} "
+                         f"{j['mean']:7.1f} {j['dc_offset']:+7.1f} {100 * j['clip_ratio']:6.1f}")
+    flipped = [sid for sid, d in zip(SERVO_IDS, res["servo_dir"]) if d < 0]
+    lines.append("  phase lag at gait frequency" +
+                 (f" (SERVO_DIR applied, flipped IDs {flipped}):" if flipped else ":"))
+    for name, deg in res["phase_deg"].items():
+        lines.append(f"    {name:<28} {deg:+7.1f} deg")
+    lines.append(f"  timing: dt mean {tm['mean'] * 1000:.1f} ms (nominal {tm['nominal'] * 1000:.1f}), "
+                 f"std {tm['std'] * 1000:.2f} ms, max {tm['max'] * 1000:.1f} ms, "
+                 f"{tm['late']} late (> {LATE_FACTOR:.1f}x)")
+    return "\n".join(lines)
+
+
+def compare_table(results):
+    """多个日志一行一个，挑几个最能说明好坏的数"""
+    width = max(len(os.path.basename(p)) for p in results)
+    lines = [f"{'log':<{width}}  gait Hz  hip amp  |dc| mean  A-B lag  clip%  dt std ms  late"]
+    for path, res in results.items():
+        j = res["joints"]
+        hip_amp = np.mean([j[sid]["amp"] for sid in HIP_IDS])
+        dc = np.mean([abs(j[sid]["dc_offset"]) for sid in SERVO_IDS])
+        clip = 100 * np.mean([j[sid]["clip_ratio"] for sid in SERVO_IDS])
+        lag = res["phase_deg"]["LF+RR vs RF+LR hips"]
+        lines.append(f"{os.path.basename(path):<{width}}  {res['gait_freq_hz']:7.3f}  {hip_amp:7.1f}  "
+                     f"{dc:9.1f}  {lag:+7.1f}  {clip:5.1f}  {res['timing']['std'] * 1000:9.2f}  "
+                     f"{res['timing']['late']:4d}")
+    return "\n".join(lines)
+
+
+def main():
+    args = sys.argv[1:]
+    opt = {}
+    for flag, n in (("--stand", 1), ("--limits", 2), ("--json", 1)):
+        if flag in args:
+            i = args.index(flag)
+            opt[flag] = args[i + 1:i + 1 + n]
+            del args[i:i + 1 + n]
+    if not args:
+        print("usage: python gaitstats.py LOG [LOG ...] [--stand SCRIPT.py] [--limits LO HI] [--json OUT]")
+        return
+    stand, dirs = from_script(opt["--stand"][0]) if "--stand" in opt else (None, None)
+    limits = tuple(map(float, opt["--limits"])) if "--limits" in opt else None
+
+    results = {}
+    for path in args:
+        results[path] = analyze(path, stand, limits, dirs=dirs)
+        print(report(path, results[path]))
+        print()
+    if len(results) > 1:
+        print(compare_table(results))
+    if "--json" in opt:
+        with open(opt["--json"][0], "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import sys
+import collections
+
+import evlog
+from busarb import BusArbiter, PRIO_HEALTH
+
+# 健康监测（温度 + 供电电压）：
+#   boottest.py 只在开机时读一次电压。真正出事是在走路的时候：
+#   24 个周期的 trot_sine_walk 走下来舵机会过热、电池会被拉低到掉电。
+#   这里每个控制周期最多塞一次 温度 / 电压 读取（轮流读 8 个舵机），
+#   交给 busarb 的 PRIO_HEALTH，只用周期里剩下的空闲总线时间，不会让帧迟到。
+#   温度每个舵机各存最近 HEALTH_WINDOW 个读数；电压是同一路电源，不分舵机，存最近 HEALTH_WINDOW 个。
+#   用滑动平均判断（单个读数的瞬时跌落不算）：
+#       ok   -> slow：温度 >= TEMP_SLOW 或 电压 <= VIN_SLOW，步态放慢
+#       slow -> ok  ：回到阈值以内 HYSTERESIS 的余量才恢复
+#       stop        ：温度 >= TEMP_STOP 或 电压 <= VIN_STOP，停下来（不再恢复）
+#
+# 用法（trotsinwalk.py 里）：
+#   health = make_health(servos)
+#   每个周期 health_submit(health, arb, servos)，然后看 health["level"]
+
+TEMP_SLOW = 65      # °C
+TEMP_STOP = 75      # °C（LX-16A 默认过温保护是 85）
+VIN_SLOW = 6600     # mV（2S 锂电 7.4V 标称）
+VIN_STOP = 6200     # mV
+TEMP_HYST = 3       # °C
+VIN_HYST = 200      # mV
+
+HEALTH_WINDOW = 8   # 滑动窗口长度
+MIN_SAMPLES = 3     # 窗口里至少这么多个读数才参与判断
+SLOW_FACTOR = 1.5   # slow 的时候每帧时间放大多少倍
+
+
+# ========== 状态 ==========
+
+def make_health(servos):
+    ids = list(servos)
+    return {
+        "ids": ids,
+        "temp": {sid: collections.deque(maxlen=HEALTH_WINDOW) for sid in ids},
+        "vin": collections.deque(maxlen=HEALTH_WINDOW),   # (sid, mV)
+        "next": 0,
+        "busy": False,      # 已经有一个读取在排队了
+        "reads": 0,
+        "errors": 0,
+        "level": "ok",
+        "reason": "",
+    }
+
+
+# ========== 每个周期 ==========
+
+def health_submit(health, arb, servos):
+    """排一个健康读取（上一个还没轮到就不排，免得越积越多）"""
+    if health["busy"] or health["level"] == "stop":
+        return
+    n = health["next"]
+    health["next"] += 1
+    sid = health["ids"][(n // 2) % len(health["ids"])]
+    kind = "temp" if n % 2 == 0 else "vin"
+    fn = servos[sid].get_temp if kind == "temp" else servos[sid].get_vin
+
+    def on_done(job):
+        health["busy"] = False
+        if job["error"] is None:
+            health_record(health, kind, sid, job["result"])
+        else:
+            health["errors"] += 1
+
+    health["busy"] = True
+    arb.submit(PRIO_HEALTH, fn, key=f"get_{kind}", on_done=on_done)
+
+
+def health_record(health, kind, sid, value):
+    if kind == "temp":
+        health["temp"][sid].append(value)
+    else:
+        health["vin"].append((sid, value))
+    health["reads"] += 1
+    health_check(health)
+
+
+def rolling_temps(health):
+    """{sid: 平均温度}，读数不够的舵机跳过"""
+    return {sid: sum(d) / len(d) for sid, d in health["temp"].items()
+            if len(d) >= MIN_SAMPLES}
+
+
+def rolling_vin(health):
+    """(平均电压, 最低的那个舵机)，读数不够返回 (None, None)"""
+    d = health["vin"]
+    if len(d) < MIN_SAMPLES:
+        return None, None
+    return sum(v for _, v in d) / len(d), min(d, key=lambda x: x[1])[0]
+
+
+def health_check(health):
+    """按滑动平均更新 level；stop 之后不再回去"""
+    if health["level"] == "stop":
+        return
+    temps = rolling_temps(health)
+    hot_sid = max(temps, key=temps.get) if temps else None
+    t = temps[hot_sid] if temps else 0.0
+    v, low_sid = rolling_vin(health)
+    if v is None:
+        v = float("inf")
+
+    slow = health["level"] == "slow"
+    hot = t > TEMP_SLOW - TEMP_HYST if slow else t >= TEMP_SLOW
+    low = v < VIN_SLOW + VIN_HYST if slow else v <= VIN_SLOW
+
+    if t >= TEMP_STOP or v <= VIN_STOP:
+        level = "stop"
+    elif hot or low:
+        level = "slow"
+    else:
+        level = "ok"
+
+    if level != health["level"]:
+        reasons = []
+        if hot:
+            reasons.append(f"ID{hot_sid} {t:.0f}°C")
+        if low:
+            reasons.append(f"{v / 1000:.2f} V (lowest at ID{low_sid})")
+        health["reason"] = ", ".join(reasons)
+        evlog.warn("health_level", "health: {old} -> {new} ({reason})",
+                   old=health["level"], new=level, reason=health["reason"] or "recovered")
+        health["level"] = level
+
+
+def health_summary(health):
+    lines = [f"  level {health['level']}, reads {health['reads']}, errors {health['errors']}"]
+    v = [mv for _, mv in health["vin"]]
+    if v:
+        lines.append(f"  supply: {sum(v) / len(v) / 1000:.2f} V (min {min(v) / 1000:.2f})")
+    for sid in health["ids"]:
+        t = health["temp"][sid]
+        if t:
+            lines.append(f"  ID{sid}: {sum(t) / len(t):.0f}°C (max {max(t)})")
+    return "\n".join(lines)
+
+
+# ========== 单独跑：站着监测 ==========
+
+def main():
+    if "--sim" in sys.argv:
+        from simbus import install
+        install()
+
+    from trotsinwalk import init_servos, STEP_TIME
+    servos = init_servos()
+    health = make_health(servos)
+    arb = BusArbiter(STEP_TIME)
+    arb.start()
+    seconds = 5
+    for tick in range(int(seconds / STEP_TIME)):
+        health_submit(health, arb, servos)
+        arb.run_tick()
+        arb.wait_next_tick()
+    print("Health:")
+    print(health_summary(health))
+    print("Bus arbiter:")
+    print(arb.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import math
+import cmath
+
+from pylx16a.lx16a import *
+
+from simbus import load_model, MODEL_FILE
+
+# 延迟补偿（前馈）：
+#   舵机对指令有 死区时间 L + 一阶惯性 tau，正弦步态一快就会相位滞后、幅度变小，
+#   对角腿不同步。步态是已知频率的周期信号，所以在这个频率上把舵机的
+#   G(jw) = e^{-jwL} / (1 + jw tau) 反过来补：
+#       提前量 advance = L + atan(w tau) / w      （相位超前）
+#       增益   gain    = sqrt(1 + (w tau)^2)       （幅度放大，有上限）
+#   指令 = 站姿 + gain * (期望(t + advance) - 站姿)
+#
+#   参数来源：
+#     - servo_model.json（servochar.py 测的）
+#     - 在线：每帧轮流读一个关节，在步态频率上递推拟合 指令/实际 的正弦，估计 G
+#
+# 用法（trotsinwalk.py / rt.py 里）：
+#   comp = make_compensator(STAND_POSE, STEPS_PER_CYCLE * STEP_TIME, STEP_TIME)
+#   pose = comp_command(comp, pose_at, step)
+
+MAX_GAIN = 1.6          # 幅度最多放大多少，免得撞限位 / 过冲
+ONLINE_FORGET = 0.97    # 在线估计的遗忘因子（越接近 1 越稳、越慢）
+ONLINE_MIN_SAMPLES = 16 # 每个关节至少读这么多次才开始用在线估计
+
+
+# ========== 补偿参数 ==========
+
+def model_params(joint, period):
+    """由模型算出某个频率下的 (advance 秒, gain)"""
+    w = 2 * math.pi / period
+    advance = joint["dead_time"] + math.atan(w * joint["tau"]) / w
+    gain = math.sqrt(1 + (w * joint["tau"]) ** 2)
+    return advance, min(gain, MAX_GAIN)
+
+
+def response_params(G, period):
+    """由测到的复数响应 G = Y/U 算出 (advance, gain)"""
+    w = 2 * math.pi / period
+    lag = -cmath.phase(G) % (2 * math.pi)
+    if lag > math.pi:          # 超前了（基本是噪声），不补
+        lag = 0.0
+    gain = 1.0 / max(abs(G), 1e-3)
+    return lag / w, max(1.0, min(gain, MAX_GAIN))
+
+
+def make_compensator(base_pose, period, dt, model=None,
+                     model_file=MODEL_FILE, online=False):
+    """
+    base_pose: 摆动的中心（一般就是 STAND_POSE）
+    period: 步态周期（秒）；dt: 每帧时间（秒）
+    model: {sid: {dead_time, tau, ...}}，不给就从 model_file 读；
+           文件也没有就从 “不补偿” 开始，只靠在线估计。
+    """
+    if model is None:
+        try:
+            model = load_model(model_file)
+        except FileNotFoundError:
+            model = {}
+
+    comp = {
+        "base": dict(base_pose),
+        "period": period,
+        "dt": dt,
+        "online": online,
+        "params": {},
+        "fit": {},         # sid -> 递推正弦拟合的累加量
+        "history": {},     # sid -> {step: 实际下发的指令}
+        "next_read": 0,
+    }
+    for sid in base_pose:
+        if sid in model:
+            comp["params"][sid] = model_params(model[sid], period)
+        else:
+            comp["params"][sid] = (0.0, 1.0)
+        comp["fit"][sid] = new_sine_fit()
+        comp["history"][sid] = {}
+    return comp
+
+
+# ========== 前馈 ==========
+
+def comp_command(comp, pose_at, step):
+    """
+    pose_at(step) -> 期望姿态（step 可以是小数）。
+    返回补偿以后要下发的姿态。
+    """
+    base = comp["base"]
+    dt = comp["dt"]
+    out = {}
+    cache = {}
+    for sid, (advance, gain) in comp["params"].items():
+        key = round(advance / dt, 3)
+        if key not in cache:
+            cache[key] = pose_at(step + key)
+        ahead = cache[key][sid]
+        out[sid] = base[sid] + gain * (ahead - base[sid])
+    return out
+
+
+# ========== 在线估计 ==========
+
+def new_sine_fit():
+    # 同时拟合 指令 u 和 实际 y ≈ a sin(wt) + b cos(wt) + c
+    # M: 法方程矩阵 3x3，ru / ry: 右端项，n: 样本数
+    return {"M": [[0.0] * 3 for _ in range(3)],
+            "ru": [0.0] * 3, "ry": [0.0] * 3, "n": 0}
+
+
+def solve3(M, r):
+    """3x3 线性方程组（Cramer），奇异就返回 None"""
+    def det(m):
+        return (m[0][0] * (m[1][1] * m[2][2] - m[1][2] * m[2][1])
+                - m[0][1] * (m[1][0] * m[2][2] - m[1][2] * m[2][0])
+                + m[0][2] * (m[1][0] * m[2][1] - m[1][1] * m[2][0]))
+    d = det(M)
+    if abs(d) < 1e-9:
+        return None
+    out = []
+    for col in range(3):
+        m = [row[:] for row in M]
+        for i in range(3):
+            m[i][col] = r[i]
+        out.append(det(m) / d)
+    return out
+
+
+def sine_fit_update(fit, t, w, u, y):
+    phi = (math.sin(w * t), math.cos(w * t), 1.0)
+    lam = ONLINE_FORGET
+    for i in range(3):
+        for j in range(3):
+            fit["M"][i][j] = lam * fit["M"][i][j] + phi[i] * phi[j]
+        fit["ru"][i] = lam * fit["ru"][i] + phi[i] * u
+        fit["ry"][i] = lam * fit["ry"][i] + phi[i] * y
+    fit["n"] += 1
+
+
+def sine_fit_response(fit):
+    """拟合出的 Y/U（复数）；a sin + b cos 的相量是 b - j a"""
+    cu = solve3(fit["M"], fit["ru"])
+    cy = solve3(fit["M"], fit["ry"])
+    if cu is None or cy is None:
+        return None
+    U = complex(cu[1], -cu[0])
+    Y = complex(cy[1], -cy[0])
+    if abs(U) < 1e-3:
+        return None
+    return Y / U
+
+
+def comp_record(comp, step, sent_pose):
+    """记下这一帧真正发出去的（夹紧以后的）指令，在线估计要用"""
+    if not comp["online"]:
+        return
+    for sid, a in sent_pose.items():
+        hist = comp["history"][sid]
+        hist[step] = a
+        hist.pop(step - 4 * len(comp["base"]), None)
+
+
+def comp_readback(comp, servos, step):
+    """
+    每帧只读一个关节（轮流），把 实际/指令 在步态频率上解调，
+    样本够了就用拟合出来的 G 更新这个关节的补偿参数。
+    """
+    if not comp["online"]:
+        return
+    sids = list(comp["base"])
+    sid = sids[comp["next_read"] % len(sids)]
+    comp["next_read"] += 1
+
+    try:
+        meas = servos[sid].get_physical_angle()
+    except ServoError:
+        return
+    u = comp["history"][sid].get(step)
+    if u is None:
+        return
+
+    w = 2 * math.pi / comp["period"]
+    fit = comp["fit"][sid]
+    sine_fit_update(fit, step * comp["dt"], w, u, meas)
+
+    if fit["n"] >= ONLINE_MIN_SAMPLES:
+        G = sine_fit_response(fit)
+        if G is not None:
+            comp["params"][sid] = response_params(G, comp["period"])
+
+
+def comp_summary(comp):
+    lines = []
+    for sid, (advance, gain) in sorted(comp["params"].items()):
+        lines.append(f"  ID{sid}: advance {advance*1000:.0f} ms, gain {gain:.2f}")
+    return "\n".join(lines)
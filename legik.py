@@ -0,0 +1,208 @@
+import sys
+import time
+import math
+import functools
+
+import numpy as np
+
+# 腿的运动学（2 连杆：大腿 + 小腿），让步态可以直接在脚端空间写：
+#   现在的步态都直接写关节角（髋 ± HIP_AMP * sin，膝 + KNEE_LIFT * max(0, sin)），
+#   所以一改 STAND_POSE，步长和抬脚高度就跟着变。
+#   这里每条腿（LEG_MAP）在自己的矢状面里：x 向前、z 向上，髋关节在原点，脚在下面（z < 0）。
+#       th_h：大腿相对竖直向下的角度（向前为正）
+#       th_k：膝盖弯曲角（伸直为 0）
+#       脚 = L1 (sin th_h, -cos th_h) + L2 (sin(th_h - th_k), -cos(th_h - th_k))
+#   舵机角 = 零点 + 方向 * 关节角；零点用 “站姿时脚在 (0, -STAND_HEIGHT)” 反推，
+#   所以 STAND_POSE 怎么改，步长 / 抬脚高度（毫米）都不变。
+#
+#   一个周期的脚端轨迹整批用 numpy 解 IK，编译成关节表 (帧数, 8)，按参数缓存；
+#   每帧的热路径只是查表 + 相邻两行线性插值（table_pose_at），比现算 sin 还便宜，
+#   而且可以直接当 pose_at 给 latcomp.comp_command 用（小数帧也行）。
+#
+# 用法：
+#   table = trot_table(STAND_POSE, 25)               # (25, 8)，列是 ID1..8
+#   pose = table_pose_at(table, step)
+#   python legik.py                 # 编译 / 每帧耗时，和 trot_pose_at 对比
+#   python legik.py --play [--sim]  # 用编译好的表走 trotsinwalk 的节奏
+
+LEG_MAP = {
+    "RF": (1, 2),  # right-front
+    "RR": (3, 4),  # right-rear
+    "LR": (5, 6),  # left-rear
+    "LF": (7, 8),  # left-front
+}
+
+SERVO_IDS = list(range(1, 9))
+
+# -------- 几何（毫米，量一下自己的腿再改） --------
+THIGH_LEN = 60.0
+SHIN_LEN = 60.0
+STAND_HEIGHT = 90.0      # 站姿时髋到脚的竖直距离
+
+# 舵机角变大时关节角怎么变：髋 -1 = 角度变小是往前（和 nodriftwalk / validate.py 一致），
+# 膝 +1 = 角度变大是更弯（和 KNEE_LIFT 的用法一致）
+HIP_DIR = {"RF": -1, "RR": -1, "LR": -1, "LF": -1}
+KNEE_DIR = {"RF": +1, "RR": +1, "LR": +1, "LF": +1}
+
+# -------- 脚端小跑 --------
+STRIDE = 30.0            # 一步前后多长（毫米）
+FOOT_LIFT = 15.0         # 抬脚高度（毫米）
+
+
+# ========== 正 / 逆解 ==========
+
+def fk(th_h, th_k, l1=THIGH_LEN, l2=SHIN_LEN):
+    """关节角（弧度，可以是数组）-> 脚的 (x, z)"""
+    x = l1 * np.sin(th_h) + l2 * np.sin(th_h - th_k)
+    z = -(l1 * np.cos(th_h) + l2 * np.cos(th_h - th_k))
+    return x, z
+
+
+def ik(x, z, l1=THIGH_LEN, l2=SHIN_LEN):
+    """脚的 (x, z)（可以是数组）-> (th_h, th_k, 够得着吗)；够不着的点取最近的伸直 / 折叠解"""
+    x = np.asarray(x, dtype=float)
+    z = np.asarray(z, dtype=float)
+    d2 = x * x + z * z
+    c = (d2 - l1 * l1 - l2 * l2) / (2 * l1 * l2)
+    ok = (c >= -1.0) & (c <= 1.0)
+    th_k = np.arccos(np.clip(c, -1.0, 1.0))
+    th_h = np.arctan2(x, -z) + np.arctan2(l2 * np.sin(th_k), l1 + l2 * np.cos(th_k))
+    return th_h, th_k, ok
+
+
+# ========== 每条腿的标定 ==========
+
+def make_legs(stand_pose, leg_map=LEG_MAP, height=STAND_HEIGHT):
+    """站姿 = 脚在 (0, -height)：由此反推每条腿的舵机零点"""
+    th_h0, th_k0, _ = ik(0.0, -height)
+    legs = {}
+    for leg, (hip, knee) in leg_map.items():
+        legs[leg] = {
+            "hip": hip, "knee": knee,
+            "hip0": stand_pose[hip] - HIP_DIR[leg] * math.degrees(th_h0),
+            "knee0": stand_pose[knee] - KNEE_DIR[leg] * math.degrees(th_k0),
+        }
+    return legs
+
+
+def feet_to_table(legs, feet):
+    """
+    feet: {leg: (x 数组, z 数组)}，z 相对髋（站姿时是 -STAND_HEIGHT）
+    返回 (T, 8) 的舵机角表，列是 ID1..8；还有够不着的点数。
+    四条腿拼成一批一起解。
+    """
+    order = list(feet)
+    X = np.stack([feet[leg][0] for leg in order])    # (腿, T)
+    Z = np.stack([feet[leg][1] for leg in order])
+    th_h, th_k, ok = ik(X, Z)
+
+    table = np.zeros((X.shape[1], 8))
+    for n, leg in enumerate(order):
+        cal = legs[leg]
+        table[:, cal["hip"] - 1] = cal["hip0"] + HIP_DIR[leg] * np.degrees(th_h[n])
+        table[:, cal["knee"] - 1] = cal["knee0"] + KNEE_DIR[leg] * np.degrees(th_k[n])
+    return table, int((~ok).sum())
+
+
+# ========== 脚端小跑 ==========
+
+def trot_feet(steps, stride=STRIDE, lift=FOOT_LIFT, height=STAND_HEIGHT,
+              group_a=("LF", "RR")):
+    """
+    一个周期 steps 帧；前半周期支撑（脚贴地往后划），后半周期摆动（抬起来往前）。
+    对角两组差半个周期。
+    """
+    phi = np.arange(steps) / steps
+    feet = {}
+    for leg in LEG_MAP:
+        p = phi if leg in group_a else (phi + 0.5) % 1.0
+        stance = p < 0.5
+        s = np.where(stance, p / 0.5, (p - 0.5) / 0.5)     # 0 ~ 1
+        x = np.where(stance, stride / 2 - stride * s,
+                     -stride / 2 + stride * (1 - np.cos(np.pi * s)) / 2)
+        z = -height + np.where(stance, 0.0, lift * np.sin(np.pi * s))
+        feet[leg] = (x, z)
+    return feet
+
+
+@functools.lru_cache(maxsize=16)
+def _trot_table(stand_items, steps, stride, lift):
+    legs = make_legs(dict(stand_items))
+    table, bad = feet_to_table(legs, trot_feet(steps, stride, lift))
+    if bad:
+        print(f"[legik] {bad} foot points out of reach (stride / lift too big?)")
+    table.setflags(write=False)   # 缓存里的表大家共用，别改
+    return table
+
+
+def trot_table(stand_pose, steps, stride=STRIDE, lift=FOOT_LIFT):
+    """脚端小跑编译成的关节表；同样的参数第二次直接拿缓存"""
+    return _trot_table(tuple(sorted(stand_pose.items())), steps, stride, lift)
+
+
+def table_pose_at(table, step):
+    """第 step 帧（可以是小数，按周期绕回）的姿态：相邻两行线性插值"""
+    n = len(table)
+    k = math.floor(step)
+    u = step - k
+    a = table[k % n]
+    row = a + u * (table[(k + 1) % n] - a)
+    return dict(zip(SERVO_IDS, row.tolist()))
+
+
+# ========== 试一试 ==========
+
+def play_table(servos, table, cycles, dt):
+    """按绝对时间一帧帧放（和 trot_sine_walk 一样的顺序 / 夹紧）"""
+    from trotsinwalk import clamp_angle
+    next_t = time.monotonic()
+    for k in range(cycles * len(table)):
+        row = table[k % len(table)]
+        for sid in (7, 8, 3, 4, 1, 2, 5, 6):
+            servos[sid].move(clamp_angle(servos, sid, float(row[sid - 1])))
+        next_t += dt
+        time.sleep(max(0.0, next_t - time.monotonic()))
+
+
+def main():
+    from trotsinwalk import STAND_POSE, STEPS_PER_CYCLE, STEP_TIME, CYCLES, trot_pose_at
+
+    t0 = time.perf_counter()
+    table = trot_table(STAND_POSE, STEPS_PER_CYCLE)
+    t_compile = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    trot_table(STAND_POSE, STEPS_PER_CYCLE)
+    t_cached = time.perf_counter() - t0
+
+    frames = 10000
+    t0 = time.perf_counter()
+    for k in range(frames):
+        table_pose_at(table, k + 0.5)
+    t_table = (time.perf_counter() - t0) / frames
+    t0 = time.perf_counter()
+    for k in range(frames):
+        trot_pose_at(k + 0.5)
+    t_sine = (time.perf_counter() - t0) / frames
+
+    x, z = fk(*ik(0.0, -STAND_HEIGHT)[:2])
+    print(f"foot-space trot, {STEPS_PER_CYCLE} frames: stride {STRIDE:.0f} mm, lift {FOOT_LIFT:.0f} mm")
+    print(f"  compile {t_compile * 1e6:.0f} us, cached {t_cached * 1e6:.1f} us")
+    print(f"  per frame: table {t_table * 1e6:.1f} us, trot_pose_at {t_sine * 1e6:.1f} us")
+    print(f"  stand foot check: ({x:.3f}, {z:.3f}) mm")
+    print("  range per ID: " + ", ".join(
+        f"{sid}:{table[:, sid - 1].min():.0f}..{table[:, sid - 1].max():.0f}" for sid in range(1, 9)))
+
+    if "--play" in sys.argv:
+        if "--sim" in sys.argv:
+            from simbus import install
+            install()
+        from trotsinwalk import init_servos, read_current_pose, smooth_move
+        servos = init_servos()
+        cur = read_current_pose(servos)
+        smooth_move(servos, cur, STAND_POSE, duration=1.0, steps=40)
+        play_table(servos, table, CYCLES, STEP_TIME)
+        smooth_move(servos, read_current_pose(servos), STAND_POSE, duration=1.0, steps=40)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import time
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+import matplotlib
+
+from shmbus import ShmRing, TEL_FMT, TEL_SLOTS, SHM_NAMES_FILE, CTRL_STOP
+
+# 实时角度曲线：
+#   plotangle.py 要等跑完、把整个 CSV 读一遍才能画。这里是一个单独的进程，
+#   挂到 shmbus 的遥测环上（共享内存，名字在 SHM_NAMES_FILE 里），
+#   只用 ShmRing.peek_latest 看新来的几条，不 pop、不动 tail、不碰控制进程的任何东西，
+#   窗口开着、关掉、卡住，控制那边都感觉不到。
+#   画法：8 个关节各一个小图（行 = 腿，列 = 髋 / 膝），实线是指令角，虚线是读回角（有就画）。
+#   最近 WINDOW_SEC 秒，横轴是 “距最新一帧多少秒”，所以坐标轴不动，
+#   每帧只 restore 背景 + 重画 16 条线 + blit，不整张重画；
+#   只有曲线超出纵轴范围、或者窗口大小变了才整张重画一次。
+#
+# 用法：
+#   python shmbus.py trotsinwalk.py --sim            # 一个终端跑步态
+#   python liveplot.py                               # 另一个终端看
+#   python shmbus.py trotsinwalk.py --sim --live     # 或者让 shmbus 顺便把它开起来
+#   python liveplot.py --bench 300 [live_plot.png]   # 不开窗口，测能画多少帧 / 秒
+
+WINDOW_SEC = 10.0
+FPS = 30
+MAX_POINTS = 2000       # 窗口里最多留多少帧（33 Hz × 10 s 绰绰有余）
+Y_MARGIN = 10.0         # 纵轴上下留多少度
+ATTACH_WAIT = 30.0      # 等 shmbus 起来最多等多久（秒）
+PLOTFILE = "live_plot.png"
+
+LEG_MAP = {
+    "RF": (1, 2),  # right-front
+    "RR": (3, 4),  # right-rear
+    "LR": (5, 6),  # left-rear
+    "LF": (7, 8),  # left-front
+}
+
+
+# ========== 挂到遥测环上 ==========
+
+def attach(path=SHM_NAMES_FILE, wait=ATTACH_WAIT):
+    """等 shmbus 把名字写出来，然后挂上遥测环和控制块（只读着用）"""
+    deadline = time.monotonic() + wait
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"liveplot: {path} not found, is shmbus.py running?")
+        time.sleep(0.1)
+    with open(path) as f:
+        names = json.load(f)
+    ring = ShmRing(TEL_FMT, TEL_SLOTS, names["tel"])
+    ctrl = shared_memory.SharedMemory(name=names["ctrl"])
+    # 3.11 的 resource_tracker 会在本进程退出时把挂上的共享内存也 unlink 掉；
+    # 这些是 shmbus 的，不归这边管
+    for shm in (ring.shm, ctrl):
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return ring, ctrl
+
+
+def make_traces():
+    return {
+        "t": np.empty(0),
+        "cmd": np.empty((0, 8)),
+        "meas": np.empty((0, 8)),
+        "seq": -1,         # 看过的最新一条的序号
+        "received": 0,
+    }
+
+
+def pull(tr, ring):
+    """把上次以后新来的几条接到末尾；落后太多（环已经绕过去了）就只要最新的"""
+    new = ring._head() - 1 - tr["seq"]
+    if new <= 0:
+        return 0
+    rows = [vals for seq, vals in ring.peek_latest(min(new, MAX_POINTS)) if seq > tr["seq"]]
+    if not rows:
+        return 0
+    tr["seq"] += new
+    data = np.array(rows)
+    tr["t"] = np.concatenate([tr["t"], data[:, 0]])[-MAX_POINTS:]
+    tr["cmd"] = np.concatenate([tr["cmd"], data[:, 1:9]])[-MAX_POINTS:]
+    tr["meas"] = np.concatenate([tr["meas"], data[:, 9:17]])[-MAX_POINTS:]
+    tr["received"] += len(rows)
+    return len(rows)
+
+
+# ========== 画 ==========
+
+def make_figure(plt):
+    fig, axes = plt.subplots(4, 2, sharex=True, figsize=(10, 8))
+    lines = {}
+    for row, (leg, (hip, knee)) in enumerate(LEG_MAP.items()):
+        for col, sid in enumerate((hip, knee)):
+            ax = axes[row][col]
+            ax.set_xlim(-WINDOW_SEC, 0)
+            ax.set_ylim(0, 240)
+            ax.set_title(f"{leg} {'hip' if col == 0 else 'knee'} (ID{sid})", fontsize=9)
+            ax.grid(True, alpha=0.3)
+            cmd_line, = ax.plot([], [], lw=1.2, animated=True, label="cmd")
+            meas_line, = ax.plot([], [], lw=1.0, ls="--", animated=True, label="meas")
+            lines[sid] = (ax, cmd_line, meas_line)
+    axes[0][0].legend(loc="upper left", fontsize=8)
+    for ax in axes[-1]:
+        ax.set_xlabel("s before latest")
+    status = fig.text(0.01, 0.005, "waiting for telemetry ...", fontsize=8, animated=True)
+    fig.tight_layout(rect=(0, 0.02, 1, 1))
+    return fig, lines, status
+
+
+def fit_ylim(lines, tr):
+    """曲线出了纵轴范围就放宽（返回 True 表示要整张重画）"""
+    changed = False
+    for sid, (ax, _, _) in lines.items():
+        col = np.concatenate([tr["cmd"][:, sid - 1], tr["meas"][:, sid - 1]])
+        col = col[np.isfinite(col)]
+        if not len(col):
+            continue
+        lo, hi = ax.get_ylim()
+        if col.min() < lo or col.max() > hi or (lo, hi) == (0, 240):
+            ax.set_ylim(col.min() - Y_MARGIN, col.max() + Y_MARGIN)
+            changed = True
+    return changed
+
+
+def run(ring, ctrl, bench_frames=None, out=PLOTFILE):
+    if bench_frames:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, lines, status = make_figure(plt)
+    canvas = fig.canvas
+    artists = [a for _, c, m in lines.values() for a in (c, m)] + [status]
+    state = {"bg": None}
+
+    def on_draw(event):
+        # 整张重画过（第一次 / 改了纵轴 / 窗口大小变了）：重新存背景
+        state["bg"] = canvas.copy_from_bbox(fig.bbox)
+        for a in artists:
+            fig.draw_artist(a)
+
+    canvas.mpl_connect("draw_event", on_draw)
+    if not bench_frames:
+        plt.show(block=False)
+    canvas.draw()
+
+    tr = make_traces()
+    frames = 0
+    t_start = time.perf_counter()
+    next_t = t_start
+    fps = 0.0
+    ended = False
+    while bench_frames is None or frames < bench_frames:
+        if not bench_frames and not plt.fignum_exists(fig.number):
+            break
+        if not ended:
+            pull(tr, ring)
+            ended = bool(ctrl.buf[CTRL_STOP])
+
+        if len(tr["t"]) and fit_ylim(lines, tr):
+            canvas.draw()           # 少有的整张重画，on_draw 会存新背景
+
+        if len(tr["t"]):
+            x = tr["t"] - tr["t"][-1]
+            keep = x >= -WINDOW_SEC
+            for sid, (_, cmd_line, meas_line) in lines.items():
+                cmd_line.set_data(x[keep], tr["cmd"][keep, sid - 1])
+                meas_line.set_data(x[keep], tr["meas"][keep, sid - 1])
+            status.set_text(f"t = {tr['t'][-1]:.1f} s, {tr['received']} frames, "
+                            f"{fps:.0f} fps" + ("  (run ended)" if ended else ""))
+
+        canvas.restore_region(state["bg"])
+        for a in artists:
+            fig.draw_artist(a)
+        canvas.blit(fig.bbox)
+        canvas.flush_events()
+        frames += 1
+
+        now = time.perf_counter()
+        fps = frames / (now - t_start)
+        if not bench_frames:
+            next_t += 1.0 / FPS
+            time.sleep(max(0.0, next_t - now))
+
+    if bench_frames:
+        fig.savefig(out)
+        print(f"[liveplot] {frames} blitted frames at {fps:.0f} fps, "
+              f"{tr['received']} telemetry frames -> {out}")
+    elif plt.fignum_exists(fig.number):
+        plt.show()
+    return fps
+
+
+def main():
+    args = sys.argv[1:]
+    bench = None
+    out = PLOTFILE
+    if "--bench" in args:
+        i = args.index("--bench")
+        bench = int(args[i + 1])
+        if len(args) > i + 2:
+            out = args[i + 2]
+    ring, ctrl = attach()
+    try:
+        run(ring, ctrl, bench, out)
+    finally:
+        ring.buf = None
+        ring.shm.close()
+        ctrl.close()
+
+
+if __name__ == "__main__":
+    main()
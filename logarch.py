@@ -0,0 +1,354 @@
+import os
+import sys
+import csv
+import json
+import time
+import zlib
+import runpy
+import struct
+
+import numpy as np
+
+# 压缩、分块、带时间索引的角度日志（.lxa）：
+#   走路循环写的 t,id1..id8 文本 CSV 又大又慢，想看第 30~35 秒也得从头解析。
+#   这里：
+#     - 每 CHUNK_ROWS 行一块；块里按列存（t 是 float64，8 个角度是 float32），
+#       每一列单独做字节重排（同一位的字节放一起）再 zlib，所以只要几列时只解那几列
+#     - 文件头里是运行的元数据（JSON）：脚本名、步态参数、STAND_POSE、ROLL_ADJ ……
+#     - 块头里有这块的首尾时间；文件尾是时间索引（每块的偏移 / 行数 / 首尾时间），
+#       读一个时间窗只解压碰到的块
+#     - 追加很便宜：一行只是写进预先分配的 numpy 缓冲，满一块压一次、写一次；
+#       默认和原来的 CSV 一样，打开就清空重写；append=True 才重新打开接着写（索引挪到新的末尾），
+#       接着写的时间不能比已经写进去的早（时间索引靠 t 单调）。没正常关（崩了）也不怕：
+#       没有尾部索引就顺着块头扫一遍，半截的块丢掉
+#
+# 文件布局：
+#   FILE_HDR(magic, 元数据长度, CHUNK_ROWS) + 元数据 JSON
+#   [CHUNK_HDR(tag, 行数, t_first, t_last) + 9 个列长度 + 9 段压缩列] × N
+#   INDEX_ENTRY(偏移, 行数, t_first, t_last) × N + TRAILER(索引偏移, N, tag)
+#
+# 用法：
+#   with ArchiveWriter("run.lxa", script_meta("rt.py")) as w:
+#       w.append(t, angles)                 # angles: 8 个数（ID1..8）或 {id: 角度}
+#   with ArchiveWriter("run.lxa", append=True) as w:     # 崩了以后接着写，t 要接着往后走
+#   t, Q = ArchiveReader("run.lxa").read(30.0, 35.0)       # Q: (T, 8)
+#   python logarch.py pack angle_log.csv [run.lxa] [--meta rt.py]
+#   python logarch.py unpack run.lxa [out.csv] [--from 30] [--to 35]
+#   python logarch.py info run.lxa
+
+MAGIC = b"LXARC\x01\x00\x00"
+FILE_HDR = struct.Struct("<8sII")          # magic, 元数据长度, 每块行数
+CHUNK_TAG = b"CHNK"
+CHUNK_HDR = struct.Struct("<4sIdd")        # tag, 行数, t_first, t_last
+COL_LENS = struct.Struct("<9I")            # 每列压缩后的长度
+INDEX_ENTRY = struct.Struct("<QIdd")       # 块偏移, 行数, t_first, t_last
+INDEX_TAG = b"LXARCIDX"
+TRAILER = struct.Struct("<QI8s")           # 索引偏移, 块数, tag
+
+CHUNK_ROWS = 256      # 33 Hz 下大约 8 秒一块
+ZLIB_LEVEL = 6
+ARCHIVE_EXT = ".lxa"
+
+SERVO_IDS = list(range(1, 9))
+COLUMNS = ["t"] + [f"id{sid}" for sid in SERVO_IDS]
+COL_DTYPES = [np.float64] + [np.float32] * 8
+
+
+# ========== 元数据 ==========
+
+def module_meta(ns, name=""):
+    """模块里全大写、能存成 JSON 的常量（步态参数、STAND_POSE、ROLL_ADJ ……）"""
+    meta = {"script": name, "created": time.strftime("%Y-%m-%d %H:%M:%S")}
+    params = {}
+    for key, val in ns.items():
+        if not key.isupper() or key.startswith("_"):
+            continue
+        try:
+            json.dumps(val)
+        except (TypeError, ValueError):
+            continue
+        params[key] = val
+    meta["params"] = params
+    return meta
+
+
+def script_meta(path):
+    """不跑 main()，只执行一遍脚本的顶层，把常量收集起来"""
+    return module_meta(runpy.run_path(path, run_name="__meta__"), os.path.basename(path))
+
+
+# ========== 列编码 ==========
+
+def _pack_col(col):
+    b = np.ascontiguousarray(col)
+    shuffled = b.view(np.uint8).reshape(-1, b.itemsize).T   # 字节重排：同一位放一起
+    return zlib.compress(shuffled.tobytes(), ZLIB_LEVEL)
+
+
+def _unpack_col(data, dtype, rows):
+    itemsize = np.dtype(dtype).itemsize
+    raw = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(itemsize, rows)
+    return np.ascontiguousarray(raw.T).view(dtype).reshape(rows)
+
+
+# ========== 写 ==========
+
+class ArchiveWriter:
+    """append=False（默认）：已有的文件清空重写；append=True：接着已有的文件写，元数据用文件里的"""
+
+    def __init__(self, path, meta=None, chunk_rows=CHUNK_ROWS, append=False):
+        self.path = path
+        self.index = []
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            self.f = open(path, "r+b")
+            self.meta, self.chunk_rows, data_end, self.index = _load_layout(self.f)
+            self.f.seek(data_end)
+            self.f.truncate()       # 旧索引（或崩掉时的半截块）去掉，接着往后写
+        else:
+            self.f = open(path, "wb")
+            self.meta = meta or {}
+            self.chunk_rows = chunk_rows
+            blob = json.dumps(self.meta, ensure_ascii=False).encode()
+            self.f.write(FILE_HDR.pack(MAGIC, len(blob), chunk_rows))
+            self.f.write(blob)
+        self.buf = np.empty((self.chunk_rows, 9))
+        self.n = 0
+        self.rows = sum(e[1] for e in self.index)
+        self.t_last = self.index[-1][3] if self.index else None
+
+    def append(self, t, angles):
+        if self.t_last is not None and t < self.t_last:
+            raise ValueError(f"{self.path}: t = {t} is earlier than the last row ({self.t_last}); "
+                             f"the time index needs t to be non-decreasing")
+        self.t_last = t
+        row = self.buf[self.n]
+        row[0] = t
+        if isinstance(angles, dict):
+            for sid in SERVO_IDS:
+                a = angles.get(sid)
+                row[sid] = np.nan if a is None else a
+        else:
+            row[1:] = angles
+        self.n += 1
+        if self.n == self.chunk_rows:
+            self.flush_chunk()
+
+    def flush_chunk(self):
+        if not self.n:
+            return
+        block = self.buf[:self.n]
+        cols = [_pack_col(block[:, k].astype(COL_DTYPES[k])) for k in range(9)]
+        offset = self.f.tell()
+        t_first, t_last = float(block[0, 0]), float(block[-1, 0])
+        self.f.write(CHUNK_HDR.pack(CHUNK_TAG, self.n, t_first, t_last))
+        self.f.write(COL_LENS.pack(*map(len, cols)))
+        for c in cols:
+            self.f.write(c)
+        self.f.flush()
+        self.index.append((offset, self.n, t_first, t_last))
+        self.rows += self.n
+        self.n = 0
+
+    def close(self):
+        if self.f is None:
+            return
+        self.flush_chunk()
+        index_offset = self.f.tell()
+        for entry in self.index:
+            self.f.write(INDEX_ENTRY.pack(*entry))
+        self.f.write(TRAILER.pack(index_offset, len(self.index), INDEX_TAG))
+        self.f.close()
+        self.f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _load_layout(f):
+    """-> (元数据, 每块行数, 数据结束的位置, 索引)；没有尾部索引就扫块头重建"""
+    f.seek(0)
+    magic, meta_len, chunk_rows = FILE_HDR.unpack(f.read(FILE_HDR.size))
+    if magic != MAGIC:
+        raise ValueError(f"not a {ARCHIVE_EXT} archive")
+    meta = json.loads(f.read(meta_len))
+    data_start = FILE_HDR.size + meta_len
+
+    size = f.seek(0, os.SEEK_END)
+    if size - data_start >= TRAILER.size:
+        f.seek(size - TRAILER.size)
+        index_offset, count, tag = TRAILER.unpack(f.read(TRAILER.size))
+        if tag == INDEX_TAG and index_offset + count * INDEX_ENTRY.size + TRAILER.size == size:
+            f.seek(index_offset)
+            raw = f.read(count * INDEX_ENTRY.size)
+            index = [INDEX_ENTRY.unpack_from(raw, k * INDEX_ENTRY.size) for k in range(count)]
+            return meta, chunk_rows, index_offset, index
+
+    # 没有索引（写的时候崩了）：顺着块头往后走，最后一个完整的块为止
+    index = []
+    pos = data_start
+    while pos + CHUNK_HDR.size + COL_LENS.size <= size:
+        f.seek(pos)
+        tag, rows, t_first, t_last = CHUNK_HDR.unpack(f.read(CHUNK_HDR.size))
+        if tag != CHUNK_TAG:
+            break
+        end = pos + CHUNK_HDR.size + COL_LENS.size + sum(COL_LENS.unpack(f.read(COL_LENS.size)))
+        if end > size:
+            break
+        index.append((pos, rows, t_first, t_last))
+        pos = end
+    return meta, chunk_rows, pos, index
+
+
+# ========== 读 ==========
+
+class ArchiveReader:
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, "rb")
+        self.meta, self.chunk_rows, _, index = _load_layout(self.f)
+        idx = np.array(index, dtype=float).reshape(-1, 4)
+        self.offsets = idx[:, 0].astype(np.int64)
+        self.counts = idx[:, 1].astype(np.int64)
+        self.t_first = idx[:, 2]
+        self.t_last = idx[:, 3]
+        self.rows = int(self.counts.sum())
+        self.chunks_read = 0
+
+    def chunk_range(self, t0=None, t1=None):
+        """和 [t0, t1] 有重叠的块的下标范围（时间是递增的）"""
+        lo = 0 if t0 is None else int(np.searchsorted(self.t_last, t0, "left"))
+        hi = len(self.offsets) if t1 is None else int(np.searchsorted(self.t_first, t1, "right"))
+        return range(lo, max(lo, hi))
+
+    def read_chunk(self, k, ids=SERVO_IDS):
+        """-> (t, Q)，Q 的列是 ids 的顺序；没要的列不解压"""
+        self.f.seek(int(self.offsets[k]))
+        _, rows, _, _ = CHUNK_HDR.unpack(self.f.read(CHUNK_HDR.size))
+        lens = COL_LENS.unpack(self.f.read(COL_LENS.size))
+        starts = np.concatenate([[0], np.cumsum(lens)])
+        body = self.f.read(int(starts[-1]))
+        cols = {}
+        for c in [0] + list(ids):
+            cols[c] = _unpack_col(body[starts[c]:starts[c + 1]], COL_DTYPES[c], rows)
+        self.chunks_read += 1
+        Q = np.column_stack([cols[sid].astype(float) for sid in ids]) if ids else np.empty((rows, 0))
+        return cols[0], Q
+
+    def iter_chunks(self, t0=None, t1=None, ids=SERVO_IDS):
+        """一块一块给 (t, Q)，已经按 [t0, t1] 裁好；给流式处理用，内存只占一块"""
+        for k in self.chunk_range(t0, t1):
+            t, Q = self.read_chunk(k, ids)
+            keep = np.ones(len(t), dtype=bool)
+            if t0 is not None:
+                keep &= t >= t0
+            if t1 is not None:
+                keep &= t <= t1
+            if keep.any():
+                yield t[keep], Q[keep]
+
+    def read(self, t0=None, t1=None, ids=SERVO_IDS):
+        parts = list(self.iter_chunks(t0, t1, ids))
+        if not parts:
+            return np.empty(0), np.empty((0, len(ids)))
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_archive(path, t0=None, t1=None):
+    with ArchiveReader(path) as r:
+        return r.read(t0, t1)
+
+
+# ========== 和 CSV 互转 ==========
+
+def csv_to_archive(csv_path, arc_path, meta=None, chunk_rows=CHUNK_ROWS):
+    """一行行读 CSV 往里追加，不整个读进内存"""
+    meta = dict(meta or {})
+    meta.setdefault("source", os.path.basename(csv_path))
+    with open(csv_path, newline="") as f, ArchiveWriter(arc_path, meta, chunk_rows) as w:
+        reader = csv.reader(f)
+        header = next(reader)
+        cols = [header.index(name) for name in COLUMNS]
+        for row in reader:
+            if not row:
+                continue
+            vals = [float(row[c]) if row[c] not in ("", "None") else np.nan for c in cols]
+            w.append(vals[0], vals[1:])
+    return w.rows
+
+
+def archive_to_csv(arc_path, csv_path, t0=None, t1=None):
+    rows = 0
+    with ArchiveReader(arc_path) as r, open(csv_path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(COLUMNS)
+        for t, Q in r.iter_chunks(t0, t1):
+            for k in range(len(t)):
+                w.writerow([repr(float(t[k]))] + [f"{a:.6g}" for a in Q[k]])
+            rows += len(t)
+    return rows
+
+
+def info(path):
+    size = os.path.getsize(path)
+    with ArchiveReader(path) as r:
+        print(f"{path}: {r.rows} rows in {len(r.offsets)} chunks of {r.chunk_rows}, "
+              f"{size / 1024:.1f} KiB ({size / max(r.rows, 1):.1f} B/row)")
+        if len(r.offsets):
+            print(f"  t {r.t_first[0]:.3f} .. {r.t_last[-1]:.3f} s")
+        meta = dict(r.meta)
+        params = meta.pop("params", {})
+        print("  " + ", ".join(f"{k}={v}" for k, v in meta.items()))
+        for key in ("STAND_POSE", "ROLL_ADJ", "HIP_AMP", "KNEE_LIFT", "STEP_TIME", "STEPS_PER_CYCLE"):
+            if key in params:
+                print(f"  {key} = {params[key]}")
+        if params:
+            print(f"  ({len(params)} parameters in total)")
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] not in ("pack", "unpack", "info"):
+        print("usage: python logarch.py pack LOG.csv [OUT.lxa] [--meta SCRIPT.py]\n"
+              "       python logarch.py unpack IN.lxa [OUT.csv] [--from T0] [--to T1]\n"
+              "       python logarch.py info IN.lxa")
+        return
+    mode, src = args[0], args[1]
+    rest = [a for a in args[2:]]
+    opt = {}
+    for flag in ("--meta", "--from", "--to"):
+        if flag in rest:
+            i = rest.index(flag)
+            opt[flag] = rest[i + 1]
+            del rest[i:i + 2]
+
+    if mode == "info":
+        info(src)
+    elif mode == "pack":
+        out = rest[0] if rest else os.path.splitext(src)[0] + ARCHIVE_EXT
+        meta = script_meta(opt["--meta"]) if "--meta" in opt else None
+        t0 = time.perf_counter()
+        rows = csv_to_archive(src, out, meta)
+        print(f"{src} -> {out}: {rows} rows, {os.path.getsize(src) / 1024:.1f} KiB -> "
+              f"{os.path.getsize(out) / 1024:.1f} KiB in {time.perf_counter() - t0:.2f} s")
+    else:
+        out = rest[0] if rest else os.path.splitext(src)[0] + ".csv"
+        t0 = float(opt["--from"]) if "--from" in opt else None
+        t1 = float(opt["--to"]) if "--to" in opt else None
+        rows = archive_to_csv(src, out, t0, t1)
+        print(f"{src} -> {out}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import sys
+import time
+
+import numpy as np
+from pylx16a.lx16a import *
+
+import evlog
+import metrics
+import watchdog
+from gaitstats import iter_chunks, log_params, stand_from_params
+
+# 按日志回放：
+#   想把某一次跑得好的 trot_with_per_servo_amp 原样再跑一遍，现在只能重新跑脚本，
+#   可脚本从那以后可能已经改过了。这里直接把角度日志（t,id1..id8 的 CSV，或者 .lxa 归档）
+#   当成指令发回舵机：
+#     - 日志一块一块读（CSV 每次 READ_ROWS 行，.lxa 按它自己的块），多长都不会整个读进内存
+#     - 每块用 np.interp 一次插值到现在的控制周期（默认 STEP_TIME，--rate 改），
+#       跨块的时候接上上一块最后一帧，不会断
+#     - 按日志里的时间戳发：log 时间 t 的那一帧在 开始 + (t - t_first) / speed 发出去，
+#       --speed 0.5 就是慢一半；赶不上的帧丢掉（记数），不让后面整体往后拖
+#     - 开始前先用 LEAD_IN 秒从现在的姿态慢慢挪到日志第一帧，不会一下子跳过去
+#     - 日志里空的（None）关节那一帧就不动它
+#     - 回放中卡住 / 崩了由 watchdog 接管，回到日志里的站姿（.lxa 才有），没有就回第一帧
+#   跟 busrec 的回放不是一回事：busrec 回放的是总线上录下来的字节、用来复现一个脚本的运行，
+#   不碰舵机；这里是真的让舵机动起来。
+#
+# 用法：
+#   python logplay.py angle_log.csv [--speed 0.5] [--rate 50] [--from 10 --to 40] [--sim]
+#   python robot.py replay good_run.lxa --speed 0.5
+
+PORT = "/dev/ttyUSB0"
+
+ANGLE_MIN = 0          # .lxa 里有这次的 ANGLE_MIN / ANGLE_MAX 就用那个
+ANGLE_MAX = 240
+
+STEP_TIME = 0.03       # 回放的控制周期
+SPEED = 1.0            # 1.0 = 原速
+LEAD_IN = 1.5          # 秒，挪到第一帧用多久
+LEAD_IN_STEPS = 50
+
+SEND_ORDER = [7, 8, 3, 4, 1, 2, 5, 6]   # LF, RR, RF, LR，和步态脚本一样
+
+
+# ========== 读 + 重采样 ==========
+
+def resampled_frames(path, period, speed=SPEED, t0=None, t1=None):
+    """
+    一块一块给 (tu, U)：tu 是日志时间（均匀，间隔 period * speed），U (n, 8) 是插值后的角度。
+    内存只占一块 + 上一块的最后一帧。
+    """
+    step = period * speed
+    last = None          # (t, q)：上一块最后一帧
+    next_tu = None
+    for t, Q in iter_chunks(path):
+        keep = np.ones(len(t), dtype=bool)
+        if t0 is not None:
+            keep &= t >= t0
+        if t1 is not None:
+            keep &= t <= t1
+        t, Q = t[keep], Q[keep]
+        if not len(t):
+            continue
+        if last is None:
+            t_in, Q_in = t, Q
+            next_tu = float(t[0])
+        else:
+            t_in = np.concatenate([[last[0]], t])
+            Q_in = np.vstack([last[1], Q])
+        tu = np.arange(next_tu, t_in[-1] + 1e-9, step)
+        if len(tu):
+            # NaN 的关节插出来还是 NaN（附近那几帧不动它）
+            U = np.column_stack([np.interp(tu, t_in, Q_in[:, i]) for i in range(Q.shape[1])])
+            next_tu = float(tu[-1] + step)
+            yield tu, U
+        last = (float(t_in[-1]), Q_in[-1].copy())
+
+
+def first_frame(path, t0=None):
+    for tu, U in resampled_frames(path, STEP_TIME, t0=t0):
+        return {sid: float(U[0, sid - 1]) for sid in range(1, 9)}
+    raise ValueError(f"{path}: no frames to replay")
+
+
+# ========== 舵机 ==========
+
+def init_servos(limits=(ANGLE_MIN, ANGLE_MAX)):
+    LX16A.initialize(PORT)
+    servos = {}
+    for sid in range(1, 9):
+        s = LX16A(sid)
+        s.set_angle_limits(*limits)
+        servos[sid] = s
+        evlog.info("servo_init", "Servo {sid} init OK", sid=sid)
+    time.sleep(0.5)
+    return servos
+
+
+def clamp(servos, sid, a):
+    lo, hi = servos[sid].get_angle_limits()
+    return max(lo, min(hi, a))
+
+
+def lead_in(servos, target, duration=LEAD_IN, steps=LEAD_IN_STEPS):
+    start = {sid: s.get_physical_angle() for sid, s in servos.items()}
+    for k in range(1, steps + 1):
+        alpha = k / steps
+        for sid in SEND_ORDER:
+            if target[sid] == target[sid]:
+                servos[sid].move(clamp(servos, sid, start[sid] + (target[sid] - start[sid]) * alpha))
+        time.sleep(duration / steps)
+
+
+# ========== 回放 ==========
+
+def play(servos, path, period=STEP_TIME, speed=SPEED, t0=None, t1=None, safe_pose=None):
+    """按时间戳发；返回统计。卡住 / 崩了由 watchdog 接管，发 safe_pose"""
+    st = {"sent": 0, "dropped": 0, "late_max": 0.0, "t_first": None, "t_last": None}
+    start = None
+    metrics.loop_reset()
+    watchdog.arm(servos, period, safe_pose=safe_pose)
+    try:
+        for tu, U in resampled_frames(path, period, speed, t0, t1):
+            if watchdog.tripped():
+                break
+            if start is None:
+                st["t_first"] = float(tu[0])
+                start = time.monotonic()
+            due = start + (tu - st["t_first"]) / speed       # 每帧该在什么时候发（整块一起算）
+            for k in range(len(tu)):
+                if watchdog.tripped():
+                    break
+                now = time.monotonic()
+                if now < due[k]:
+                    time.sleep(due[k] - now)
+                elif now - due[k] > period and k < len(tu) - 1:
+                    st["dropped"] += 1          # 已经晚了一整个周期：跳到下一帧
+                    continue
+                st["late_max"] = max(st["late_max"], time.monotonic() - due[k])
+                for sid in SEND_ORDER:
+                    a = U[k, sid - 1]
+                    if a == a:
+                        servos[sid].move(clamp(servos, sid, float(a)))
+                st["sent"] += 1
+                st["t_last"] = float(tu[k])
+                metrics.loop_tick(period)
+                watchdog.beat()
+    finally:
+        watchdog.disarm()
+    st["elapsed"] = time.monotonic() - start if start is not None else 0.0
+    return st
+
+
+def play_summary(st, speed=SPEED):
+    if not st["sent"]:
+        return "  nothing sent"
+    span = st["t_last"] - st["t_first"]
+    return (f"  log {st['t_first']:.2f} .. {st['t_last']:.2f} s ({span:.2f} s) played in "
+            f"{st['elapsed']:.2f} s at speed {speed:g}: {st['sent']} frames sent, "
+            f"{st['dropped']} dropped, max lateness {st['late_max'] * 1000:.1f} ms")
+
+
+def replay_log(path, speed=SPEED, rate=None, t0=None, t1=None):
+    params = log_params(path)
+    limits = (params.get("ANGLE_MIN", ANGLE_MIN), params.get("ANGLE_MAX", ANGLE_MAX))
+    period = 1.0 / rate if rate else STEP_TIME
+    servos = init_servos(limits)
+
+    evlog.info("stage", "Lead in to the first logged frame ...")
+    first = first_frame(path, t0)
+    lead_in(servos, first)
+    safe_pose = stand_from_params(params) or first     # 没有站姿就停在开头那一帧
+
+    evlog.info("stage", "Replaying {path} at speed {speed:g}, {hz:.1f} Hz ...",
+               path=path, speed=speed, hz=1.0 / period)
+    try:
+        st = play(servos, path, period, speed, t0, t1, safe_pose)
+    except KeyboardInterrupt:
+        evlog.warn("stage", "Replay interrupted")
+        return None
+    evlog.info("summary", "Replay:\n" + play_summary(st, speed))
+    evlog.info("stage", "Done.")
+    return st
+
+
+def main():
+    args = sys.argv[1:]
+    opt = {}
+    for flag in ("--speed", "--rate", "--from", "--to", "--port"):
+        if flag in args:
+            i = args.index(flag)
+            opt[flag] = args[i + 1]
+            del args[i:i + 2]
+    if "--sim" in args:
+        args.remove("--sim")
+        from simbus import install
+        install()
+    if not args:
+        print("usage: python logplay.py LOG [--speed S] [--rate HZ] [--from T0] [--to T1] [--sim]")
+        return
+    global PORT
+    PORT = opt.get("--port", PORT)
+    num = {k: float(v) for k, v in opt.items() if k != "--port"}
+    replay_log(args[0], num.get("--speed", SPEED), num.get("--rate"),
+               num.get("--from"), num.get("--to"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+import os
+import sys
+import time
+import runpy
+import threading
+
+from pylx16a.lx16a import *
+
+# 运行时指标（可选）：
+#   走路的时候只看得到打出来的 phase 号，看不到控制循环到底跑多快、超时几次、
+#   总线占了多少、读超时多少次、舵机多热。这里：
+#     - 控制循环 / 串口那边只做 dict 里的加法和赋值（不加锁：每个指标只有一个线程在写，
+#       读的那边拿的是 dict(...) 的快照），开销是几百纳秒
+#     - LX16A 打开的串口包一层 MeteredSerial：按命令号数包、收发字节、读超时、
+#       花在串口调用里的时间；按 115200 波特折算线上时间，算总线占用率
+#     - 控制循环每帧调一次 loop_tick(周期)：帧数、实际周期、平滑后的频率、超时帧数
+#     - 仲裁器 / 健康监测的状态不用它们自己上报，抓取的时候由 collector 去读
+#   两种出口（都是 Prometheus 文本格式）：
+#     - http://127.0.0.1:9871/metrics   本机抓取（prometheus / curl）
+#     - STATS_FILE 每 STATS_INTERVAL 秒整个重写一次（先写临时文件再 rename）
+#
+# 用法：
+#   python robot.py trot --sim --metrics             # 另一个终端 curl localhost:9871/metrics
+#   python robot.py trot --stats-file robot_stats.prom
+#   python metrics.py trotsinwalk.py [--sim] [--port 9871] [--stats-file F]
+
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9871
+STATS_FILE = "robot_stats.prom"
+STATS_INTERVAL = 1.0     # 秒
+
+BAUD = 115200            # LX-16A 总线波特率，1 字节 = 10 bit
+OVERRUN_FACTOR = 1.5     # 一帧超过 周期 × 这个倍数 算超时
+RATE_ALPHA = 0.1         # 循环频率的平滑系数
+
+HELP = {
+    "loop_iterations_total": ("counter", "control loop iterations"),
+    "loop_overruns_total": ("counter", "iterations longer than OVERRUN_FACTOR x target period"),
+    "loop_period_seconds": ("gauge", "last iteration period"),
+    "loop_period_max_seconds": ("gauge", "longest iteration period"),
+    "loop_rate_hz": ("gauge", "smoothed control loop rate"),
+    "loop_target_hz": ("gauge", "target control loop rate"),
+    "bus_commands_total": ("counter", "packets written, by LX-16A command number"),
+    "bus_tx_bytes_total": ("counter", "bytes written to the servo bus"),
+    "bus_rx_bytes_total": ("counter", "bytes read from the servo bus"),
+    "bus_read_timeouts_total": ("counter", "reads that returned fewer bytes than asked"),
+    "bus_busy_seconds_total": ("counter", "time spent inside serial write/read calls"),
+    "bus_wire_seconds_total": ("counter", "bytes on the wire converted to seconds at BAUD"),
+    "bus_utilization_ratio": ("gauge", "wire time / wall time since the previous scrape"),
+    "arb_jobs_total": ("counter", "bus arbiter jobs, by priority and result"),
+    "arb_overruns_total": ("counter", "bus arbiter ticks that ran past their period"),
+    "servo_temp_celsius": ("gauge", "rolling mean servo temperature"),
+    "servo_vin_volts": ("gauge", "rolling mean supply voltage"),
+    "health_level": ("gauge", "0 ok, 1 slow, 2 stop"),
+}
+
+_values = {}            # (名字, 标签字符串) -> 数
+_collectors = []        # 抓取时调用，返回 [(名字, 标签字符串, 数)]
+_loop = {"last": None, "rate": None}
+_prev = {"wall": None, "wire": 0.0}
+_cmd_labels = {}
+_st = {"installed": False, "server": None, "file_thread": None, "stop": threading.Event()}
+
+
+# ========== 控制循环这边（不加锁） ==========
+
+def inc(name, n=1, labels=""):
+    key = (name, labels)
+    _values[key] = _values.get(key, 0) + n
+
+
+def set_gauge(name, value, labels=""):
+    _values[(name, labels)] = value
+
+
+def loop_tick(period):
+    """控制循环每帧调一次；period 是这一帧应该多长（秒）"""
+    now = time.perf_counter()
+    last = _loop["last"]
+    _loop["last"] = now
+    inc("loop_iterations_total")
+    set_gauge("loop_target_hz", 1.0 / period)
+    if last is None:
+        return
+    dt = now - last
+    set_gauge("loop_period_seconds", dt)
+    if dt > _values.get(("loop_period_max_seconds", ""), 0.0):
+        set_gauge("loop_period_max_seconds", dt)
+    if dt > 0:
+        rate = _loop["rate"]
+        rate = 1.0 / dt if rate is None else rate + RATE_ALPHA * (1.0 / dt - rate)
+        _loop["rate"] = rate
+        set_gauge("loop_rate_hz", rate)
+    if dt > period * OVERRUN_FACTOR:
+        inc("loop_overruns_total")
+
+
+def loop_reset():
+    """两段控制循环之间（比如先站好再走）调一下，中间的空档不算成一帧"""
+    _loop["last"] = None
+
+
+# ========== 串口 ==========
+
+def cmd_label(cmd):
+    label = _cmd_labels.get(cmd)
+    if label is None:
+        label = _cmd_labels[cmd] = f'cmd="{cmd}"'
+    return label
+
+
+class MeteredSerial:
+    """包在真串口（或 SimSerial / busrec 的串口）外面，只计数，字节原样转过去"""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def write(self, data):
+        t0 = time.perf_counter()
+        n = self.inner.write(data)
+        inc("bus_busy_seconds_total", time.perf_counter() - t0)
+        size = len(data)
+        inc("bus_tx_bytes_total", size)
+        inc("bus_wire_seconds_total", size * 10 / BAUD)
+        if size >= 5 and data[0] == 0x55:
+            inc("bus_commands_total", 1, cmd_label(data[4]))
+        return n
+
+    def read(self, size=1):
+        t0 = time.perf_counter()
+        data = self.inner.read(size)
+        self._count_rx(t0, len(data), size)
+        return data
+
+    def readinto(self, buf):
+        t0 = time.perf_counter()
+        readinto = getattr(self.inner, "readinto", None)
+        if readinto is not None:
+            got = readinto(buf) or 0
+        else:
+            data = self.inner.read(len(buf))
+            got = len(data)
+            buf[:got] = data
+        self._count_rx(t0, got, len(buf))
+        return got
+
+    def _count_rx(self, t0, got, size):
+        inc("bus_busy_seconds_total", time.perf_counter() - t0)
+        inc("bus_rx_bytes_total", got)
+        inc("bus_wire_seconds_total", got * 10 / BAUD)
+        if got < size:
+            inc("bus_read_timeouts_total")
+
+    @property
+    def timeout(self):
+        return self.inner.timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self.inner.timeout = value
+
+    @property
+    def write_timeout(self):
+        return self.inner.write_timeout
+
+    @write_timeout.setter
+    def write_timeout(self, value):
+        self.inner.write_timeout = value
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def close(self):
+        self.inner.close()
+
+
+# ========== 别的模块的状态 ==========
+
+def register(fn):
+    """fn() -> [(名字, 标签字符串, 数)]，抓取的时候调用（在抓取线程里，只读）"""
+    _collectors.append(fn)
+
+
+def arb_collector(arb):
+    from busarb import PRIO_NAMES
+
+    def collect():
+        out = [("arb_overruns_total", "", arb.overruns)]
+        for prio, st in list(arb.stats.items()):
+            for result in ("run", "deferred", "expired", "failed"):
+                out.append(("arb_jobs_total",
+                            f'prio="{PRIO_NAMES.get(prio, prio)}",result="{result}"', st[result]))
+        return out
+    return collect
+
+
+def health_collector(health):
+    from health import rolling_temps, rolling_vin
+
+    def collect():
+        out = [("health_level", "", {"ok": 0, "slow": 1, "stop": 2}[health["level"]])]
+        for sid, t in rolling_temps(health).items():
+            out.append(("servo_temp_celsius", f'id="{sid}"', t))
+        vin, _ = rolling_vin(health)
+        if vin is not None:
+            out.append(("servo_vin_volts", "", vin / 1000.0))
+        return out
+    return collect
+
+
+# ========== 输出 ==========
+
+def snapshot():
+    """[(名字, 标签字符串, 数)]，包括 collector 的和算出来的占用率"""
+    values = dict(_values)
+    rows = [(name, labels, v) for (name, labels), v in values.items()]
+    for fn in list(_collectors):
+        try:
+            rows.extend(fn())
+        except RuntimeError:      # deque 正好在被控制循环改，这次先跳过
+            pass
+
+    now = time.monotonic()
+    wire = values.get(("bus_wire_seconds_total", ""), 0.0)
+    if _prev["wall"] is not None and now > _prev["wall"]:
+        rows.append(("bus_utilization_ratio", "", (wire - _prev["wire"]) / (now - _prev["wall"])))
+    _prev["wall"], _prev["wire"] = now, wire
+    return rows
+
+
+def render(rows=None):
+    """Prometheus 文本格式"""
+    rows = snapshot() if rows is None else rows
+    lines = []
+    for name in sorted({r[0] for r in rows}):
+        kind, text = HELP.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for _, labels, v in sorted((r for r in rows if r[0] == name), key=lambda r: r[1]):
+            lines.append(f"{name}{{{labels}}} {v:.6g}" if labels else f"{name} {v:.6g}")
+    return "\n".join(lines) + "\n"
+
+
+def write_stats(path):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+def serve(port=METRICS_PORT):
+    """本机 HTTP：GET /metrics；后台线程"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((METRICS_HOST, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    _st["server"] = server
+    return server
+
+
+def stats_file_loop(path, interval=STATS_INTERVAL):
+    # Event.wait 不走 time.sleep，dryrun 换了虚拟时钟也照样按真实时间写
+    while not _st["stop"].wait(interval):
+        write_stats(path)
+    write_stats(path)
+
+
+# ========== 装上 ==========
+
+def install(port=None, stats_file=None):
+    """之后 LX16A.initialize 打开的串口都会被计数；port / stats_file 给了就开对应的出口"""
+    if not _st["installed"]:
+        orig = LX16A.initialize
+
+        def initialize(port, timeout=0.02):
+            if isinstance(LX16A._controller, MeteredSerial):
+                LX16A._controller = LX16A._controller.inner
+            orig(port, timeout)
+            LX16A._controller = MeteredSerial(LX16A._controller)
+
+        LX16A.initialize = staticmethod(initialize)
+        if LX16A._controller is not None and not isinstance(LX16A._controller, MeteredSerial):
+            LX16A._controller = MeteredSerial(LX16A._controller)
+        _st["installed"] = True
+
+    if port:
+        serve(port)
+        print(f"[metrics] http://{METRICS_HOST}:{port}/metrics", file=sys.stderr)
+    if stats_file:
+        th = threading.Thread(target=stats_file_loop, args=(stats_file,), name="metrics-file", daemon=True)
+        th.start()
+        _st["file_thread"] = th
+        print(f"[metrics] writing {stats_file} every {STATS_INTERVAL:.0f} s", file=sys.stderr)
+
+
+def active():
+    return _st["installed"]
+
+
+def shutdown():
+    _st["stop"].set()
+    if _st["file_thread"]:
+        _st["file_thread"].join(2.0)
+    if _st["server"]:
+        _st["server"].shutdown()
+
+
+def main():
+    args = sys.argv[1:]
+    if not args:
+        print("usage: python metrics.py SCRIPT.py [--sim] [--port 9871] [--stats-file FILE]")
+        return
+    script = args[0]
+    sys.modules.setdefault("metrics", sys.modules[__name__])   # 脚本里 import metrics 拿到的是同一份计数
+    port = int(args[args.index("--port") + 1]) if "--port" in args else METRICS_PORT
+    stats_file = args[args.index("--stats-file") + 1] if "--stats-file" in args else None
+    if "--sim" in args:
+        from simbus import install as sim_install
+        sim_install()
+    install(port=port, stats_file=stats_file)
+    sys.argv = [script]
+    try:
+        runpy.run_path(script, run_name="__main__")
+    finally:
+        shutdown()
+        print(render(), end="")
+
+
+if __name__ == "__main__":
+    main()
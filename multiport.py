@@ -0,0 +1,265 @@
+import sys
+import time
+import queue
+import runpy
+import threading
+
+from pylx16a.lx16a import *
+
+# 多串口并行总线：
+#   8 个舵机挂在一条 /dev/ttyUSB0 上，每帧的总线时间跟关节数成正比。
+#   这里按 PORT_MAP 把舵机分到几个 USB 转接板上，每个口一个 I/O 线程，
+#   一帧的指令先攒着，凑齐以后所有口同时发出去（对齐到同一个 tick），
+#   总线时间大约按口数等分。
+#   脚本照样用 LX16A(id) 按 ID 寻址，不用知道舵机挂在哪个口上。
+#
+# 用法：
+#   python multiport.py trotsinwalk.py
+#   python multiport.py trotsinwalk.py --sim
+#   python multiport.py --bench            # 模拟总线上比较 1 个口和 N 个口的帧率
+
+PORT_MAP = {
+    "/dev/ttyUSB0": [1, 2, 3, 4],   # 右边的腿
+    "/dev/ttyUSB1": [5, 6, 7, 8],   # 左边的腿
+}
+BAUD = 115200
+
+FRAME_HOLD = 0.005   # 一帧没凑齐时，最后一次写之后最多再等多久就发
+
+REPLY_BYTES = {2: 4, 8: 4, 14: 1, 19: 1, 21: 4, 23: 4, 25: 1,
+               26: 1, 27: 2, 28: 2, 30: 4, 32: 1, 34: 1, 36: 1}
+
+
+# ========== 每个口一个线程 ==========
+
+class PortWorker(threading.Thread):
+    """
+    按顺序处理这个口的队列：
+      ("w", 包)            攒到本帧缓冲里
+      ("flush",)           本帧缓冲一次性写出去
+      ("r", 包, 字节数, box) 先把缓冲写完，再发读请求、等应答
+    """
+
+    def __init__(self, name, ser):
+        super().__init__(name=f"port-{name}", daemon=True)
+        self.port = name
+        self.ser = ser
+        self.jobs = queue.Queue()
+        self.frame = bytearray()
+        self.busy = 0.0        # 花在串口上的时间
+        self.bytes = 0
+        self.frames = 0
+
+    def _write(self, data):
+        t = time.perf_counter()
+        self.ser.write(bytes(data))
+        self.busy += time.perf_counter() - t
+        self.bytes += len(data)
+
+    def _flush(self):
+        if self.frame:
+            self._write(self.frame)
+            self.frame.clear()
+            self.frames += 1
+
+    def run(self):
+        while True:
+            try:
+                job = self.jobs.get(timeout=FRAME_HOLD)
+            except queue.Empty:
+                self._flush()   # 一帧没凑齐也别拖着
+                continue
+
+            kind = job[0]
+            if kind == "w":
+                self.frame.extend(job[1])
+            elif kind == "flush":
+                self._flush()
+            elif kind == "r":
+                _, packet, expect, box = job
+                self._flush()
+                self._write(packet)
+                t = time.perf_counter()
+                box["reply"] = self.ser.read(expect + 6)
+                self.busy += time.perf_counter() - t
+                self.bytes += len(box["reply"])
+                box["done"].set()
+            elif kind == "stop":
+                self._flush()
+                self.ser.close()
+                return
+
+
+# ========== 装到 LX16A 上的“串口” ==========
+
+class MultiPortSerial:
+    """按包里的舵机 ID 分发到对应的口；一帧的写凑齐后所有口同时发"""
+
+    def __init__(self, port_map=PORT_MAP, opener=None):
+        self.timeout = 0.02
+        self.write_timeout = 0.02
+        self.workers = {}
+        self.route = {}
+        for port, ids in port_map.items():
+            ser = opener(port, ids) if opener else open_serial(port)
+            w = PortWorker(port, ser)
+            w.start()
+            self.workers[port] = w
+            for sid in ids:
+                self.route[sid] = w
+        self.frame_ids = set()
+        self.box = None
+        self.reply = b""
+
+    def write(self, data):
+        data = bytes(data)
+        sid, cmd = data[2], data[4]
+        expect = REPLY_BYTES.get(cmd, 0)
+
+        if sid == 254:   # 广播：每个口都发
+            for w in self.workers.values():
+                w.jobs.put(("w", data))
+            self.end_frame()
+            return len(data)
+
+        w = self.route.get(sid)
+        if w is None:
+            self.box = None   # 没有这个 ID：读的时候就超时
+            self.reply = b""
+            return len(data)
+
+        if expect:
+            self.box = {"done": threading.Event(), "reply": b""}
+            w.jobs.put(("r", data, expect, self.box))
+            return len(data)
+
+        if cmd != 1:
+            # 不是 move（设限位、开关扭矩……）：不算进帧，直接发
+            w.jobs.put(("w", data))
+            w.jobs.put(("flush",))
+            return len(data)
+
+        # 同一个 ID 在本帧里又写了一次：说明上一帧结束了
+        if sid in self.frame_ids:
+            self.end_frame()
+        w.jobs.put(("w", data))
+        self.frame_ids.add(sid)
+        if len(self.frame_ids) == len(self.route):
+            self.end_frame()
+        return len(data)
+
+    def end_frame(self):
+        """所有口同时把本帧发出去"""
+        for w in self.workers.values():
+            w.jobs.put(("flush",))
+        self.frame_ids.clear()
+
+    def read(self, size=1):
+        if self.box is not None:
+            self.box["done"].wait(self.timeout + 0.05)
+            self.reply = self.box["reply"]
+            self.box = None
+        out, self.reply = self.reply[:size], self.reply[size:]
+        return out
+
+    def reset_input_buffer(self):
+        self.reply = b""
+        for w in self.workers.values():
+            w.ser.reset_input_buffer()
+
+    def reset_output_buffer(self):
+        pass
+
+    def flushInput(self):
+        self.reset_input_buffer()
+
+    def close(self):
+        for w in self.workers.values():
+            w.jobs.put(("stop",))
+        for w in self.workers.values():
+            w.join(timeout=1.0)
+
+    def stats(self, elapsed):
+        """每个口的 帧数 / 字节数 / 总线占用率"""
+        out = {}
+        for port, w in self.workers.items():
+            out[port] = {
+                "frames": w.frames,
+                "bytes": w.bytes,
+                "busy": w.busy / elapsed if elapsed > 0 else 0.0,
+            }
+        return out
+
+
+def open_serial(port):
+    import serial
+    return serial.Serial(port=port, baudrate=BAUD, timeout=0.02, write_timeout=0.02)
+
+
+def sim_opener(port, ids):
+    from simbus import SimSerial, default_model
+    return SimSerial(default_model(ids))
+
+
+def install(port_map=PORT_MAP, sim=False):
+    """之后 LX16A.initialize(任何端口) 都走多口总线"""
+    bus = MultiPortSerial(port_map, sim_opener if sim else None)
+
+    def initialize(port, timeout=0.02):
+        bus.timeout = timeout
+        LX16A._controller = bus
+
+    LX16A.initialize = staticmethod(initialize)
+    LX16A._controller = bus
+    return bus
+
+
+# ========== 帧率对比 ==========
+
+def bench(port_map, frames=200):
+    """模拟总线上尽快发 frames 帧（每帧 8 个 move + 1 个读），返回帧率"""
+    bus = install(port_map, sim=True)
+    servos = {sid: LX16A(sid) for sid in range(1, 9)}
+    t0 = time.perf_counter()
+    for k in range(frames):
+        a = 120 + 10 * ((k % 20) / 20)
+        for sid in range(1, 9):
+            servos[sid].move(a)
+        servos[1 + k % 8].get_physical_angle()
+    bus.end_frame()
+    elapsed = time.perf_counter() - t0
+    bus.close()
+    return frames / elapsed
+
+
+def main():
+    args = sys.argv[1:]
+    if "--bench" in args:
+        ids = list(range(1, 9))
+        single = {"bus0": ids}
+        rate1 = bench(single)
+        rate_n = bench({f"bus{k}": ids[k::len(PORT_MAP)] for k in range(len(PORT_MAP))})
+        print(f"1 port : {rate1:6.1f} frames/s")
+        print(f"{len(PORT_MAP)} ports: {rate_n:6.1f} frames/s  (x{rate_n / rate1:.2f})")
+        return
+
+    if not args:
+        print("usage: python multiport.py SCRIPT.py [--sim] | --bench")
+        return
+    script = args[0]
+    bus = install(PORT_MAP, sim="--sim" in args)
+    print(f"[multiport] running {script} on {len(PORT_MAP)} ports")
+    t0 = time.time()
+    try:
+        sys.argv = [script]
+        runpy.run_path(script, run_name="__main__")
+    finally:
+        bus.end_frame()
+        for port, st in bus.stats(time.time() - t0).items():
+            print(f"[multiport] {port}: {st['frames']} frames, "
+                  f"{st['bytes']} bytes, bus {st['busy'] * 100:.0f}% busy")
+        bus.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from pylx16a.lx16a import *
 import time
 
+import evlog
+
 PORT = "/dev/ttyUSB0"
 
 ANGLE_MIN = 40
@@ -62,18 +64,16 @@ def init_servos():
         s = LX16A(sid)
         s.set_angle_limits(ANGLE_MIN, ANGLE_MAX)
         servos[sid] = s
-        print(f"Servo {sid} init OK")
+        evlog.info("servo_init", "Servo {sid} init OK", sid=sid)
     time.sleep(0.5)
     return servos
 
 
 def read_current_pose(servos):
     pose = {}
-    print("Current pose:")
     for sid, s in servos.items():
-        a = s.get_physical_angle()
-        pose[sid] = a
-        print(f"  ID{sid}: {a:.1f}°")
+        pose[sid] = s.get_physical_angle()
+    evlog.info("pose", evlog.fmt_pose, pose=dict(pose))
     return pose
 
 
@@ -105,13 +105,16 @@ def clone_pose(pose):
 
 # ========== 一轮“小步走”的相位（不累积偏移） ==========
 
-def make_step_phases(base_pose):
+def make_step_phases(base_pose, start_pose=None):
     """
     base_pose 就是已经补偿过的 STAND_POSE。
     一轮 8 个相位，走完后再回到 base_pose，防止越走越歪。
+    start_pose：这一轮的起点，默认就是 base_pose；
+    连续行走时传上一轮最后一个相位（见 gaitblend.py）。
+    落脚角度总是相对 base_pose 算的，所以不会累积偏移。
     """
     phases = []
-    pose = clone_pose(base_pose)
+    pose = clone_pose(base_pose if start_pose is None else start_pose)
 
     # RF:1,2  RR:3,4  LR:5,6  LF:7,8
 
@@ -186,7 +189,7 @@ def main():
     stand_pose = build_stand_pose()
 
     # 1. 从当前姿态平滑站到 stand_pose
-    print("\nMove to stand_pose ...")
+    evlog.info("stage", "\nMove to stand_pose ...")
     cur = read_current_pose(servos)
     smooth_move(servos, cur, stand_pose, duration=1.0, steps=40)
     cur = clone_pose(stand_pose)
@@ -194,23 +197,23 @@ def main():
     # 2. 走 NUM_CYCLES 轮，每轮都：
     #    stand_pose -> 8 个相位 -> 回到 stand_pose
     for cycle in range(NUM_CYCLES):
-        print(f"\n=== Walk cycle {cycle+1}/{NUM_CYCLES} ===")
+        evlog.info("cycle", "\n=== Walk cycle {k}/{n} ===", k=cycle + 1, n=NUM_CYCLES)
 
         phases = make_step_phases(stand_pose)
 
         for idx, phase in enumerate(phases):
-            print(f"  phase {idx+1}/{len(phases)}")
+            evlog.debug("phase", "  phase {k}/{n}", k=idx + 1, n=len(phases))
             smooth_move(servos, cur, phase,
                         duration=STEP_DURATION, steps=STEP_STEPS)
             cur = clone_pose(phase)
 
         # 回到修正后的站立姿态，消掉累积误差
-        print("  -> back to stand_pose")
+        evlog.debug("stage", "  -> back to stand_pose")
         smooth_move(servos, cur, stand_pose, duration=0.4, steps=24)
         cur = clone_pose(stand_pose)
         time.sleep(0.2)
 
-    print("\nDone; final pose is stand_pose.")
+    evlog.info("stage", "\nDone; final pose is stand_pose.")
 
 
 if __name__ == "__main__":
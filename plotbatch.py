@@ -0,0 +1,203 @@
+import os
+import sys
+import csv
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+
+from plotangle import plot_data
+from logarch import read_archive, ARCHIVE_EXT
+
+# 一批角度日志一起画：
+#   调一天参数会攒下几十个 angle_log*.csv（trot_sine_walk_with_log / trot_with_per_servo_amp
+#   默认都写 angle_log.csv，要自己改名），plotangle.py 一次只能画一个。
+#   这里给一个 glob，用进程池（默认用满所有核）每个日志一个进程任务：
+#     - numpy 一次读进来（t, id1..id8），画成 <输出目录>/<日志名>.png；
+#       日志名是相对所有日志共同目录的路径（d1/angle_log.csv -> d1__angle_log），
+#       不同目录下同名的 angle_log.csv 不会互相覆盖
+#     - 每个关节算：最小 / 最大 / 幅度范围 / 平均 / 主周期（均匀重采样后 FFT 的峰）/
+#       贴着限位的帧数（CLIP_LIMITS 上下 CLIP_EPS 度以内，或者已经超出）
+#   最后打一张每个日志一行的汇总表，每个关节的细节写进 <输出目录>/plot_summary.csv。
+#   某一个日志坏了只记一行错误，不影响别的。
+#
+# 用法：
+#   python plotbatch.py "logs/*.csv" [logs/*.lxa ...] [--out plots] [-j 8] [--limits 40 200]
+#   python robot.py plots "logs/*.csv" --out plots
+
+OUT_DIR = "plots"
+SUMMARY_FILE = "plot_summary.csv"
+BATCH_DPI = 150           # 单张图 plotangle 用 300，批量时小一点快很多
+CLIP_LIMITS = (40, 200)   # 大部分脚本的 ANGLE_MIN / ANGLE_MAX（rt.py 是 0 / 240，用 --limits 改）
+CLIP_EPS = 0.05           # 度
+
+SERVO_IDS = list(range(1, 9))
+
+
+# ========== 读 + 算 ==========
+
+def load_log(path):
+    """-> t (T,), Q (T, 8)；按表头找列，顺序不对也没关系；.lxa 归档也行"""
+    if path.endswith(ARCHIVE_EXT):
+        return read_archive(path)
+    with open(path, newline="") as f:
+        header = next(csv.reader(f))
+    cols = [header.index("t")] + [header.index(f"id{sid}") for sid in SERVO_IDS]
+    data = np.loadtxt(path, delimiter=",", skiprows=1, usecols=cols, ndmin=2)
+    return data[:, 0], data[:, 1:]
+
+
+def dominant_periods(t, Q):
+    """每列的主周期（秒）：按中位采样间隔均匀重采样，去掉均值后 FFT 找峰；平的列给 NaN"""
+    out = np.full(Q.shape[1], np.nan)
+    if len(t) < 8:
+        return out
+    dt = float(np.median(np.diff(t)))
+    if dt <= 0:
+        return out
+    tu = np.arange(t[0], t[-1], dt)
+    U = np.column_stack([np.interp(tu, t, Q[:, i]) for i in range(Q.shape[1])])
+    U -= U.mean(axis=0)
+    spec = np.abs(np.fft.rfft(U, axis=0))
+    freqs = np.fft.rfftfreq(len(tu), dt)
+    k = spec[1:].argmax(axis=0) + 1
+    peak = spec[k, np.arange(Q.shape[1])]
+    ok = peak > 1e-6 * len(tu)
+    out[ok] = 1.0 / freqs[k[ok]]
+    return out
+
+
+def log_stats(t, Q, limits=CLIP_LIMITS):
+    lo, hi = limits
+    clipped = (Q <= lo + CLIP_EPS) | (Q >= hi - CLIP_EPS)
+    return {
+        "min": Q.min(axis=0),
+        "max": Q.max(axis=0),
+        "mean": Q.mean(axis=0),
+        "period": dominant_periods(t, Q),
+        "clipped": clipped.sum(axis=0),
+    }
+
+
+def process_log(path, name, out_dir=OUT_DIR, limits=CLIP_LIMITS, dpi=BATCH_DPI):
+    """进程池里跑的：读、算、画；出错返回 error，不抛出来"""
+    png = os.path.join(out_dir, name + ".png")
+    try:
+        t, Q = load_log(path)
+        if not len(t):
+            raise ValueError("empty log")
+        stats = log_stats(t, Q, limits)
+        plot_data(t, {sid: Q[:, sid - 1] for sid in SERVO_IDS}, png, title=name, dpi=dpi)
+    except (OSError, ValueError, StopIteration) as e:
+        return {"path": path, "name": name, "error": f"{type(e).__name__}: {e}"}
+    return {"path": path, "name": name, "png": png, "frames": len(t), "duration": float(t[-1] - t[0]),
+            "stats": {k: v.tolist() for k, v in stats.items()}}
+
+
+# ========== 批量 ==========
+
+def expand(patterns):
+    files = set()
+    for p in patterns:
+        matched = glob.glob(p, recursive=True)
+        files.update(matched if matched else ([p] if os.path.exists(p) else []))
+    return sorted(files)
+
+
+def unique_names(files):
+    """每个日志一个不重复的名字：相对共同目录的路径，目录分隔换成 __，去掉扩展名"""
+    paths = [os.path.abspath(f) for f in files]
+    common = os.path.commonpath([os.path.dirname(p) for p in paths]) if paths else ""
+    rel = [os.path.relpath(p, common) for p in paths]
+    names = [os.path.splitext(r)[0].replace(os.sep, "__") for r in rel]
+    out, seen = [], {}
+    for r, name in zip(rel, names):
+        if names.count(name) > 1:            # run.csv 和 run.lxa：带上扩展名
+            name = r.replace(os.sep, "__").replace(".", "_")
+        k = seen.get(name, 0)
+        seen[name] = k + 1
+        out.append(name if k == 0 else f"{name}_{k + 1}")
+    return out
+
+
+def run_batch(files, out_dir=OUT_DIR, limits=CLIP_LIMITS, jobs=None):
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        futs = [pool.submit(process_log, f, name, out_dir, limits)
+                for f, name in zip(files, unique_names(files))]
+        for n, fut in enumerate(as_completed(futs), 1):
+            res = fut.result()
+            results.append(res)
+            print(f"\r[plotbatch] {n}/{len(files)}", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    results.sort(key=lambda r: r["path"])
+    return results
+
+
+def write_summary(results, path):
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["log", "name", "id", "min", "max", "range", "mean", "period_s", "clipped"])
+        for r in results:
+            if "error" in r:
+                continue
+            st = r["stats"]
+            for i, sid in enumerate(SERVO_IDS):
+                w.writerow([r["path"], r["name"], sid, f"{st['min'][i]:.2f}", f"{st['max'][i]:.2f}",
+                            f"{st['max'][i] - st['min'][i]:.2f}", f"{st['mean'][i]:.2f}",
+                            f"{st['period'][i]:.3f}", st["clipped"][i]])
+
+
+def summary_table(results):
+    width = max([len(r["name"]) for r in results] + [3])
+    lines = [f"{'log':<{width}}  frames    dur  period  " +
+             " ".join(f"rng{sid:<3}" for sid in SERVO_IDS) + "  clipped"]
+    for r in results:
+        name = r["name"]
+        if "error" in r:
+            lines.append(f"{name:<{width}}  ERROR {r['error']}")
+            continue
+        st = r["stats"]
+        periods = [p for p in st["period"] if p == p]
+        period = f"{np.median(periods):6.2f}s" if periods else "     - "
+        ranges = " ".join(f"{hi - lo:6.1f}" for lo, hi in zip(st["min"], st["max"]))
+        lines.append(f"{name:<{width}}  {r['frames']:6d} {r['duration']:5.1f}s {period}  "
+                     f"{ranges}  {int(sum(st['clipped'])):7d}")
+    return "\n".join(lines)
+
+
+def main():
+    args = sys.argv[1:]
+    patterns, out_dir, jobs, limits = [], OUT_DIR, None, CLIP_LIMITS
+    k = 0
+    while k < len(args):
+        if args[k] == "--out":
+            out_dir, k = args[k + 1], k + 2
+        elif args[k] == "-j":
+            jobs, k = int(args[k + 1]), k + 2
+        elif args[k] == "--limits":
+            limits, k = (float(args[k + 1]), float(args[k + 2])), k + 3
+        else:
+            patterns.append(args[k])
+            k += 1
+    files = expand(patterns or ["angle_log*.csv"])
+    if not files:
+        print("no logs matched")
+        return
+
+    t0 = time.perf_counter()
+    results = run_batch(files, out_dir, limits, jobs)
+    elapsed = time.perf_counter() - t0
+    summary = os.path.join(out_dir, SUMMARY_FILE)
+    write_summary(results, summary)
+    print(summary_table(results))
+    print(f"\n{len(files)} logs in {elapsed:.1f} s ({jobs or os.cpu_count()} processes) "
+          f"-> {out_dir}/, per-joint details in {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import time
+_T0 = time.perf_counter()
+
+import sys
+import argparse
+import importlib
+
+# 统一入口：
+#   原来 20 个脚本各跑各的，每个都重新 import pylx16a（plotangle.py 还要 import matplotlib），
+#   各自再写一遍 init_servos。这里一个 robot.py，子命令用到哪个模块才 import 哪个，
+#   --help 和不画图的命令几十毫秒就能起来。启动时间 / import 时间会打印出来。
+#
+#   python robot.py stand [--fast]        站起来（standthendown / transplan）
+#   python robot.py down  [--fast]        趴下
+#   python robot.py walk                  nodriftwalk 小步走
+#   python robot.py trot                  trotsinwalk 正弦小跑
+#   python robot.py dance                 dance 对角小跑
+#   python robot.py boot                  开机自检（boottest）
+#   python robot.py scan [--max 253]      扫描总线上的舵机 ID
+#   python robot.py plot [angle_log.csv]  画角度日志
+#   python robot.py plots "logs/*.csv"    一批日志多进程一起画 + 汇总表（plotbatch）
+#   python robot.py stats a.lxa b.csv     步态质量：主频 / 幅度 / 偏置 / 对角相位差 / 抖动（gaitstats）
+#   python robot.py replay run.lxrec trot 用录下来的总线数据回放（busrec）
+#   python robot.py replay good.lxa [--speed 0.5]  按角度日志（.csv / .lxa）让舵机原样再动一遍（logplay）
+#
+#   运动类命令都可以加 --sim（模拟总线）、--port /dev/ttyUSB1、--fast-codec（fastcodec.py）、
+#   --log-level debug（evlog.py，debug 会打出每个 phase）、
+#   --metrics [PORT] / --stats-file FILE（metrics.py，本机看循环频率 / 总线占用 / 温度）、
+#   --safe-action pose|torque_off|none（watchdog.py，控制循环卡住 / 崩了的时候做什么，默认 pose）
+
+PORT = "/dev/ttyUSB0"
+
+_imports = []   # [(模块名, 秒)]
+
+
+def load(name):
+    """用到的时候才 import，顺便记下花了多久"""
+    if name in sys.modules:
+        return sys.modules[name]
+    t = time.perf_counter()
+    mod = importlib.import_module(name)
+    _imports.append((name, time.perf_counter() - t))
+    return mod
+
+
+def report_startup(t_ready):
+    parts = [f"startup {(t_ready - _T0) * 1000:.1f} ms"]
+    parts += [f"import {name} {dt * 1000:.1f} ms" for name, dt in _imports]
+    print("[robot] " + ", ".join(parts), file=sys.stderr)
+
+
+# ========== 子命令 ==========
+
+def with_port(mod, args):
+    mod.PORT = args.port
+    return mod
+
+
+def cmd_stand(args):
+    if args.fast:
+        tp = load("transplan")
+        with_port(load("standthendown"), args)
+        tp.stand_up_fast(tp.init_servos())
+    else:
+        sd = with_port(load("standthendown"), args)
+        sd.stand_up_with_preload(sd.init_servos())
+
+
+def cmd_down(args):
+    if args.fast:
+        tp = load("transplan")
+        with_port(load("standthendown"), args)
+        tp.go_down_fast(tp.init_servos())
+    else:
+        sd = with_port(load("standthendown"), args)
+        sd.go_down_from_stand(sd.init_servos())
+
+
+def cmd_walk(args):
+    with_port(load("nodriftwalk"), args).main()
+
+
+def cmd_trot(args):
+    with_port(load("trotsinwalk"), args).main()
+
+
+def cmd_dance(args):
+    with_port(load("dance"), args).main()
+
+
+def cmd_boot(args):
+    bt = load("boottest")
+    bt.PORT = args.port
+    bt.robot_boot_test()
+
+
+def cmd_scan(args):
+    lx = load("pylx16a.lx16a")
+    lx.LX16A.initialize(args.port)
+    found = []
+    for sid in range(0, args.max):
+        try:
+            s = lx.LX16A(sid)
+            ang = s.get_physical_angle()
+            print(f"Found servo ID {sid}, angle={ang}")
+            found.append(sid)
+        except lx.ServoTimeoutError:
+            pass
+    print(f"{len(found)} servos: {found}")
+
+
+def cmd_plot(args):
+    load("plotangle").plot_log(args.log, args.out)
+
+
+def cmd_plots(args):
+    pb = load("plotbatch")
+    sys.argv = ["plotbatch.py", *args.logs, "--out", args.out]
+    if args.jobs:
+        sys.argv += ["-j", str(args.jobs)]
+    if args.limits:
+        sys.argv += ["--limits", *map(str, args.limits)]
+    pb.main()
+
+
+def cmd_stats(args):
+    gs = load("gaitstats")
+    sys.argv = ["gaitstats.py", *args.logs]
+    if args.stand:
+        sys.argv += ["--stand", args.stand]
+    if args.limits:
+        sys.argv += ["--limits", *map(str, args.limits)]
+    if args.json:
+        sys.argv += ["--json", args.json]
+    gs.main()
+
+
+def cmd_replay(args):
+    if not args.file.endswith(".lxrec"):
+        lp = with_port(load("logplay"), args)
+        lp.replay_log(args.file, args.speed, args.rate, args.t_from, args.t_to)
+        return
+    if not args.command:
+        sys.exit("robot.py replay: a .lxrec bus recording needs the motion command to re-run")
+    busrec = load("busrec")
+    rep = busrec.install_replay(args.file, timing=args.timing)
+    try:
+        MOTION[args.command](args)
+    finally:
+        print(f"[robot] replay of {args.file}:")
+        print(rep.report())
+
+
+MOTION = {
+    "stand": cmd_stand,
+    "down": cmd_down,
+    "walk": cmd_walk,
+    "trot": cmd_trot,
+    "dance": cmd_dance,
+    "boot": cmd_boot,
+}
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="robot.py", description="quadruped robot control")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    def motion(name, fn, help_text):
+        sp = sub.add_parser(name, help=help_text)
+        sp.add_argument("--port", default=PORT)
+        sp.add_argument("--sim", action="store_true", help="run on the simulated bus")
+        sp.add_argument("--fast-codec", action="store_true",
+                        help="preallocated packet codec (fastcodec.py)")
+        sp.add_argument("--log-level", choices=["debug", "info", "warn", "error"],
+                        help="evlog level (default info)")
+        sp.add_argument("--metrics", nargs="?", type=int, const=9871, metavar="PORT",
+                        help="serve Prometheus-style metrics on localhost (default port 9871)")
+        sp.add_argument("--stats-file", metavar="FILE", help="rewrite metrics to FILE every second")
+        sp.add_argument("--safe-action", choices=["pose", "torque_off", "none"],
+                        help="what the loop watchdog sends on a stall or crash (default pose)")
+        sp.set_defaults(fn=fn)
+        return sp
+
+    motion("stand", cmd_stand, "stand up").add_argument(
+        "--fast", action="store_true", help="time-optimal synchronized transition")
+    motion("down", cmd_down, "lie down").add_argument(
+        "--fast", action="store_true", help="time-optimal synchronized transition")
+    motion("walk", cmd_walk, "nodriftwalk small steps")
+    motion("trot", cmd_trot, "trotsinwalk sine trot")
+    motion("dance", cmd_dance, "dance diagonal trot")
+    motion("boot", cmd_boot, "boot self-test")
+    motion("scan", cmd_scan, "scan the bus for servo IDs").add_argument(
+        "--max", type=int, default=253, help="scan IDs 0..MAX-1")
+
+    sp = sub.add_parser("plot", help="plot an angle log")
+    sp.add_argument("log", nargs="?", default="angle_log.csv")
+    sp.add_argument("--out", default="angle_plot.png")
+    sp.set_defaults(fn=cmd_plot, sim=False, fast_codec=False, log_level=None,
+                    metrics=None, stats_file=None, safe_action=None)
+
+    sp = sub.add_parser("plots", help="plot and summarize many angle logs in parallel")
+    sp.add_argument("logs", nargs="+", help="log files or glob patterns")
+    sp.add_argument("--out", default="plots")
+    sp.add_argument("-j", "--jobs", type=int, help="worker processes (default: all cores)")
+    sp.add_argument("--limits", type=float, nargs=2, metavar=("LO", "HI"),
+                    help="angle limits for the clipping count (default 40 200)")
+    sp.set_defaults(fn=cmd_plots, sim=False, fast_codec=False, log_level=None,
+                    metrics=None, stats_file=None, safe_action=None)
+
+    sp = sub.add_parser("stats", help="gait-quality numbers for angle logs (.csv / .lxa)")
+    sp.add_argument("logs", nargs="+")
+    sp.add_argument("--stand", metavar="SCRIPT", help="take STAND_POSE and SERVO_DIR from this script")
+    sp.add_argument("--limits", type=float, nargs=2, metavar=("LO", "HI"),
+                    help="angle limits for the clipping ratio (default: from the log, else 40 200)")
+    sp.add_argument("--json", metavar="OUT")
+    sp.set_defaults(fn=cmd_stats, sim=False, fast_codec=False, log_level=None,
+                    metrics=None, stats_file=None, safe_action=None)
+
+    sp = sub.add_parser("replay", help="re-run a motion command against a bus recording (.lxrec), "
+                                       "or play an angle log (.csv / .lxa) back to the servos")
+    sp.add_argument("file")
+    sp.add_argument("command", nargs="?", choices=sorted(MOTION), help=".lxrec only")
+    sp.add_argument("--timing", action="store_true", help="deliver replies with recorded delays")
+    sp.add_argument("--speed", type=float, default=1.0, help="angle logs: playback speed")
+    sp.add_argument("--rate", type=float, help="angle logs: control rate in Hz (default 1 / STEP_TIME)")
+    sp.add_argument("--from", dest="t_from", type=float, metavar="T0", help="angle logs: start at log time T0")
+    sp.add_argument("--to", dest="t_to", type=float, metavar="T1", help="angle logs: stop at log time T1")
+    sp.add_argument("--sim", action="store_true", help="angle logs: simulated bus")
+    sp.add_argument("--safe-action", choices=["pose", "torque_off", "none"],
+                    help="angle logs: what the watchdog sends on a stall (default pose)")
+    sp.add_argument("--port", default=PORT)
+    sp.add_argument("--fast", action="store_true")
+    sp.add_argument("--fast-codec", action="store_true")
+    sp.add_argument("--log-level", choices=["debug", "info", "warn", "error"])
+    sp.set_defaults(fn=cmd_replay, metrics=None, stats_file=None)
+    return p
+
+
+def main():
+    args = build_parser().parse_args()
+    if args.sim:
+        load("simbus").install()
+    if args.fast_codec:
+        load("fastcodec").install()
+    if args.log_level:
+        load("evlog").set_level(args.log_level)
+    if args.metrics or args.stats_file:
+        load("metrics").install(port=args.metrics, stats_file=args.stats_file)
+    if args.safe_action:
+        wd = load("watchdog")
+        wd.ENABLED = args.safe_action != "none"
+        wd.SAFE_ACTION = args.safe_action
+    report_startup(time.perf_counter())
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,13 @@ import math
 import csv
 from pylx16a.lx16a import *
 
+import evlog
+import metrics
+import watchdog
+from logarch import ArchiveWriter, module_meta, ARCHIVE_EXT
+from latcomp import (make_compensator, comp_command, comp_record,
+                     comp_readback, comp_summary)
+
 PORT = "/dev/ttyUSB0"
 
 # ----------------- 限位（按你实际） -----------------
@@ -34,6 +41,12 @@ STEP_TIME = 0.03
 STEPS_PER_CYCLE = 20
 CYCLES = 6
 
+# 延迟补偿：None 不补；"model" 用 servo_model.json；"online" 模型 + 在线读回修正
+LATENCY_COMP = None
+
+# 角度日志：.csv 是原来的文本；改成 "angle_log.lxa" 就写压缩分块归档（logarch.py），带参数
+LOG_NAME = "angle_log.csv"
+
 # ----------------- 你要调的核心：每个电机的摆幅/方向/偏置 -----------------
 # AMP：摆幅大小（度）
 # DIR：方向 +1 或 -1（反向就改成 -1）
@@ -83,7 +96,7 @@ def init_servos():
         s = LX16A(sid)
         s.set_angle_limits(ANGLE_MIN, ANGLE_MAX)
         servos[sid] = s
-        print(f"Servo {sid} OK")
+        evlog.info("servo_init", "Servo {sid} OK", sid=sid)
     time.sleep(0.5)
     return servos
 
@@ -110,45 +123,68 @@ def smooth_to_pose(servos, target_pose, duration=1.0, steps=60):
         time.sleep(duration / steps)
 
 # ----------------- 核心：每个电机单独控制幅度 -----------------
-def trot_with_per_servo_amp(servos, log_csv=True, csv_name="angle_log.csv"):
+def per_servo_pose_at(step):
+    """第 step 帧（可以是小数）的期望姿态，还没夹紧"""
     base = {sid: STAND_POSE[sid] + SERVO_OFF[sid] for sid in range(1, 9)}
+    phi = 2.0 * math.pi * (step / STEPS_PER_CYCLE)
+
+    angles = {}
+    for leg in ["LF", "RR", "RF", "LR"]:
+        phase = phi if leg in GROUP_A else (phi + math.pi)
+        swing = math.sin(phase)  # -1~1
+
+        hip_id, knee_id = LEG_MAP[leg]
+
+        # hip：直接用正弦（前后摆）
+        angles[hip_id] = base[hip_id] + SERVO_DIR[hip_id] * SERVO_AMP[hip_id] * swing
+
+        # knee：只在抬腿期变化（swing>0），更稳
+        lift = max(0.0, swing)
+        angles[knee_id] = base[knee_id] + SERVO_DIR[knee_id] * SERVO_AMP[knee_id] * lift
+
+    return angles
+
+def trot_with_per_servo_amp(servos, log_csv=True, csv_name="angle_log.csv", comp=None):
+    """
+    comp: latcomp.make_compensator(...)，给了就做延迟补偿
+    csv_name 以 .lxa 结尾时写压缩归档（logarch.py），连同这次的参数一起存
+    """
     total_steps = CYCLES * STEPS_PER_CYCLE
     t0 = time.time()
 
     writer = None
     f = None
-    if log_csv:
+    arc = None
+    if log_csv and csv_name.endswith(ARCHIVE_EXT):
+        arc = ArchiveWriter(csv_name, module_meta(globals(), "rt.py"))
+    elif log_csv:
         f = open(csv_name, "w", newline="")
         writer = csv.writer(f)
         writer.writerow(["t","id1","id2","id3","id4","id5","id6","id7","id8"])
 
+    metrics.loop_reset()
+    watchdog.arm(servos, STEP_TIME,
+                 safe_pose={sid: STAND_POSE[sid] + SERVO_OFF[sid] for sid in range(1, 9)})
     try:
         for step in range(total_steps):
-            phi = 2.0 * math.pi * (step / STEPS_PER_CYCLE)
+            if watchdog.tripped():
+                break
+            if comp:
+                target = comp_command(comp, per_servo_pose_at, step)
+            else:
+                target = per_servo_pose_at(step)
 
             angles = {i: None for i in range(1, 9)}
 
             for leg in ["LF", "RR", "RF", "LR"]:
-                phase = phi if leg in GROUP_A else (phi + math.pi)
-                swing = math.sin(phase)  # -1~1
-
-                hip_id, knee_id = LEG_MAP[leg]
-
-                # hip：直接用正弦（前后摆）
-                hip_angle = base[hip_id] + SERVO_DIR[hip_id] * SERVO_AMP[hip_id] * swing
-
-                # knee：只在抬腿期变化（swing>0），更稳
-                lift = max(0.0, swing)
-                knee_angle = base[knee_id] + SERVO_DIR[knee_id] * SERVO_AMP[knee_id] * lift
+                for sid in LEG_MAP[leg]:
+                    a = clamp(servos, sid, target[sid])
+                    servos[sid].move(a)
+                    angles[sid] = a
 
-                hip_angle = clamp(servos, hip_id, hip_angle)
-                knee_angle = clamp(servos, knee_id, knee_angle)
-
-                servos[hip_id].move(hip_angle)
-                servos[knee_id].move(knee_angle)
-
-                angles[hip_id] = hip_angle
-                angles[knee_id] = knee_angle
+            if comp:
+                comp_record(comp, step, angles)
+                comp_readback(comp, servos, step)
 
             if writer:
                 writer.writerow([
@@ -156,28 +192,42 @@ def trot_with_per_servo_amp(servos, log_csv=True, csv_name="angle_log.csv"):
                     angles[1], angles[2], angles[3], angles[4],
                     angles[5], angles[6], angles[7], angles[8]
                 ])
+            if arc:
+                arc.append(time.time() - t0, angles)
 
             time.sleep(STEP_TIME)
+            metrics.loop_tick(STEP_TIME)
+            watchdog.beat()
 
     finally:
         if f:
             f.close()
+        if arc:
+            arc.close()
+        watchdog.disarm()
 
 def main():
     servos = init_servos()
 
     # 先站好（注意加了 SERVO_OFF 后的站姿）
     stand_with_off = {sid: STAND_POSE[sid] + SERVO_OFF[sid] for sid in range(1, 9)}
-    print("Go to STAND...")
+    evlog.info("stage", "Go to STAND...")
     smooth_to_pose(servos, stand_with_off, duration=1.2, steps=70)
 
-    print("Start walking (per-servo tunable)...")
-    trot_with_per_servo_amp(servos, log_csv=True, csv_name="angle_log.csv")
+    comp = None
+    if LATENCY_COMP:
+        comp = make_compensator(stand_with_off, STEPS_PER_CYCLE * STEP_TIME, STEP_TIME,
+                                online=(LATENCY_COMP == "online"))
+
+    evlog.info("stage", "Start walking (per-servo tunable)...")
+    trot_with_per_servo_amp(servos, log_csv=True, csv_name=LOG_NAME, comp=comp)
+    if comp:
+        evlog.info("summary", "Latency compensation:\n" + comp_summary(comp))
 
-    print("Back to STAND...")
+    evlog.info("stage", "Back to STAND...")
     smooth_to_pose(servos, stand_with_off, duration=1.0, steps=60)
 
-    print("Done.")
+    evlog.info("stage", "Done.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,291 @@
+import sys
+import time
+import math
+
+import numpy as np
+from pylx16a.lx16a import *
+
+from simbus import load_model, save_model, install, MODEL_FILE
+
+# 舵机响应测量：
+#   对每个关节做阶跃（小步 + 大步）和 chirp 扫频，指令之间尽可能快地读角度，
+#   拟合 死区时间 dead_time / 时间常数 tau / 最大转速 slew，
+#   再算带宽和这条腿实际能跑的步频上限，存到 servo_model.json。
+#   simbus.py 直接读同一个文件。
+#
+# 注意：测之前把机器人架空，腿不要着地。
+#
+# 用法：
+#   python servochar.py              # 测 1~8
+#   python servochar.py 7 8          # 只测 7、8
+#   python servochar.py --sim        # 在模拟总线上跑一遍（检查拟合）
+
+PORT = "/dev/ttyUSB0"
+
+ANGLE_MIN = 40
+ANGLE_MAX = 200
+
+# 每个关节在哪个角度附近测（就用站姿）
+CENTER_POSE = {
+    1: 130, 2: 60, 3: 100, 4: 180,
+    5: 130, 6: 180, 7: 100, 8: 60,
+}
+
+SMALL_STEP = 10.0     # 小阶跃，看 tau
+BIG_STEP = 50.0       # 大阶跃，看 slew
+STEP_RECORD = 0.6     # 每次阶跃记录多久（秒）
+SETTLE = 0.4          # 测之前先稳住
+
+CHIRP_AMP = 10.0      # 扫频幅度
+CHIRP_F0 = 0.5        # Hz
+CHIRP_F1 = 8.0        # Hz
+CHIRP_TIME = 6.0      # s
+CHIRP_DT = 0.02       # 指令下发间隔；中间的空闲时间都拿来读角度
+
+GAIT_AMP = 20.0       # 估算步频上限时用的摆幅（trot 的 HIP_AMP）
+
+
+# ========== 采样 ==========
+
+def record(servo, command_fn, duration, cmd_dt=None):
+    """
+    command_fn(t) -> 角度：cmd_dt=None 时只在开头发一次，
+    否则每 cmd_dt 发一次；其余时间一直读位置。
+    返回 numpy 数组 t, cmd, pos（t 是指令对应的时刻）
+    """
+    ts, cmds, poss = [], [], []
+    t0 = time.monotonic()
+    cmd = command_fn(0.0)
+    servo.move(cmd)
+    next_cmd = cmd_dt
+
+    while True:
+        t = time.monotonic() - t0
+        if t >= duration:
+            break
+        if cmd_dt is not None and t >= next_cmd:
+            cmd = command_fn(next_cmd)
+            servo.move(cmd)
+            next_cmd += cmd_dt
+        try:
+            pos = servo.get_physical_angle()
+        except ServoError:
+            continue
+        ts.append(time.monotonic() - t0)
+        cmds.append(cmd)
+        poss.append(pos)
+
+    return np.array(ts), np.array(cmds), np.array(poss)
+
+
+def fit_range(servo, start, size):
+    """
+    [start, start + size] 整段挪进舵机限位里（大小不变，只平移）；限位比 size 还窄就缩小。
+    返回 (start, size)。膝关节的站姿离限位很近，大阶跃 / 扫频不挪会超限。
+    """
+    lo, hi = servo.get_angle_limits()
+    size = min(size, hi - lo)
+    start = max(lo, min(hi - size, start))
+    return start, size
+
+
+def step_test(servo, center, size):
+    servo.move(center)
+    time.sleep(SETTLE)
+    return record(servo, lambda t: center + size, STEP_RECORD)
+
+
+def chirp_command(center, amp=CHIRP_AMP):
+    """线性扫频：f 从 CHIRP_F0 到 CHIRP_F1"""
+    k = (CHIRP_F1 - CHIRP_F0) / CHIRP_TIME
+
+    def fn(t):
+        return center + amp * math.sin(2 * math.pi * (CHIRP_F0 * t + 0.5 * k * t * t))
+    return fn
+
+
+def chirp_test(servo, center, amp=CHIRP_AMP):
+    servo.move(center)
+    time.sleep(SETTLE)
+    return record(servo, chirp_command(center, amp), CHIRP_TIME, CHIRP_DT)
+
+
+# ========== 拟合 ==========
+
+def fit_step(t, pos, start, size):
+    """返回 (dead_time, t63, max_slope)"""
+    y = (pos - start) / size   # 归一化到 0 → 1
+    moved = np.nonzero(y > 0.05)[0]
+    if len(moved) == 0:
+        return None, None, 0.0
+    dead = t[moved[0]]
+    reach = np.nonzero(y > 0.632)[0]
+    t63 = t[reach[0]] if len(reach) else t[-1]
+
+    # 大阶跃前半段是撞着转速上限走的直线，直接线性拟合斜率，
+    # 比逐点差分更不怕读数量化噪声（0.24° 一格）
+    mid = (y > 0.1) & (y < 0.6)
+    slope = 0.0
+    if mid.sum() >= 3:
+        slope = abs(float(np.polyfit(t[mid], pos[mid], 1)[0]))
+    return float(dead), float(t63), slope
+
+
+def fit_joint(small, big, size_small, size_big):
+    """小阶跃拿 dead_time 和 tau，大阶跃拿 slew"""
+    t, cmd, pos = small
+    dead, t63, _ = fit_step(t, pos, pos[0], size_small)
+    t, cmd, pos = big
+    _, _, slew = fit_step(t, pos, pos[0], size_big)
+
+    if dead is None:
+        return None
+    # 小阶跃几乎不撞转速上限，这时 t63 ≈ dead + tau
+    tau = max(0.005, t63 - dead)
+    return {"dead_time": dead, "tau": tau, "slew": max(slew, 1.0)}
+
+
+def sine_fit(t, x, f):
+    """最小二乘拟合 x ≈ a sin + b cos + c，返回 (幅度, 相位)"""
+    w = 2 * math.pi * f
+    A = np.column_stack([np.sin(w * t), np.cos(w * t), np.ones_like(t)])
+    (a, b, _), *_ = np.linalg.lstsq(A, x, rcond=None)
+    return math.hypot(a, b), math.atan2(b, a)
+
+
+def chirp_response(chirp, bins=12):
+    """
+    把扫频切成 bins 段，每段按当时的频率拟合 指令/实际 的幅值比和相位差。
+    返回 [(f, gain, phase_lag_rad), ...]
+    """
+    t, cmd, pos = chirp
+    k = (CHIRP_F1 - CHIRP_F0) / CHIRP_TIME
+    out = []
+    edges = np.linspace(0, CHIRP_TIME, bins + 1)
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        sel = (t >= lo) & (t < hi)
+        if sel.sum() < 8:
+            continue
+        tc = (lo + hi) / 2
+        f = CHIRP_F0 + k * tc
+        # 段内相位按瞬时频率展开，用局部时间 t-tc 拟合
+        tt = t[sel] - tc
+        a_cmd, p_cmd = sine_fit(tt, cmd[sel], f)
+        a_pos, p_pos = sine_fit(tt, pos[sel], f)
+        if a_cmd < 1e-6:
+            continue
+        lag = (p_cmd - p_pos) % (2 * math.pi)
+        out.append((f, a_pos / a_cmd, lag))
+    return out
+
+
+def bandwidth(resp):
+    """幅值比第一次掉到 0.707 以下的频率（-3 dB）"""
+    for f, gain, _ in resp:
+        if gain < 0.707:
+            return f
+    return resp[-1][0] if resp else None
+
+
+def model_bandwidth(joint, amp=GAIT_AMP):
+    """
+    用模型估算：一阶环节 -3 dB 频率 和 转速限制下摆幅 amp 能跑的最高频率，
+    取小的那个作为这个关节的步频上限。
+    """
+    f_tau = 1.0 / (2 * math.pi * joint["tau"])
+    f_slew = joint["slew"] / (2 * math.pi * amp)
+    return f_tau, min(f_tau, f_slew)
+
+
+# ========== 主流程 ==========
+
+def characterize(servos, ids):
+    model = {}
+    for sid in ids:
+        s = servos[sid]
+        center = CENTER_POSE[sid]
+        print(f"\n--- servo {sid} around {center}° ---")
+
+        # 三段测试都挪进限位里（ID2/4/6/8 的站姿离限位不到 BIG_STEP / 2）
+        small_start, small_size = fit_range(s, center, SMALL_STEP)
+        big_start, big_size = fit_range(s, center - BIG_STEP / 2, BIG_STEP)
+        chirp_lo, chirp_span = fit_range(s, center - CHIRP_AMP, 2 * CHIRP_AMP)
+        if big_start != center - BIG_STEP / 2:
+            print(f"  big step shifted to {big_start:.0f}° -> {big_start + big_size:.0f}° "
+                  f"to stay inside the angle limits")
+
+        small = step_test(s, small_start, small_size)
+        big = step_test(s, big_start, big_size)
+        chirp = chirp_test(s, chirp_lo + chirp_span / 2, chirp_span / 2)
+        s.move(center)
+
+        rate = len(small[0]) / STEP_RECORD
+        joint = fit_joint(small, big, small_size, big_size)
+        if joint is None:
+            print(f"  servo {sid} did not move, skipped")
+            continue
+
+        resp = chirp_response(chirp)
+        f_bw, f_gait = model_bandwidth(joint)
+        joint["bandwidth_hz"] = bandwidth(resp) or f_bw
+        joint["max_gait_hz"] = min(f_gait, joint["bandwidth_hz"])
+        joint["read_rate_hz"] = rate
+        model[sid] = joint
+
+        print(f"  reads: {rate:.0f} Hz")
+        print(f"  dead_time {joint['dead_time']*1000:.1f} ms  "
+              f"tau {joint['tau']*1000:.1f} ms  "
+              f"slew {joint['slew']:.0f} deg/s")
+        print(f"  bandwidth {joint['bandwidth_hz']:.2f} Hz  "
+              f"max gait freq (±{GAIT_AMP:.0f}°) {joint['max_gait_hz']:.2f} Hz")
+    return model
+
+
+def init_servos(ids):
+    LX16A.initialize(PORT)
+    servos = {}
+    for sid in ids:
+        s = LX16A(sid)
+        s.set_angle_limits(ANGLE_MIN, ANGLE_MAX)
+        servos[sid] = s
+        print(f"Servo {sid} init OK")
+    time.sleep(0.5)
+    return servos
+
+
+def main():
+    args = sys.argv[1:]
+    sim = "--sim" in args
+    ids = [int(a) for a in args if a.isdigit()] or list(range(1, 9))
+
+    if sim:
+        try:
+            install(load_model())
+            print(f"[sim] using {MODEL_FILE} as ground truth")
+        except FileNotFoundError:
+            install()
+            print("[sim] using default model as ground truth")
+
+    servos = init_servos(ids)
+    model = characterize(servos, ids)
+
+    out = "servo_model_sim.json" if sim else MODEL_FILE
+    save_model(model, out, meta={
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "small_step": SMALL_STEP,
+        "big_step": BIG_STEP,
+        "chirp": [CHIRP_F0, CHIRP_F1, CHIRP_TIME],
+        "gait_amp": GAIT_AMP,
+    })
+    print(f"\nSaved model to {out}")
+
+    legs = {"RF": (1, 2), "RR": (3, 4), "LR": (5, 6), "LF": (7, 8)}
+    print("\nAchievable gait frequency per leg:")
+    for leg, (hip, knee) in legs.items():
+        fs = [model[sid]["max_gait_hz"] for sid in (hip, knee) if sid in model]
+        if fs:
+            print(f"  {leg}: {min(fs):.2f} Hz")
+
+
+if __name__ == "__main__":
+    main()
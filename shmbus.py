@@ -0,0 +1,432 @@
+import gc
+import os
+import sys
+import csv
+import json
+import time
+import math
+import runpy
+import struct
+import subprocess
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+from pylx16a.lx16a import *
+
+# 规划 / 总线 I/O / 日志 分成三个进程，中间用共享内存环形队列：
+#
+#   规划进程（跑原来的脚本）  --命令环-->   I/O 进程（独占串口）
+#                            <--应答环--
+#                            <--位置镜像--  （I/O 空闲时轮询各舵机位置）
+#   I/O 进程                 --遥测环-->   日志进程（写 CSV）
+#                                      \-->  liveplot.py（只 peek，不动 tail，可以随时开关）
+#
+#   - 环是单生产者单消费者（SPSC），只靠 head / tail 两个计数器，不加锁
+#   - 数据直接 pack_into / unpack_from 共享内存，不 pickle、不拷贝对象
+#   - 规划进程里的 GC / print 再慢，也只会让命令晚进环，不会卡住正在发的帧
+#
+# 用法（脚本本身一行不用改）：
+#   python shmbus.py nodriftwalk.py
+#   python shmbus.py trotsinwalk.py --sim --log angle_log.csv
+#   python shmbus.py trotsinwalk.py --sim --log run.lxa   # 压缩归档（logarch.py），带脚本参数
+#   python shmbus.py trotsinwalk.py --sim --live     # 顺便开一个实时曲线窗口
+#   共享内存的名字写在 SHM_NAMES_FILE 里，别的进程（liveplot.py）按它找过来
+
+PORT = "/dev/ttyUSB0"
+BAUD = 115200
+
+CMD_SLOTS = 256
+RSP_SLOTS = 64
+TEL_SLOTS = 4096
+
+MIRROR_MAX_AGE = 0.05   # 位置镜像多新才直接用（秒），旧了就真去读
+POLL_POSITIONS = True   # I/O 空闲时轮询位置，填镜像
+POLL_IDS = list(range(1, 9))
+IDLE_SLEEP = 0.0002
+SHM_NAMES_FILE = "shmbus_names.json"
+
+# 读指令的应答参数字节数
+REPLY_BYTES = {2: 4, 8: 4, 14: 1, 19: 1, 21: 4, 23: 4, 25: 1,
+               26: 1, 27: 2, 28: 2, 30: 4, 32: 1, 34: 1, 36: 1}
+
+# 槽格式
+CMD_FMT = "<IBB14s"     # seq, 包长, 期望应答字节数, 包
+RSP_FMT = "<IB18s"      # seq, 应答长度（0 = 超时）, 应答
+TEL_FMT = "<d8d8d"      # t, 8 个指令角, 8 个读回角（没有就是 NaN）
+
+HEADER_FMT = "<QQ"      # head, tail
+HEADER_SIZE = 64        # 单独占一条 cache line
+
+# 控制块：stop / ready 标志 + 镜像
+CTRL_STOP = 0
+CTRL_READY = 1
+MIRROR_OFFSET = 8
+MIRROR_FMT = "<dH6x"    # 时间戳, 原始角度
+MIRROR_STRIDE = struct.calcsize(MIRROR_FMT)
+CTRL_SIZE = MIRROR_OFFSET + 256 * MIRROR_STRIDE
+
+
+# ========== SPSC 环 ==========
+
+class ShmRing:
+    """
+    单生产者单消费者环形队列。head 只有生产者写，tail 只有消费者写，
+    8 字节对齐的整数写入在 x86 / ARM64 上是原子的，所以不用锁。
+    """
+
+    def __init__(self, slot_fmt, slots, name=None):
+        self.slot = struct.Struct(slot_fmt)
+        self.slots = slots
+        size = HEADER_SIZE + self.slot.size * slots
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            struct.pack_into(HEADER_FMT, self.shm.buf, 0, 0, 0)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.buf = self.shm.buf
+        self.name = self.shm.name
+
+    def _head(self):
+        return struct.unpack_from("<Q", self.buf, 0)[0]
+
+    def _tail(self):
+        return struct.unpack_from("<Q", self.buf, 8)[0]
+
+    def __len__(self):
+        return self._head() - self._tail()
+
+    def push(self, *values):
+        """满了返回 False（生产者自己决定丢还是等）"""
+        head = self._head()
+        if head - self._tail() >= self.slots:
+            return False
+        off = HEADER_SIZE + (head % self.slots) * self.slot.size
+        self.slot.pack_into(self.buf, off, *values)
+        struct.pack_into("<Q", self.buf, 0, head + 1)   # 数据写完再发布
+        return True
+
+    def push_overwrite(self, *values):
+        """没有消费者的环（只有 peek 的旁观者）：满了就把最老的一条挤掉"""
+        head = self._head()
+        if head - self._tail() >= self.slots:
+            struct.pack_into("<Q", self.buf, 8, head - self.slots + 1)
+        off = HEADER_SIZE + (head % self.slots) * self.slot.size
+        self.slot.pack_into(self.buf, off, *values)
+        struct.pack_into("<Q", self.buf, 0, head + 1)
+
+    def pop(self):
+        tail = self._tail()
+        if tail == self._head():
+            return None
+        off = HEADER_SIZE + (tail % self.slots) * self.slot.size
+        values = self.slot.unpack_from(self.buf, off)
+        struct.pack_into("<Q", self.buf, 8, tail + 1)
+        return values
+
+    def peek_latest(self, n):
+        """
+        不动 tail，直接看最新的 n 条（给 liveplot 之类的旁观者用）。
+        返回 [(序号, values), ...]，可能有被覆盖的风险，调用方按序号检查。
+        """
+        head = self._head()
+        start = max(0, head - min(n, self.slots))
+        out = []
+        for k in range(start, head):
+            off = HEADER_SIZE + (k % self.slots) * self.slot.size
+            out.append((k, self.slot.unpack_from(self.buf, off)))
+        return out
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ========== I/O 进程 ==========
+
+def open_port(port, sim):
+    if sim:
+        from simbus import SimSerial
+        return SimSerial()
+    import serial
+    return serial.Serial(port=port, baudrate=BAUD, timeout=0.02, write_timeout=0.02)
+
+
+def packet_checksum(data):
+    return (~sum(data[2:-1])) % 256
+
+
+def io_main(names, port, sim, tel_consumer=False):
+    """
+    独占串口：发命令、回应答、空闲时轮询位置、发遥测。
+    tel_consumer: 有日志进程在 pop 遥测环；没有的话遥测环满了就挤掉最老的，
+    liveplot 照样能看到最新的。
+    """
+    gc.disable()   # 这个循环里几乎不产生循环引用，关掉 GC 避免随机停顿
+    cmd_ring = ShmRing(CMD_FMT, CMD_SLOTS, names["cmd"])
+    rsp_ring = ShmRing(RSP_FMT, RSP_SLOTS, names["rsp"])
+    tel_ring = ShmRing(TEL_FMT, TEL_SLOTS, names["tel"])
+    ctrl = shared_memory.SharedMemory(name=names["ctrl"])
+    ser = open_port(port, sim)
+
+    commanded = [math.nan] * 9
+    measured = [math.nan] * 9
+    dirty = False
+    poll_k = 0
+    t0 = time.monotonic()
+    poll_pkt = {sid: bytes(make_packet(sid, 28)) for sid in POLL_IDS}
+    push_tel = tel_ring.push if tel_consumer else tel_ring.push_overwrite
+    ctrl.buf[CTRL_READY] = 1
+
+    def transact(packet, expect):
+        ser.write(packet)
+        if not expect:
+            return b""
+        return ser.read(expect + 6)
+
+    try:
+        while True:
+            item = cmd_ring.pop()
+            if item is not None:
+                seq, length, expect, data = item
+                packet = data[:length]
+                reply = transact(packet, expect)
+                if expect:
+                    ok = len(reply) == expect + 6
+                    rsp_ring.push(seq, len(reply) if ok else 0, reply)
+                    if ok and packet[4] == 28:
+                        store_mirror(ctrl.buf, packet[2], reply, time.monotonic())
+                elif packet[4] == 1 and packet[2] <= 8:
+                    raw = packet[5] + packet[6] * 256
+                    commanded[packet[2]] = raw * 6 / 25
+                    dirty = True
+                continue
+
+            # 命令环空了：一帧结束，发遥测
+            if dirty:
+                push_tel(time.monotonic() - t0, *commanded[1:], *measured[1:])
+                dirty = False
+
+            if ctrl.buf[CTRL_STOP]:
+                break
+
+            if POLL_POSITIONS and POLL_IDS:
+                sid = POLL_IDS[poll_k % len(POLL_IDS)]
+                poll_k += 1
+                reply = transact(poll_pkt[sid], 2)
+                if len(reply) == 8 and packet_checksum(reply) == reply[-1]:
+                    store_mirror(ctrl.buf, sid, reply, time.monotonic())
+                    raw = reply[5] + reply[6] * 256
+                    if raw > 32767:
+                        raw -= 65536
+                    measured[sid] = raw * 6 / 25
+                else:
+                    ser.reset_input_buffer()
+            else:
+                time.sleep(IDLE_SLEEP)
+    finally:
+        ser.close()
+        cmd_ring.close()
+        rsp_ring.close()
+        tel_ring.close()
+        ctrl.close()
+
+
+def store_mirror(buf, sid, reply, t):
+    raw = reply[5] + reply[6] * 256
+    struct.pack_into(MIRROR_FMT, buf, MIRROR_OFFSET + sid * MIRROR_STRIDE, t, raw)
+
+
+def make_packet(sid, cmd, params=()):
+    body = [sid, 3 + len(params), cmd, *params]
+    return [0x55, 0x55, *body, (~sum(body)) % 256]
+
+
+# ========== 日志进程 ==========
+
+def logger_main(names, csv_name, meta=None):
+    """遥测环 -> CSV；文件名是 .lxa 就写压缩归档（meta 存进文件头）"""
+    from logarch import ArchiveWriter, ARCHIVE_EXT
+    tel_ring = ShmRing(TEL_FMT, TEL_SLOTS, names["tel"])
+    ctrl = shared_memory.SharedMemory(name=names["ctrl"])
+    if csv_name.endswith(ARCHIVE_EXT):
+        out = ArchiveWriter(csv_name, meta)
+        write = lambda rec: out.append(rec[0], rec[1:9])
+    else:
+        out = open(csv_name, "w", newline="")
+        writer = csv.writer(out)
+        writer.writerow(["t", "id1", "id2", "id3", "id4", "id5", "id6", "id7", "id8"])
+        write = lambda rec: writer.writerow([rec[0], *rec[1:9]])
+    with out:
+        while True:
+            rec = tel_ring.pop()
+            if rec is None:
+                if ctrl.buf[CTRL_STOP] == 2:   # I/O 进程已经退出，环也空了
+                    break
+                time.sleep(0.01)
+                continue
+            write(rec)
+    tel_ring.close()
+    ctrl.close()
+
+
+# ========== 规划进程这边的假串口 ==========
+
+class RingSerial:
+    """
+    装到 LX16A._controller 上：写包 = 放进命令环，读 = 等应答环。
+    位置读（get_physical_angle）如果镜像够新，直接用镜像合成应答，不上总线。
+    """
+
+    def __init__(self, names):
+        self.cmd_ring = ShmRing(CMD_FMT, CMD_SLOTS, names["cmd"])
+        self.rsp_ring = ShmRing(RSP_FMT, RSP_SLOTS, names["rsp"])
+        self.ctrl = shared_memory.SharedMemory(name=names["ctrl"])
+        self.timeout = 0.02
+        self.write_timeout = 0.02
+        self.seq = 0
+        self.pending = None
+        self.reply = b""
+
+    def write(self, data):
+        data = bytes(data)
+        cmd = data[4]
+        expect = REPLY_BYTES.get(cmd, 0)
+
+        if cmd == 28:
+            t, raw = struct.unpack_from(MIRROR_FMT, self.ctrl.buf,
+                                        MIRROR_OFFSET + data[2] * MIRROR_STRIDE)
+            if t > 0 and time.monotonic() - t < MIRROR_MAX_AGE:
+                self.reply = bytes(make_packet(data[2], 28, [raw % 256, raw // 256]))
+                self.pending = None
+                return len(data)
+
+        self.seq += 1
+        while not self.cmd_ring.push(self.seq, len(data), expect, data):
+            time.sleep(IDLE_SLEEP)   # 命令环满了说明 I/O 跟不上，只能等
+        self.pending = self.seq if expect else None
+        self.reply = b""
+        return len(data)
+
+    def read(self, size=1):
+        if self.pending is not None:
+            deadline = time.monotonic() + self.timeout + 0.05
+            while time.monotonic() < deadline:
+                item = self.rsp_ring.pop()
+                if item is None:
+                    time.sleep(IDLE_SLEEP)
+                    continue
+                seq, length, data = item
+                if seq == self.pending:   # 之前超时的迟到应答直接丢掉
+                    self.reply = data[:length]
+                    break
+            self.pending = None
+        out, self.reply = self.reply[:size], self.reply[size:]
+        return out
+
+    def reset_input_buffer(self):
+        self.reply = b""
+
+    def reset_output_buffer(self):
+        pass
+
+    def flushInput(self):
+        self.reply = b""
+
+    def close(self):
+        pass
+
+
+# ========== 启动 ==========
+
+def start(port=PORT, sim=False, log_csv=None, meta=None):
+    """建好共享内存，起 I/O（和日志）进程，返回 (names, procs, rings)"""
+    ctx = mp.get_context("spawn")
+    cmd_ring = ShmRing(CMD_FMT, CMD_SLOTS)
+    rsp_ring = ShmRing(RSP_FMT, RSP_SLOTS)
+    tel_ring = ShmRing(TEL_FMT, TEL_SLOTS)
+    ctrl = shared_memory.SharedMemory(create=True, size=CTRL_SIZE)
+    ctrl.buf[:CTRL_SIZE] = bytes(CTRL_SIZE)
+    names = {"cmd": cmd_ring.name, "rsp": rsp_ring.name,
+             "tel": tel_ring.name, "ctrl": ctrl.name}
+
+    procs = [ctx.Process(target=io_main, args=(names, port, sim, bool(log_csv)), daemon=True)]
+    if log_csv:
+        procs.append(ctx.Process(target=logger_main, args=(names, log_csv, meta), daemon=True))
+    for p in procs:
+        p.start()
+
+    # 等 I/O 进程把串口打开
+    deadline = time.monotonic() + 10.0
+    while not ctrl.buf[CTRL_READY]:
+        if time.monotonic() > deadline or not procs[0].is_alive():
+            raise RuntimeError("shmbus: I/O process failed to start")
+        time.sleep(0.01)
+    with open(SHM_NAMES_FILE + ".tmp", "w") as f:
+        json.dump(dict(names, pid=os.getpid()), f)
+    os.replace(SHM_NAMES_FILE + ".tmp", SHM_NAMES_FILE)   # 别让 liveplot 读到半个文件
+    return names, procs, (cmd_ring, rsp_ring, tel_ring, ctrl)
+
+
+def stop(procs, owned):
+    cmd_ring, rsp_ring, tel_ring, ctrl = owned
+    ctrl.buf[CTRL_STOP] = 1
+    procs[0].join(timeout=2.0)
+    ctrl.buf[CTRL_STOP] = 2
+    for p in procs[1:]:
+        p.join(timeout=5.0)
+    cmd_ring.close()
+    rsp_ring.close()
+    tel_ring.close()
+    ctrl.close()
+    ctrl.unlink()
+    if os.path.exists(SHM_NAMES_FILE):
+        os.remove(SHM_NAMES_FILE)
+
+
+def install(names):
+    """之后 LX16A.initialize(任何端口) 都走共享内存环"""
+    proxy = RingSerial(names)
+
+    def initialize(port, timeout=0.02):
+        proxy.timeout = timeout
+        LX16A._controller = proxy
+
+    LX16A.initialize = staticmethod(initialize)
+    LX16A._controller = proxy
+    return proxy
+
+
+def main():
+    args = sys.argv[1:]
+    if not args:
+        print("usage: python shmbus.py SCRIPT.py [--sim] [--log FILE.csv] [--port PORT] [--live]")
+        return
+    script = args[0]
+    sim = "--sim" in args
+    log_csv = args[args.index("--log") + 1] if "--log" in args else None
+    port = args[args.index("--port") + 1] if "--port" in args else PORT
+
+    meta = None
+    if log_csv and log_csv.endswith(".lxa"):   # 归档把脚本的参数也存进去
+        from logarch import script_meta
+        meta = script_meta(script)
+    names, procs, owned = start(port, sim, log_csv, meta)
+    install(names)
+    if "--live" in args:
+        # 单独的进程，自己按 SHM_NAMES_FILE 找环；窗口关了也不影响这边
+        viewer = os.path.join(os.path.dirname(os.path.abspath(__file__)), "liveplot.py")
+        subprocess.Popen([sys.executable, viewer])
+    print(f"[shmbus] running {script} (I/O pid {procs[0].pid})")
+    try:
+        sys.argv = [script]
+        runpy.run_path(script, run_name="__main__")
+    finally:
+        stop(procs, owned)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+import sys
+import json
+import time
+import runpy
+
+from pylx16a.lx16a import *
+
+# 模拟的 LX-16A 总线：
+#   假装自己是 serial.Serial，按真实协议收发包，所以 LX16A 类完全不用改。
+#   每个舵机用 “死区时间 + 一阶惯性 + 最大转速” 的模型跟随指令，
+#   模型参数和 servochar.py 测出来存的 servo_model.json 是同一个格式。
+#
+# 用法：
+#   python simbus.py nodriftwalk.py      # 不接硬件跑任意脚本
+#   python simbus.py dance.py servo_model.json
+
+SERVO_IDS = list(range(1, 9))
+MODEL_FILE = "servo_model.json"
+
+# 没有实测模型时的默认值（大概是带载 LX-16A 的量级）
+DEFAULT_JOINT_MODEL = {
+    "dead_time": 0.020,   # s，指令发出到开始动
+    "tau": 0.040,         # s，一阶时间常数
+    "slew": 300.0,        # deg/s，最大转速
+}
+
+VIN_NOMINAL = 7400     # mV
+VIN_SAG = 2.0          # 每 deg/s 总转速压降 mV（很粗的近似）
+TEMP_AMBIENT = 30.0    # °C
+TEMP_RISE = 0.02       # 每 deg/s 转速的稳态温升
+TEMP_TAU = 60.0        # s，温度变化很慢
+
+SIM_SUBSTEP = 0.001    # 积分步长
+BYTE_TIME = 10 / 115200   # 115200 波特率下一个字节在线上的时间
+
+
+# ========== 模型文件 ==========
+
+def default_model(ids=SERVO_IDS):
+    return {sid: dict(DEFAULT_JOINT_MODEL) for sid in ids}
+
+
+def load_model(path=MODEL_FILE):
+    """读 servo_model.json，返回 {sid: {dead_time, tau, slew, ...}}"""
+    with open(path, "r") as f:
+        raw = json.load(f)
+    model = {}
+    for key, params in raw["joints"].items():
+        joint = dict(DEFAULT_JOINT_MODEL)
+        joint.update(params)
+        model[int(key)] = joint
+    return model
+
+
+def save_model(model, path=MODEL_FILE, meta=None):
+    data = {
+        "meta": meta or {},
+        "joints": {str(sid): params for sid, params in sorted(model.items())},
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+# ========== 单个舵机 ==========
+
+def to_bytes(n):
+    return n % 256, n // 256
+
+
+def new_servo_state(joint_model, angle=120.0):
+    return {
+        "model": joint_model,
+        "pos": angle,              # 物理角度（度）
+        "temp": TEMP_AMBIENT,
+        "t": None,                 # 上次积分到的时间
+        # 指令历史 [(生效时刻, 起点, 终点, 用时)]，用来实现死区时间和 move 的 time 参数
+        "cmds": [(0.0, angle, angle, 0.0)],
+        "commanded": angle,
+        "waiting": None,
+        "offset": 0,
+        "limits": (0, 1000),
+        "vin_limits": (4500, 12000),
+        "temp_limit": 85,
+        "motor_mode": False,
+        "motor_speed": 0,
+        "torque": True,
+        "led_on": True,
+        "led_triggers": 0,
+        "speed": 0.0,
+    }
+
+
+def target_at(state, t):
+    """t 时刻舵机“看到的”目标角（已经算上了死区时间）"""
+    t = t - state["model"]["dead_time"]
+    cmds = state["cmds"]
+    for k in range(len(cmds) - 1, -1, -1):
+        t0, a0, a1, dur = cmds[k]
+        if t0 <= t:
+            if dur <= 0 or t >= t0 + dur:
+                return a1
+            return a0 + (a1 - a0) * (t - t0) / dur
+    return cmds[0][2]
+
+
+def advance(state, now):
+    """把舵机状态积分到 now"""
+    if state["t"] is None:
+        state["t"] = now
+        return
+    m = state["model"]
+    while state["t"] < now:
+        h = min(SIM_SUBSTEP, now - state["t"])
+        state["t"] += h
+        if not state["torque"]:
+            state["speed"] = 0.0
+            continue
+        target = target_at(state, state["t"])
+        v = (target - state["pos"]) / max(m["tau"], 1e-6)
+        v = max(-m["slew"], min(m["slew"], v))
+        state["pos"] += v * h
+        state["speed"] = v
+        hot = TEMP_AMBIENT + TEMP_RISE * abs(v)
+        state["temp"] += (hot - state["temp"]) * h / TEMP_TAU
+
+    # 丢掉已经完全生效的旧指令，只留一条
+    cmds = state["cmds"]
+    cutoff = now - m["dead_time"]
+    while len(cmds) > 1 and cmds[1][0] + cmds[1][3] <= cutoff:
+        cmds.pop(0)
+
+
+# ========== 假串口 ==========
+
+class SimSerial:
+    """
+    和 serial.Serial 接口一样（write / read / reset_*），
+    LX16A._controller 换成它就能不接硬件跑。
+    """
+
+    def __init__(self, model=None, clock=time.monotonic, pose=None,
+                 sleep=time.sleep):
+        self.model = model or default_model()
+        self.clock = clock
+        self.sleep = sleep   # 用来模拟线上传输时间；None 表示不等
+        self.timeout = 0.02
+        self.write_timeout = 0.02
+        self.servos = {}
+        for sid, joint in self.model.items():
+            angle = pose[sid] if pose and sid in pose else 120.0
+            self.servos[sid] = new_servo_state(joint, angle)
+        self._rx = bytearray()
+        self._in = bytearray()
+        self.is_open = True
+
+    # ---- serial.Serial 接口 ----
+
+    def write(self, data):
+        if self.sleep:
+            self.sleep(len(data) * BYTE_TIME)
+        self._in.extend(data)
+        while True:
+            packet = self._take_packet()
+            if packet is None:
+                break
+            self._handle(packet)
+        return len(data)
+
+    def read(self, size=1):
+        out = bytes(self._rx[:size])
+        del self._rx[:size]
+        if self.sleep:
+            self.sleep(len(out) * BYTE_TIME)
+        return out
+
+    def readinto(self, buf):
+        n = min(len(buf), len(self._rx))
+        if self.sleep:
+            self.sleep(n * BYTE_TIME)
+        buf[:n] = self._rx[:n]
+        del self._rx[:n]
+        return n
+
+    @property
+    def in_waiting(self):
+        return len(self._rx)
+
+    def reset_input_buffer(self):
+        self._rx.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def flushInput(self):
+        self._rx.clear()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+    # ---- 给测试 / 日志用的 ----
+
+    def physical_pose(self):
+        now = self.clock()
+        pose = {}
+        for sid, st in self.servos.items():
+            advance(st, now)
+            pose[sid] = st["pos"]
+        return pose
+
+    # ---- 协议 ----
+
+    def _take_packet(self):
+        buf = self._in
+        while len(buf) >= 2 and not (buf[0] == 0x55 and buf[1] == 0x55):
+            del buf[0]
+        if len(buf) < 4:
+            return None
+        length = buf[3]
+        total = length + 3
+        if len(buf) < total:
+            return None
+        packet = bytes(buf[:total])
+        del buf[:total]
+        if (~sum(packet[2:-1])) % 256 != packet[-1]:
+            return None   # 校验错的包真舵机也不理
+        return packet
+
+    def _reply(self, sid, cmd, params):
+        body = [sid, len(params) + 3, cmd, *params]
+        chk = (~sum(body)) % 256
+        self._rx.extend(bytes([0x55, 0x55, *body, chk]))
+
+    def _handle(self, packet):
+        sid, cmd = packet[2], packet[4]
+        params = packet[5:-1]
+        targets = self.servos.values() if sid == 254 else (
+            [self.servos[sid]] if sid in self.servos else [])
+        now = self.clock()
+        for st in targets:
+            advance(st, now)
+            self._apply(st, sid, cmd, params, now)
+
+    def _apply(self, st, sid, cmd, params, now):
+        word = lambda i: params[i] + params[i + 1] * 256
+
+        # ---- 写指令 ----
+        if cmd == 1:     # MOVE_TIME_WRITE
+            angle = word(0) * 6 / 25
+            dur = word(2) / 1000.0
+            st["cmds"].append((now, target_at(st, now + st["model"]["dead_time"]), angle, dur))
+            st["commanded"] = angle
+        elif cmd == 7:   # MOVE_TIME_WAIT_WRITE
+            st["waiting"] = (word(0) * 6 / 25, word(2) / 1000.0)
+        elif cmd == 11 and st["waiting"]:   # MOVE_START
+            angle, dur = st["waiting"]
+            st["cmds"].append((now, target_at(st, now + st["model"]["dead_time"]), angle, dur))
+            st["commanded"] = angle
+            st["waiting"] = None
+        elif cmd == 12:  # MOVE_STOP
+            st["cmds"].append((now, st["pos"], st["pos"], 0.0))
+        elif cmd == 13:  # ID_WRITE
+            new_id = params[0]
+            self.servos[new_id] = self.servos.pop(sid)
+        elif cmd == 17:
+            st["offset"] = params[0]
+        elif cmd == 20:
+            st["limits"] = (word(0), word(2))
+        elif cmd == 22:
+            st["vin_limits"] = (word(0), word(2))
+        elif cmd == 24:
+            st["temp_limit"] = params[0]
+        elif cmd == 29:
+            st["motor_mode"] = params[0] == 1
+            st["motor_speed"] = word(2)
+        elif cmd == 31:
+            st["torque"] = params[0] == 1
+        elif cmd == 33:
+            st["led_on"] = params[0] == 0
+        elif cmd == 35:
+            st["led_triggers"] = params[0]
+
+        # ---- 读指令 ----
+        elif cmd in (2, 8):
+            self._reply(sid, cmd, [*to_bytes(round(st["commanded"] * 25 / 6)), 0, 0])
+        elif cmd == 14:
+            self._reply(sid, cmd, [sid])
+        elif cmd == 19:
+            self._reply(sid, cmd, [st["offset"]])
+        elif cmd == 21:
+            self._reply(sid, cmd, [*to_bytes(st["limits"][0]), *to_bytes(st["limits"][1])])
+        elif cmd == 23:
+            self._reply(sid, cmd, [*to_bytes(st["vin_limits"][0]), *to_bytes(st["vin_limits"][1])])
+        elif cmd == 25:
+            self._reply(sid, cmd, [st["temp_limit"]])
+        elif cmd == 26:
+            self._reply(sid, cmd, [int(round(st["temp"]))])
+        elif cmd == 27:
+            load = sum(abs(s["speed"]) for s in self.servos.values())
+            self._reply(sid, cmd, [*to_bytes(int(VIN_NOMINAL - VIN_SAG * load))])
+        elif cmd == 28:
+            raw = round(st["pos"] * 25 / 6)
+            if raw < 0:
+                raw += 65536
+            self._reply(sid, cmd, [*to_bytes(raw)])
+        elif cmd == 30:
+            self._reply(sid, cmd, [1 if st["motor_mode"] else 0, 0, *to_bytes(st["motor_speed"])])
+        elif cmd == 32:
+            self._reply(sid, cmd, [1 if st["torque"] else 0])
+        elif cmd == 34:
+            self._reply(sid, cmd, [0 if st["led_on"] else 1])
+        elif cmd == 36:
+            self._reply(sid, cmd, [st["led_triggers"]])
+
+
+# ========== 接到 LX16A 上 ==========
+
+def install(model=None, clock=time.monotonic, pose=None, sleep=time.sleep):
+    """
+    让之后的 LX16A.initialize(任何端口) 都连到同一条模拟总线上。
+    返回 SimSerial，方便读真实（模拟）角度。
+    """
+    sim = SimSerial(model, clock, pose, sleep)
+
+    def initialize(port, timeout=0.02):
+        sim.timeout = timeout
+        LX16A._controller = sim
+
+    LX16A.initialize = staticmethod(initialize)
+    LX16A._controller = sim
+    return sim
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python simbus.py SCRIPT.py [servo_model.json]")
+        return
+    script = sys.argv[1]
+    model = load_model(sys.argv[2]) if len(sys.argv) > 2 else None
+    install(model)
+    print(f"[simbus] running {script} on simulated bus")
+    sys.argv = [script]
+    runpy.run_path(script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
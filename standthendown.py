@@ -1,6 +1,8 @@
 from pylx16a.lx16a import *
 import time
 
+import evlog
+
 PORT = "/dev/ttyUSB0"   # 按你的实际串口改
 
 # 俯视布局：
@@ -50,19 +52,17 @@ def init_servos():
         s = LX16A(sid)
         s.set_angle_limits(ANGLE_MIN, ANGLE_MAX)
         servos[sid] = s
-        print(f"Servo {sid} init OK")
+        evlog.info("servo_init", "Servo {sid} init OK", sid=sid)
     time.sleep(0.5)
     return servos
 
 
-def read_current_pose(servos):
+def read_current_pose(servos, title="Current pose:"):
     """读取当前角度，返回 {id: angle}"""
     pose = {}
-    print("Current pose:")
     for sid, s in servos.items():
-        a = s.get_physical_angle()
-        pose[sid] = a
-        print(f"  ID{sid}: {a:.1f}°")
+        pose[sid] = s.get_physical_angle()
+    evlog.info("pose", evlog.fmt_pose, pose=dict(pose), title=title)
     return pose
 
 
@@ -97,25 +97,23 @@ def stand_up_with_preload(servos):
     #time.sleep(0.5)      # 给一点时间让电机到位、先用上力
 
     # 3. 再读一遍当前姿态，作为“站立插值”的起点
-    print("\nPose after preload:")
-    start_pose = read_current_pose(servos)
+    start_pose = read_current_pose(servos, "\nPose after preload:\nCurrent pose:")
 
     # 4. 从预加载后的姿态，平滑站到 STAND_POSE
-    print("\nStanding up with preload...")
+    evlog.info("stage", "\nStanding up with preload...")
     go_to_pose_smooth(servos, start_pose, STAND_POSE,
                       duration=1.2, steps=50)
-    print("Stand up done.")
+    evlog.info("stage", "Stand up done.")
 
 
 def go_down_from_stand(servos):
     """从站立姿态平滑趴下（蹲低）"""
-    print("\nReading pose before going down...")
-    start_pose = read_current_pose(servos)
+    start_pose = read_current_pose(servos, "\nReading pose before going down...\nCurrent pose:")
 
-    print("\nGoing down (to crouch/lie pose)...")
+    evlog.info("stage", "\nGoing down (to crouch/lie pose)...")
     go_to_pose_smooth(servos, start_pose, DOWN_POSE,
                       duration=1.2, steps=50)
-    print("Down pose done.")
+    evlog.info("stage", "Down pose done.")
 
 
 def main():
@@ -125,7 +123,7 @@ def main():
     stand_up_with_preload(servos)
 
     # 站住一会儿
-    print("\nHold stand pose...")
+    evlog.info("stage", "\nHold stand pose...")
     time.sleep(1.5)
 
     # 再趴下 / 蹲低
@@ -0,0 +1,245 @@
+import sys
+import json
+import math
+import time
+import socket
+import threading
+
+import metrics
+import watchdog
+from trotsinwalk import (init_servos, read_current_pose, smooth_move, clamp_angle,
+                         STAND_POSE, HIP_AMP, KNEE_LIFT, HIP_GAIN, KNEE_GAIN,
+                         GROUP_A, STEPS_PER_CYCLE, STEP_TIME)
+
+# 速度指令流式步态：
+#   原来的步态都是固定 CYCLES / NUM_CYCLES、固定步幅，跑完就停，中途没法转向、变速。
+#   这里用 trotsinwalk 的正弦小跑，从本机 UDP 端口收指令：
+#       v      前进速度   -1 ~ 1（负的就是倒着走）
+#       w      转向       -1 ~ 1（正的往左转：右边步子大、左边步子小）
+#       stride 步幅倍数    0 ~ 1.5
+#   每个控制周期开头把收到的指令取最新的一条，只改“接下来”的每侧髋摆幅和抬腿高度，
+#   相位一直连续往前走，摆幅按 AMP_SLEW 慢慢追过去，不会跳。
+#   每条指令带发送时间，记下“发出 -> 第一帧用上它写到总线上”的延迟，目标 < 2 个控制周期。
+#   超过 CMD_TIMEOUT 没收到指令就当成停下（原地站好）。
+#
+# 用法：
+#   python streamwalk.py [--sim]           # 开始走（等指令）
+#   python streamwalk.py --send 0.8 0 1    # 另一个终端：v w stride
+#   python streamwalk.py --send-stop       # 结束
+#   python streamwalk.py --sim --demo      # 自己发一串指令试试
+
+STREAM_HOST = "127.0.0.1"
+STREAM_PORT = 9870
+
+CMD_TIMEOUT = 1.0      # 秒，没有新指令就慢慢停下
+AMP_SLEW = 0.1         # 每帧摆幅最多变化多少（满幅 = 1）
+STRIDE_MAX = 1.5
+
+LEG_SIDE = {"RF": "R", "RR": "R", "LR": "L", "LF": "L"}
+HIP_ID = {"RF": 1, "RR": 3, "LR": 5, "LF": 7}
+KNEE_ID = {"RF": 2, "RR": 4, "LR": 6, "LF": 8}
+
+
+def clip(x, lo, hi):
+    return max(lo, min(hi, x))
+
+
+# ========== 收指令 ==========
+
+def make_stream(port=STREAM_PORT):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((STREAM_HOST, port))
+    sock.setblocking(False)
+    return {
+        "sock": sock,
+        "cmd": {"v": 0.0, "w": 0.0, "stride": 1.0},
+        "last_rx": time.monotonic(),
+        "pending": [],      # 收到了、还没写到总线上的指令的发送时间
+        "latency": [],      # 秒
+        "received": 0,
+        "overruns": 0,
+        "stop": False,
+    }
+
+
+def poll_commands(st):
+    """把 socket 里攒着的指令一次读完，最新的生效"""
+    while True:
+        try:
+            data, _ = st["sock"].recvfrom(512)
+        except BlockingIOError:
+            return
+        try:
+            msg = json.loads(data)
+        except ValueError:
+            continue
+        st["received"] += 1
+        st["last_rx"] = time.monotonic()
+        if msg.get("stop"):
+            st["stop"] = True
+            continue
+        cmd = st["cmd"]
+        if "v" in msg:
+            cmd["v"] = clip(float(msg["v"]), -1.0, 1.0)
+        if "w" in msg:
+            cmd["w"] = clip(float(msg["w"]), -1.0, 1.0)
+        if "stride" in msg:
+            cmd["stride"] = clip(float(msg["stride"]), 0.0, STRIDE_MAX)
+        if "t" in msg:
+            st["pending"].append(float(msg["t"]))
+
+
+def send_command(v=None, w=None, stride=None, stop=False, port=STREAM_PORT):
+    msg = {"t": time.monotonic()}
+    if stop:
+        msg["stop"] = True
+    for key, val in (("v", v), ("w", w), ("stride", stride)):
+        if val is not None:
+            msg[key] = val
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.sendto(json.dumps(msg).encode(), (STREAM_HOST, port))
+    sock.close()
+
+
+# ========== 步态 ==========
+
+def target_amps(cmd):
+    """指令 -> 每侧髋摆幅（带符号，满幅 = 1）+ 抬腿倍数"""
+    v, w, s = cmd["v"], cmd["w"], cmd["stride"]
+    moving = abs(v) > 1e-3 or abs(w) > 1e-3
+    return {
+        "L": clip(s * (v - w), -STRIDE_MAX, STRIDE_MAX),
+        "R": clip(s * (v + w), -STRIDE_MAX, STRIDE_MAX),
+        "lift": min(s, 1.0) if moving else 0.0,
+    }
+
+
+def slew_amps(cur, target):
+    return {k: cur[k] + clip(target[k] - cur[k], -AMP_SLEW, AMP_SLEW) for k in cur}
+
+
+def stream_pose(phi, amps):
+    """和 trot_pose_at 一样的正弦小跑，只是相位从外面给，每侧摆幅单独给"""
+    pose = {}
+    for leg in ["LF", "RR", "RF", "LR"]:
+        phase = phi if leg in GROUP_A else phi + math.pi
+        swing = math.sin(phase)
+        hip, knee = HIP_ID[leg], KNEE_ID[leg]
+        pose[hip] = STAND_POSE[hip] + HIP_AMP * HIP_GAIN[leg] * amps[LEG_SIDE[leg]] * swing
+        lift = KNEE_LIFT * KNEE_GAIN[leg] * amps["lift"] * max(0.0, swing)
+        pose[knee] = STAND_POSE[knee] + lift
+    return pose
+
+
+def stream_walk(servos, st):
+    """一直走到收到 stop；每帧：收指令 -> 更新摆幅 -> 算姿态 -> 发出去"""
+    dphi = 2.0 * math.pi / STEPS_PER_CYCLE
+    phi = 0.0
+    amps = {"L": 0.0, "R": 0.0, "lift": 0.0}
+    next_t = time.monotonic()
+    metrics.loop_reset()
+
+    watchdog.arm(servos, STEP_TIME, safe_pose=STAND_POSE)
+    try:
+        while not st["stop"] and not watchdog.tripped():
+            poll_commands(st)
+            if time.monotonic() - st["last_rx"] > CMD_TIMEOUT:
+                st["cmd"].update(v=0.0, w=0.0)
+            amps = slew_amps(amps, target_amps(st["cmd"]))
+
+            pose = stream_pose(phi, amps)
+            for sid in (7, 8, 3, 4, 1, 2, 5, 6):   # LF, RR, RF, LR
+                servos[sid].move(clamp_angle(servos, sid, pose[sid]))
+
+            sent = time.monotonic()
+            for t_cmd in st["pending"]:
+                st["latency"].append(sent - t_cmd)
+            st["pending"].clear()
+
+            phi = (phi + dphi) % (2.0 * math.pi)
+            next_t += STEP_TIME
+            wait = next_t - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                st["overruns"] += 1
+                next_t = time.monotonic()
+            metrics.loop_tick(STEP_TIME)
+            watchdog.beat()
+    finally:
+        watchdog.disarm()
+
+
+def latency_summary(st):
+    lat = sorted(st["latency"])
+    if not lat:
+        return "  no timed commands"
+    budget = 2 * STEP_TIME
+    over = sum(1 for x in lat if x > budget)
+    p95 = lat[int(0.95 * (len(lat) - 1))]
+    return (f"  {len(lat)} commands, latency mean {sum(lat) / len(lat) * 1000:.1f} ms, "
+            f"p95 {p95 * 1000:.1f} ms, max {lat[-1] * 1000:.1f} ms "
+            f"(budget {budget * 1000:.0f} ms, {over} over), overruns {st['overruns']}")
+
+
+# ========== 试一试 ==========
+
+DEMO = [
+    (0.5, {"v": 0.5, "w": 0.0, "stride": 1.0}),
+    (1.5, {"v": 1.0}),
+    (1.5, {"w": 0.5}),
+    (1.5, {"w": -0.5}),
+    (1.0, {"v": -0.5, "w": 0.0}),
+    (1.0, {"v": 0.0}),
+]
+
+
+def demo_sender(port=STREAM_PORT):
+    for delay, cmd in DEMO:
+        time.sleep(delay)
+        print(f"[demo] {cmd}")
+        send_command(port=port, **cmd)
+    time.sleep(1.0)
+    send_command(stop=True, port=port)
+
+
+def main():
+    args = sys.argv[1:]
+    if "--send" in args:
+        i = args.index("--send")
+        v, w, stride = (float(x) for x in args[i + 1:i + 4])
+        send_command(v, w, stride)
+        return
+    if "--send-stop" in args:
+        send_command(stop=True)
+        return
+
+    if "--sim" in args:
+        from simbus import install
+        install()
+
+    servos = init_servos()
+    print("\nMove to STAND_POSE ...")
+    cur = read_current_pose(servos)
+    smooth_move(servos, cur, STAND_POSE, duration=1.0, steps=40)
+
+    st = make_stream()
+    if "--demo" in args:
+        threading.Thread(target=demo_sender, daemon=True).start()
+    print(f"\nStreaming on udp://{STREAM_HOST}:{STREAM_PORT} (send {{\"stop\": true}} to end) ...")
+    try:
+        stream_walk(servos, st)
+    except KeyboardInterrupt:
+        pass
+    st["sock"].close()
+    print("Command latency:")
+    print(latency_summary(st))
+
+    print("\nBack to STAND_POSE ...")
+    now_pose = read_current_pose(servos)
+    smooth_move(servos, now_pose, STAND_POSE, duration=1.0, steps=40)
+    print("\nDone.")
+
+
+if __name__ == "__main__":
+    main()
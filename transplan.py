@@ -0,0 +1,227 @@
+import time
+import math
+
+from standthendown import (init_servos, read_current_pose,
+                           STAND_POSE, DOWN_POSE)
+
+# 站起 / 趴下的最短时间轨迹：
+#   - 每个关节一条 S 曲线（限速度、加速度、加加速度 jerk），不会砸关节
+#   - 所有关节同时到位：走得快的关节自动降速，跟最慢的一起结束
+#   - 支持分阶段（比如先预加载 7/8 再整体站起）和关节延迟起步
+
+CONTROL_DT = 0.02   # 下发间隔（秒）
+
+# ----------------- 每个关节的运动限制 -----------------
+# V: 最大速度 deg/s   A: 最大加速度 deg/s^2   J: 最大 jerk deg/s^3
+# LX-16A 空载大约 0.16s/60°，带载打个折；膝盖扛重量，再保守一点
+JOINT_LIMITS = {
+    1: (220.0, 1500.0, 15000.0),  # RF hip
+    2: (180.0, 1200.0, 12000.0),  # RF knee
+    3: (220.0, 1500.0, 15000.0),  # RR hip
+    4: (180.0, 1200.0, 12000.0),  # RR knee
+    5: (220.0, 1500.0, 15000.0),  # LR hip
+    6: (180.0, 1200.0, 12000.0),  # LR knee
+    7: (220.0, 1500.0, 15000.0),  # LF hip
+    8: (180.0, 1200.0, 12000.0),  # LF knee
+}
+
+# 左前腿先预加载（原来 test2.py 里的 105 / 70）
+PRELOAD_POSE = {7: 105, 8: 70}
+PRELOAD_HOLD = 0.1   # 预加载后停一下让它吃上力（原来是 0.5 s）
+
+
+# ========== S 曲线 ==========
+
+def accel_phase(v, a, j):
+    """从 0 加速到 v：返回 (jerk 段时间, 总加速时间)"""
+    if v * j >= a * a:
+        tj = a / j
+        return tj, v / a + tj
+    tj = math.sqrt(v / j)   # 到不了最大加速度
+    return tj, 2 * tj
+
+
+def scurve_segments(dist, v, a, j):
+    """
+    距离 dist (>=0) 从静止到静止的 7 段 S 曲线。
+    返回 [(持续时间, jerk), ...]，v 到不了就自动降低峰值速度。
+    """
+    if dist <= 1e-9:
+        return []
+
+    tj, ta = accel_phase(v, a, j)
+    if v * ta > dist:
+        # 距离太短到不了 v：二分找能刚好用完距离的峰值速度
+        lo, hi = 0.0, v
+        for _ in range(50):
+            mid = (lo + hi) / 2
+            tj, ta = accel_phase(mid, a, j)
+            if mid * ta > dist:
+                hi = mid
+            else:
+                lo = mid
+        v = lo
+        tj, ta = accel_phase(v, a, j)
+
+    tv = max(0.0, (dist - v * ta) / v) if v > 0 else 0.0
+    flat = ta - 2 * tj
+    return [
+        (tj, +j), (flat, 0.0), (tj, -j),
+        (tv, 0.0),
+        (tj, -j), (flat, 0.0), (tj, +j),
+    ]
+
+
+def segments_time(segments):
+    return sum(t for t, _ in segments)
+
+
+def sample_segments(segments, dt, total):
+    """按 dt 采样位移（从 0 开始），一直采到 total（后面保持终点）"""
+    out = []
+    n = int(math.ceil(total / dt - 1e-9))
+    for k in range(n + 1):
+        t = min(k * dt, total)
+        p = v = acc = 0.0
+        for seg_t, jerk in segments:
+            if t <= 0:
+                break
+            h = min(t, seg_t)
+            p += v * h + acc * h * h / 2 + jerk * h ** 3 / 6
+            v += acc * h + jerk * h * h / 2
+            acc += jerk * h
+            t -= h
+        out.append(p)
+    return out
+
+
+def min_time(dist, limits):
+    v, a, j = limits
+    return segments_time(scurve_segments(abs(dist), v, a, j))
+
+
+def segments_for_time(dist, limits, total):
+    """在不超过限制的前提下，把速度降下来，让这段运动刚好用 total 秒"""
+    v, a, j = limits
+    dist = abs(dist)
+    if segments_time(scurve_segments(dist, v, a, j)) >= total:
+        return scurve_segments(dist, v, a, j)
+
+    lo, hi = 1e-3, v
+    for _ in range(50):
+        mid = (lo + hi) / 2
+        if segments_time(scurve_segments(dist, mid, a, j)) > total:
+            lo = mid
+        else:
+            hi = mid
+    return scurve_segments(dist, hi, a, j)
+
+
+# ========== 规划 ==========
+
+def plan_transition(start_pose, target_pose, limits=JOINT_LIMITS,
+                    dt=CONTROL_DT, delay=None):
+    """
+    从 start_pose 到 target_pose 的同步最短时间轨迹。
+    target_pose 里没有的关节保持不动。
+    delay: {sid: 秒}，让某些关节晚一点起步（顺序约束）。
+    返回 frames: [pose, ...]，相邻两帧间隔 dt。
+    """
+    delay = delay or {}
+    targets = {sid: target_pose.get(sid, start_pose[sid]) for sid in start_pose}
+
+    # 1. 整体结束时间 = 最慢关节（含延迟）的最短时间
+    total = 0.0
+    for sid in start_pose:
+        t = delay.get(sid, 0.0) + min_time(targets[sid] - start_pose[sid], limits[sid])
+        total = max(total, t)
+
+    # 2. 每个关节按剩下的时间重新规划，保证同时到位
+    tracks = {}
+    for sid in start_pose:
+        d = targets[sid] - start_pose[sid]
+        t0 = delay.get(sid, 0.0)
+        segs = segments_for_time(d, limits[sid], total - t0)
+        sign = 1.0 if d >= 0 else -1.0
+        lead = int(round(t0 / dt))
+        moved = sample_segments(segs, dt, total - t0)
+        tracks[sid] = [start_pose[sid]] * lead + [start_pose[sid] + sign * p for p in moved]
+
+    n = max(len(tr) for tr in tracks.values())
+    frames = []
+    for k in range(n):
+        frames.append({sid: tr[min(k, len(tr) - 1)] for sid, tr in tracks.items()})
+    frames[-1] = targets   # 消掉浮点误差，最后一帧正好落在目标上
+    return frames
+
+
+def plan_stages(start_pose, stages, limits=JOINT_LIMITS, dt=CONTROL_DT):
+    """
+    分阶段规划：stages = [(目标(可以只含部分关节), 结束后停多久), ...]
+    前一阶段全部到位后才开始下一阶段。
+    """
+    frames = []
+    pose = dict(start_pose)
+    for target, hold in stages:
+        part = plan_transition(pose, target, limits, dt)
+        frames.extend(part)
+        pose = dict(part[-1])
+        frames.extend([dict(pose)] * int(round(hold / dt)))
+    return frames
+
+
+# ========== 下发 ==========
+
+def play_frames(servos, frames, dt=CONTROL_DT):
+    """按固定节拍下发，带限位夹紧"""
+    next_t = time.time()
+    for pose in frames:
+        for sid, a in pose.items():
+            min_ang, max_ang = servos[sid].get_angle_limits()
+            if a < min_ang:
+                a = min_ang
+            if a > max_ang:
+                a = max_ang
+            servos[sid].move(a)
+
+        next_t += dt
+        delay = next_t - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_t = time.time()
+
+
+def stand_up_fast(servos):
+    """预加载左前腿 -> 同步站到 STAND_POSE"""
+    start = read_current_pose(servos)
+    frames = plan_stages(start, [
+        (PRELOAD_POSE, PRELOAD_HOLD),
+        (STAND_POSE, 0.0),
+    ])
+    print(f"\nStanding up in {len(frames) * CONTROL_DT:.2f} s ...")
+    play_frames(servos, frames)
+    print("Stand up done.")
+
+
+def go_down_fast(servos):
+    start = read_current_pose(servos)
+    frames = plan_transition(start, DOWN_POSE)
+    print(f"\nGoing down in {len(frames) * CONTROL_DT:.2f} s ...")
+    play_frames(servos, frames)
+    print("Down pose done.")
+
+
+def main():
+    servos = init_servos()
+
+    stand_up_fast(servos)
+
+    print("\nHold stand pose...")
+    time.sleep(1.5)
+
+    go_down_fast(servos)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,16 @@ from pylx16a.lx16a import *
 import time
 import math
 
+import evlog
+from latcomp import (make_compensator, comp_command, comp_record,
+                     comp_readback, comp_summary)
+from feedback import (make_corrections, corr_apply, corr_readback,
+                      corr_update, corr_summary, save_corrections)
+from busarb import BusArbiter, PRIO_FRAME, PRIO_FEEDBACK, send_frame
+from health import make_health, health_submit, health_summary, SLOW_FACTOR
+import metrics
+import watchdog
+
 PORT = "/dev/ttyUSB0"
 
 ANGLE_MIN = 40
@@ -27,6 +37,20 @@ CYCLES          = 24      # 走多少个完整周期
 STEPS_PER_CYCLE = 25     # 每周期多少帧
 STEP_TIME       = 0.03   # 每帧间隔时间
 
+# 延迟补偿：None 不补；"model" 用 servo_model.json；"online" 模型 + 在线读回修正
+LATENCY_COMP = None
+
+# 闭环修正：读回实际角度，在线学每个关节的 offset / gain（见 feedback.py）
+CLOSED_LOOP = False
+CORR_WINDOW_CYCLES = 2    # 每几个周期更新一次修正量
+
+# 总线仲裁：帧先发，读回放到后面，按绝对时间打拍子（见 busarb.py）
+USE_ARBITER = False
+
+# 健康监测：走路时轮流读温度 / 电压（只用空闲总线时间），过热或掉压就放慢 / 停下（见 health.py）
+# 打开它会自动用上总线仲裁
+HEALTH_MONITOR = False
+
 # 对角腿分组
 GROUP_A = ["LF", "RR"]   # 左前 + 右后
 GROUP_B = ["RF", "LR"]   # 右前 + 左后
@@ -56,18 +80,16 @@ def init_servos():
         s = LX16A(sid)
         s.set_angle_limits(ANGLE_MIN, ANGLE_MAX)
         servos[sid] = s
-        print(f"Servo {sid} init OK")
+        evlog.info("servo_init", "Servo {sid} init OK", sid=sid)
     time.sleep(0.5)
     return servos
 
 
 def read_current_pose(servos):
     pose = {}
-    print("Current pose:")
     for sid, s in servos.items():
-        a = s.get_physical_angle()
-        pose[sid] = a
-        print(f"  ID{sid}: {a:.1f}°")
+        pose[sid] = s.get_physical_angle()
+    evlog.info("pose", evlog.fmt_pose, pose=dict(pose))
     return pose
 
 
@@ -99,7 +121,8 @@ def clamp_angle(servos, sid, angle):
     return angle
 
 
-def trot_sine_walk(servos):
+def trot_pose_at(step):
+    """第 step 帧（可以是小数）的期望姿态，还没夹紧"""
     # 基准角
     hip0 = {
         "RF": STAND_POSE[1],
@@ -117,53 +140,135 @@ def trot_sine_walk(servos):
     hip_id  = {"RF": 1, "RR": 3, "LR": 5, "LF": 7}
     knee_id = {"RF": 2, "RR": 4, "LR": 6, "LF": 8}
 
-    total_steps = CYCLES * STEPS_PER_CYCLE
-
-    for step in range(total_steps):
-        phi = 2.0 * math.pi * (step / STEPS_PER_CYCLE)
-
-        for leg in ["LF", "RR", "RF", "LR"]:
-            if leg in GROUP_A:
-                phase = phi
-            else:
-                phase = phi + math.pi
+    pose = {}
+    phi = 2.0 * math.pi * (step / STEPS_PER_CYCLE)
 
-            swing = math.sin(phase)  # -1 ~ 1
+    for leg in ["LF", "RR", "RF", "LR"]:
+        if leg in GROUP_A:
+            phase = phi
+        else:
+            phase = phi + math.pi
 
-            # 髋关节：加上单独的 HIP_GAIN[leg]
-            hip_angle = hip0[leg] + HIP_AMP * HIP_GAIN[leg] * swing
+        swing = math.sin(phase)  # -1 ~ 1
 
-            # 膝关节：抬腿期 swing>0 时弯曲，并带 KNEE_GAIN
-            lift = KNEE_LIFT * KNEE_GAIN[leg] * max(0.0, swing)
-            knee_angle = knee0[leg] + lift
+        # 髋关节：加上单独的 HIP_GAIN[leg]
+        pose[hip_id[leg]] = hip0[leg] + HIP_AMP * HIP_GAIN[leg] * swing
 
-            sid_hip  = hip_id[leg]
-            sid_knee = knee_id[leg]
+        # 膝关节：抬腿期 swing>0 时弯曲，并带 KNEE_GAIN
+        lift = KNEE_LIFT * KNEE_GAIN[leg] * max(0.0, swing)
+        pose[knee_id[leg]] = knee0[leg] + lift
 
-            hip_angle  = clamp_angle(servos, sid_hip,  hip_angle)
-            knee_angle = clamp_angle(servos, sid_knee, knee_angle)
+    return pose
 
-            servos[sid_hip].move(hip_angle)
-            servos[sid_knee].move(knee_angle)
 
-        time.sleep(STEP_TIME)
+def trot_sine_walk(servos, comp=None, corr=None, arb=None, health=None):
+    """
+    comp: latcomp.make_compensator(...) 的结果；
+    给了就对每个关节做延迟补偿（相位提前 + 幅度修正）。
+    corr: feedback.make_corrections(...) 的结果；给了就做闭环 offset / gain 修正。
+    arb: busarb.BusArbiter；给了就由它排总线，读回赶不上本周期就丢掉，不拖慢下一帧。
+    health: health.make_health(...) 的结果（要配合 arb）；
+    slow 时每帧时间放大 SLOW_FACTOR 倍，stop 时停下。
+    """
+    total_steps = CYCLES * STEPS_PER_CYCLE
+    metrics.loop_reset()
+    if arb:
+        arb.start()
+
+    watchdog.arm(servos, STEP_TIME, safe_pose=STAND_POSE)
+    try:
+        for step in range(total_steps):
+            if watchdog.tripped():
+                break
+            if health:
+                if health["level"] == "stop":
+                    evlog.warn("health_stop", "Health stop at step {step}: {reason}",
+                               step=step, reason=health["reason"])
+                    break
+                arb.period = STEP_TIME * (SLOW_FACTOR if health["level"] == "slow" else 1.0)
+
+            if comp:
+                pose = comp_command(comp, trot_pose_at, step)
+            else:
+                pose = trot_pose_at(step)
+            if corr:
+                pose = corr_apply(corr, pose)
+
+            sent = {}
+            for sid in (7, 8, 3, 4, 1, 2, 5, 6):   # LF, RR, RF, LR
+                sent[sid] = clamp_angle(servos, sid, pose[sid])
+                if not arb:
+                    servos[sid].move(sent[sid])
+
+            if arb:
+                arb.submit(PRIO_FRAME, send_frame, servos, sent)
+            if comp:
+                comp_record(comp, step, sent)
+                if arb:
+                    arb.submit(PRIO_FEEDBACK, comp_readback, comp, servos, step,
+                               deadline=arb.tick_end)
+                else:
+                    comp_readback(comp, servos, step)
+            if corr:
+                if arb:
+                    arb.submit(PRIO_FEEDBACK, corr_readback, corr, servos, trot_pose_at(step),
+                               pose, sent, deadline=arb.tick_end)
+                else:
+                    corr_readback(corr, servos, trot_pose_at(step), pose, sent)
+                if (step + 1) % (CORR_WINDOW_CYCLES * STEPS_PER_CYCLE) == 0:
+                    corr_update(corr)
+
+            if health:
+                health_submit(health, arb, servos)
+            if arb:
+                arb.run_tick()
+                arb.wait_next_tick()
+            else:
+                time.sleep(STEP_TIME)
+            metrics.loop_tick(arb.period if arb else STEP_TIME)
+            watchdog.beat()
+    finally:
+        watchdog.disarm()
 
 
 def main():
     servos = init_servos()
 
-    print("\nMove to STAND_POSE ...")
+    evlog.info("stage", "\nMove to STAND_POSE ...")
     cur = read_current_pose(servos)
     smooth_move(servos, cur, STAND_POSE, duration=1.0, steps=40)
 
-    print("\nStart trot_sine_walk ...")
-    trot_sine_walk(servos)
-
-    print("\nBack to STAND_POSE ...")
+    comp = None
+    if LATENCY_COMP:
+        comp = make_compensator(STAND_POSE, STEPS_PER_CYCLE * STEP_TIME, STEP_TIME,
+                                online=(LATENCY_COMP == "online"))
+
+    corr = make_corrections(STAND_POSE, "trotsinwalk") if CLOSED_LOOP else None
+    arb = BusArbiter(STEP_TIME) if USE_ARBITER or HEALTH_MONITOR else None
+    health = make_health(servos) if HEALTH_MONITOR else None
+    if metrics.active():
+        if arb:
+            metrics.register(metrics.arb_collector(arb))
+        if health:
+            metrics.register(metrics.health_collector(health))
+
+    evlog.info("stage", "\nStart trot_sine_walk ...")
+    trot_sine_walk(servos, comp, corr, arb, health)
+    if health:
+        evlog.info("summary", "Health:\n" + health_summary(health))
+    if arb:
+        evlog.info("summary", "Bus arbiter:\n" + arb.summary())
+    if comp:
+        evlog.info("summary", "Latency compensation:\n" + comp_summary(comp))
+    if corr:
+        save_corrections(corr)
+        evlog.info("summary", "Learned corrections:\n" + corr_summary(corr))
+
+    evlog.info("stage", "\nBack to STAND_POSE ...")
     now_pose = read_current_pose(servos)
     smooth_move(servos, now_pose, STAND_POSE, duration=1.0, steps=40)
 
-    print("\nDone.")
+    evlog.info("stage", "\nDone.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+import io
+import sys
+import time
+import inspect
+import importlib
+import contextlib
+
+import numpy as np
+
+import evlog
+from dryrun import VirtualClock, install_clock
+from transplan import JOINT_LIMITS
+
+# 轨迹检查（回放之前离线跑）：
+#   参数选得不好（trotsinwalk 里 STAND_POSE[8] = 5 低于 ANGLE_MIN = 40，
+#   fixwalk 里 HIP_SWING_DELTA = +35 配上增益把关节推到限位上……），
+#   现在只有在机器人走到一半、被 clamp 悄悄削掉的时候才看得出来。
+#   这里把脚本的整条轨迹先“编译”成 时间 t (T,) + 角度 Q (T, 8) 两个数组（夹紧之前的），
+#   然后一次性向量化地查：
+#     - 角度限位（ANGLE_MIN / ANGLE_MAX）：哪些帧会被削，占多少
+#     - 每个关节的速度 / 加速度上限（transplan.JOINT_LIMITS）
+#     - 同侧前后腿的碰撞包络：前腿往后摆 + 后腿往前摆 加起来超过 HIP_APPROACH_MAX
+#   几毫秒出结果，改参数不用上机器人。
+#
+# 用法：
+#   python validate.py                     # 下面 SCRIPTS 里的全部
+#   python validate.py fixwalk trotsinwalk
+#   有问题（削顶 / 超速 / 碰撞包络）或者脚本不支持时退出码是 1，可以放在跑步态前面当检查。
+#   加速度超限只报告、不算失败：smooth_move 是一段段直线插值，每段开头速度一帧之内从 0 跳到 v，
+#   差分出来的加速度在每个段落接缝处都会“超限”，这是指令轨迹的写法，舵机自己的运动曲线会把它抹平；
+#   真正跟不上的情况在速度那一项里就已经查出来了。
+#   支持的脚本：有 trot_pose_at（trotsinwalk）/ per_servo_pose_at（rt）的逐帧正弦步态，
+#   或者有 smooth_move + main() 的一段段插值脚本（dance / fixwalk / nodriftwalk）。
+
+SCRIPTS = ["dance", "fixwalk", "nodriftwalk", "trotsinwalk", "rt"]
+
+SERVO_IDS = list(range(1, 9))
+
+# 每个髋“往前摆”是角度变大（+1）还是变小（-1）。
+# 和 nodriftwalk / fixwalk / trotsinwalk 的写法一致：四个髋同号，角度变小是往前（LIFT_HIP_DELTA = -6）
+HIP_FORWARD = {1: -1, 3: -1, 5: -1, 7: -1}
+# 同侧相邻的腿：(前髋, 后髋)
+ADJACENT_HIPS = {"right": (1, 3), "left": (7, 5)}
+HIP_APPROACH_MAX = 45.0   # 前腿往后 + 后腿往前 相对站姿一共最多摆多少度（按前后腿间距估的，实测后再改）
+
+
+# ========== 编译：脚本 -> (t, Q) ==========
+
+def compile_sine(pose_at, steps, dt):
+    """逐帧的正弦步态：pose_at(step) -> 姿态"""
+    t = np.arange(steps) * dt
+    Q = np.array([[pose_at(k)[sid] for sid in SERVO_IDS] for k in range(steps)], dtype=float)
+    return t, Q
+
+
+def compile_smooth_moves(mod):
+    """
+    用 smooth_move 一段段插值的脚本：把 main() 在虚拟时钟上跑一遍，
+    截下每一次 smooth_move 的插值点（夹紧之前的）。
+    """
+    clock = VirtualClock(epoch=0.0)
+    params = inspect.signature(mod.smooth_move)
+    stand = mod.STAND_POSE if hasattr(mod, "STAND_POSE") else mod.build_stand_pose()
+    ts, rows = [], []
+
+    def smooth_move(*args, **kwargs):
+        bound = params.bind(*args, **kwargs)
+        bound.apply_defaults()
+        a0, a1 = bound.arguments["start_pose"], bound.arguments["target_pose"]
+        duration, steps = bound.arguments["duration"], bound.arguments["steps"]
+        for k in range(steps + 1):
+            alpha = k / steps
+            ts.append(clock.now)
+            rows.append([a0[sid] + (a1[sid] - a0[sid]) * alpha for sid in SERVO_IDS])
+            clock.sleep(duration / steps)
+
+    saved = {name: getattr(mod, name) for name in ("init_servos", "read_current_pose", "smooth_move")}
+    mod.init_servos = lambda: {sid: None for sid in SERVO_IDS}
+    mod.read_current_pose = lambda servos: dict(stand)
+    mod.smooth_move = smooth_move
+    restore = install_clock(clock)
+    level = evlog.get_level()
+    evlog.set_level(evlog.ERROR)      # 脚本的阶段 / 周期日志不要混进报告里
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            mod.main()
+    finally:
+        evlog.set_level(level)
+        restore()
+        for name, fn in saved.items():
+            setattr(mod, name, fn)
+    return np.array(ts), np.array(rows, dtype=float)
+
+
+class UnsupportedScript(ValueError):
+    """脚本里没有能编译成轨迹的东西"""
+
+
+def compile_script(name):
+    """-> (t, Q, 站姿, (ANGLE_MIN, ANGLE_MAX))"""
+    mod = importlib.import_module(name)
+
+    def has(*attrs):
+        return all(hasattr(mod, a) for a in attrs)
+
+    if not has("ANGLE_MIN", "ANGLE_MAX") or not (has("STAND_POSE") or has("build_stand_pose")):
+        raise UnsupportedScript("no ANGLE_MIN / ANGLE_MAX / STAND_POSE")
+    if has("trot_pose_at"):
+        t, Q = compile_sine(mod.trot_pose_at, mod.CYCLES * mod.STEPS_PER_CYCLE, mod.STEP_TIME)
+    elif has("per_servo_pose_at"):
+        t, Q = compile_sine(mod.per_servo_pose_at, mod.CYCLES * mod.STEPS_PER_CYCLE, mod.STEP_TIME)
+    elif has("smooth_move", "init_servos", "read_current_pose", "main"):
+        t, Q = compile_smooth_moves(mod)
+    else:
+        raise UnsupportedScript("no trot_pose_at / per_servo_pose_at / smooth_move")
+    stand = mod.STAND_POSE if hasattr(mod, "STAND_POSE") else mod.build_stand_pose()
+    stand = np.array([stand[sid] for sid in SERVO_IDS], dtype=float)
+    return t, Q, stand, (mod.ANGLE_MIN, mod.ANGLE_MAX)
+
+
+# ========== 检查 ==========
+
+def validate(t, Q, stand, angle_limits, limits=JOINT_LIMITS):
+    """整条轨迹一次查完，返回一个结果字典（数组都是按 SERVO_IDS 排的列）"""
+    lo, hi = angle_limits
+    vmax = np.array([limits[sid][0] for sid in SERVO_IDS])
+    amax = np.array([limits[sid][1] for sid in SERVO_IDS])
+
+    clipped = (Q < lo) | (Q > hi)                     # (T, 8)
+
+    dt = np.diff(t)
+    dt[dt <= 0] = np.nan
+    V = np.diff(Q, axis=0) / dt[:, None]             # (T-1, 8) deg/s
+    A = np.diff(V, axis=0) / dt[1:, None]            # (T-2, 8) deg/s^2
+    fast = np.abs(V) > vmax
+    jerky = np.abs(A) > amax
+
+    col = {sid: i for i, sid in enumerate(SERVO_IDS)}
+    approach = {}
+    for side, (front, rear) in ADJACENT_HIPS.items():
+        f, r = col[front], col[rear]
+        back = -HIP_FORWARD[front] * (Q[:, f] - stand[f])   # 前腿往后摆了多少
+        fwd = HIP_FORWARD[rear] * (Q[:, r] - stand[r])      # 后腿往前摆了多少
+        approach[side] = back + fwd
+    collide = np.column_stack([approach[s] > HIP_APPROACH_MAX for s in ADJACENT_HIPS])
+
+    frames = len(t)
+    return {
+        "frames": frames,
+        "clipped": clipped,
+        "clipped_frames": int(clipped.any(axis=1).sum()),
+        "fast_frames": int(fast.any(axis=1).sum()),
+        "jerky_frames": int(jerky.any(axis=1).sum()),
+        "collide_frames": int(collide.any(axis=1).sum()),
+        "q_min": Q.min(axis=0),
+        "q_max": Q.max(axis=0),
+        "v_max": np.nanmax(np.abs(V), axis=0) if len(V) else np.zeros(len(SERVO_IDS)),
+        "a_max": np.nanmax(np.abs(A), axis=0) if len(A) else np.zeros(len(SERVO_IDS)),
+        "vmax": vmax,
+        "amax": amax,
+        "approach_max": {s: float(a.max()) for s, a in approach.items()},
+        "limits": (lo, hi),
+    }
+
+
+def pct(n, total):
+    return 100.0 * n / total if total else 0.0
+
+
+def report(name, res, elapsed):
+    n = res["frames"]
+    lo, hi = res["limits"]
+    ok = not (res["clipped_frames"] or res["fast_frames"] or res["collide_frames"])
+    print(f"{name}: {n} frames checked in {elapsed * 1000:.1f} ms -> {'OK' if ok else 'PROBLEMS'}")
+    print(f"  clipped : {res['clipped_frames']} frames ({pct(res['clipped_frames'], n):.1f}%)")
+    print(f"  too fast: {res['fast_frames']} frames ({pct(res['fast_frames'], n):.1f}%), "
+          f"accel over limit: {res['jerky_frames']} frames ({pct(res['jerky_frames'], n):.1f}%, "
+          f"warning only)")
+    print(f"  collision envelope: {res['collide_frames']} frames "
+          f"({pct(res['collide_frames'], n):.1f}%), "
+          + ", ".join(f"{s} {a:.0f}°" for s, a in res["approach_max"].items())
+          + f" (max {HIP_APPROACH_MAX:.0f}°)")
+    for i, sid in enumerate(SERVO_IDS):
+        flags = []
+        k = int(res["clipped"][:, i].sum())
+        if k:
+            flags.append(f"clipped {k} ({pct(k, n):.1f}%)")
+        if res["v_max"][i] > res["vmax"][i]:
+            flags.append(f"v {res['v_max'][i]:.0f} > {res['vmax'][i]:.0f} deg/s")
+        if res["a_max"][i] > res["amax"][i]:
+            flags.append(f"a {res['a_max'][i]:.0f} > {res['amax'][i]:.0f} deg/s^2")
+        if flags:
+            print(f"  ID{sid}: range {res['q_min'][i]:.1f}..{res['q_max'][i]:.1f} "
+                  f"(limits {lo}..{hi}); " + "; ".join(flags))
+    return ok
+
+
+def main():
+    names = sys.argv[1:] or SCRIPTS
+    all_ok = True
+    for name in names:
+        name = name[:-3] if name.endswith(".py") else name
+        try:
+            t, Q, stand, angle_limits = compile_script(name)
+        except UnsupportedScript as e:
+            print(f"{name}: unsupported script ({e})")
+            all_ok = False
+            continue
+        t0 = time.perf_counter()
+        res = validate(t, Q, stand, angle_limits)
+        all_ok &= report(name, res, time.perf_counter() - t0)
+    sys.exit(0 if all_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
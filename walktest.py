@@ -1,6 +1,8 @@
 from pylx16a.lx16a import *
 import time
 
+import evlog
+
 PORT = "/dev/ttyUSB0"
 
 ANGLE_MIN = 40
@@ -38,18 +40,16 @@ def init_servos():
         s = LX16A(sid)
         s.set_angle_limits(ANGLE_MIN, ANGLE_MAX)
         servos[sid] = s
-        print(f"Servo {sid} init OK")
+        evlog.info("servo_init", "Servo {sid} init OK", sid=sid)
     time.sleep(0.5)
     return servos
 
 
 def read_current_pose(servos):
     pose = {}
-    print("Current pose:")
     for sid, s in servos.items():
-        a = s.get_physical_angle()
-        pose[sid] = a
-        print(f"  ID{sid}: {a:.1f}°")
+        pose[sid] = s.get_physical_angle()
+    evlog.info("pose", evlog.fmt_pose, pose=dict(pose))
     return pose
 
 
@@ -156,7 +156,7 @@ def main():
     servos = init_servos()
 
     # 1. 从当前姿态 → 站立
-    print("\nMove to STAND_POSE ...")
+    evlog.info("stage", "\nMove to STAND_POSE ...")
     current = read_current_pose(servos)
     smooth_move(servos, current, STAND_POSE,
                 duration=1.0, steps=40)
@@ -164,7 +164,7 @@ def main():
 
     # 2. 走路
     for cycle in range(NUM_CYCLES):
-        print(f"\n=== Walk cycle {cycle+1}/{NUM_CYCLES} ===")
+        evlog.info("cycle", "\n=== Walk cycle {k}/{n} ===", k=cycle + 1, n=NUM_CYCLES)
         phases, end_pose = make_step_phases(current)
         for phase in phases:
             smooth_move(servos, current, phase)
@@ -172,11 +172,11 @@ def main():
         current = clone_pose(end_pose)
 
     # 3. 走完以后，再回到标准站立姿态
-    print("\nBack to STAND_POSE ...")
+    evlog.info("stage", "\nBack to STAND_POSE ...")
     smooth_move(servos, current, STAND_POSE,
                 duration=1.0, steps=40)
 
-    print("\nDone.")
+    evlog.info("stage", "\nDone.")
 
 
 if __name__ == "__main__":
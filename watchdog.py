@@ -0,0 +1,280 @@
+import gc
+import sys
+import json
+import time
+import threading
+import traceback
+
+from pylx16a.lx16a import *
+
+import evlog
+
+# 控制循环看门狗：
+#   脚本在步态中间卡住（读舵机卡住、GC 停顿、USB 转接板卡死），舵机就停在最后一个指令上；
+#   脚本崩了，机器人就停在半步。这里在控制循环跑着的时候开一个线程看心跳：
+#     - 循环每帧 beat() 一次（就是存一个时间戳）
+#     - 超过 STALL_PERIODS 个周期（至少 STALL_MIN 秒）没心跳，就接管总线：
+#       总线外面套一层 GuardedSerial，平时每个包写的时候拿一下锁；接管时看门狗最多等
+#       TAKEOVER_TIMEOUT 拿锁（拿不到就不等了，直接写），之后别的线程的写全部丢掉、读全部超时，
+#       只有看门狗自己能写，然后发 SAFE_ACTION：
+#         "pose"       —— 每个舵机一个带时间的 move，舵机自己在 SAFE_MOVE_MS 里慢慢走到安全姿态
+#         "torque_off" —— 全部卸力
+#       从没心跳到安全指令发完，最坏 = 阈值 + CHECK_INTERVAL + TAKEOVER_TIMEOUT + 8 个包
+#     - 循环里抛异常（Ctrl-C 除外）也一样接管（disarm 在 finally 里调用，看得到异常）
+#   每次卡顿记下：卡了多久、发现用了多久、接管用了多久、原因、主线程当时的调用栈
+#   （sys._current_frames()），打到 evlog，并追加到 STALL_FILE（一行一个 JSON）。
+#   原因按调用栈最里面一层猜：在串口 read / write 里 -> 读 / 写卡住；刚跑完一次很长的 GC -> GC 停顿；
+#   循环里抛了异常 -> crash；别的就给出卡在哪个函数。
+#   接管以后循环要自己看 tripped() 停下来，disarm() 会抛 StallError，脚本不再碰总线。
+#   线程救不了整个进程被 kill 掉的情况（那得靠舵机自己的掉电保护 / 另一个进程）。
+#
+# 用法（trotsinwalk / streamwalk / rt / logplay 的循环里）：
+#   watchdog.arm(servos, STEP_TIME, safe_pose=STAND_POSE)
+#   try:
+#       while ...:
+#           if watchdog.tripped(): break
+#           ... 发一帧 ...
+#           watchdog.beat()
+#   finally:
+#       watchdog.disarm()
+
+ENABLED = True
+STALL_PERIODS = 5         # 多少个控制周期没心跳算卡住
+STALL_MIN = 0.15          # 秒，阈值下限
+CHECK_INTERVAL = 0.01     # 秒，看门狗多久看一次
+TAKEOVER_TIMEOUT = 0.05   # 秒，等总线锁最多等多久
+SAFE_ACTION = "pose"      # "pose" / "torque_off"
+SAFE_MOVE_MS = 500        # 走到安全姿态用多久（舵机内部插值）
+STACK_DEPTH = 12          # 记几层调用栈
+STALL_FILE = "watchdog_stalls.jsonl"
+
+
+class StallError(RuntimeError):
+    """看门狗接管过总线（卡住或者崩了），循环后面的事不该再做了"""
+
+
+_st = {
+    "armed": False,
+    "thread": None,
+    "stop": threading.Event(),
+    "lock": threading.Lock(),     # 总线写锁
+    "taken": False,
+    "owner": None,                # 接管后唯一能写总线的线程
+    "beat": 0.0,
+    "period": 0.0,
+    "timeout": 0.0,
+    "servos": None,
+    "safe_pose": None,
+    "action": SAFE_ACTION,
+    "main": None,                 # 被看着的线程（调用 arm 的那个）
+    "stall": None,                # 这次接管的记录
+    "stalls": [],
+    "dropped": 0,                 # 接管后丢掉的写
+    "gc_start": None,
+    "gc_last": (0.0, 0.0),        # (结束时间, 用时)
+}
+
+
+# ========== 总线 ==========
+
+class GuardedSerial:
+    """套在 LX16A._controller 外面：每个包写的时候拿锁；接管后只有看门狗能用"""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def _blocked(self):
+        return _st["taken"] and threading.get_ident() != _st["owner"]
+
+    def write(self, data):
+        if _st["taken"]:
+            if threading.get_ident() != _st["owner"]:
+                _st["dropped"] += 1
+                return len(data)
+            # 看门狗自己：不拿锁，卡住的线程可能正攥着锁卡在 inner.write 里
+            return self.inner.write(data)
+        with _st["lock"]:
+            return self.inner.write(data)
+
+    def read(self, size=1):
+        if self._blocked():
+            return b""
+        return self.inner.read(size)
+
+    def readinto(self, buf):
+        # fastcodec 走这条；不接住的话 __getattr__ 会把它直接放到总线上
+        if self._blocked():
+            return 0
+        return self.inner.readinto(buf)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+def _gc_callback(phase, info):
+    if phase == "start":
+        _st["gc_start"] = time.monotonic()
+    elif _st["gc_start"] is not None:
+        now = time.monotonic()
+        _st["gc_last"] = (now, now - _st["gc_start"])
+        _st["gc_start"] = None
+
+
+# ========== 接管 ==========
+
+def main_stack(ident):
+    """被看着的线程现在停在哪（FrameSummary 列表，最里面的在最后）"""
+    frame = sys._current_frames().get(ident)
+    if frame is None:
+        return []
+    return traceback.extract_stack(frame)[-STACK_DEPTH:]
+
+
+def guess_cause(frames, last_beat):
+    gc_end, gc_dur = _st["gc_last"]
+    if gc_end > last_beat and gc_dur > 0.5 * _st["timeout"]:
+        return f"gc pause ({gc_dur * 1000:.0f} ms)"
+    if not frames:
+        return "control thread gone"
+    for fr in reversed(frames):
+        if fr.name == "_read_packet" or (fr.name == "read" and "serial" in fr.filename):
+            return f"blocked bus read ({fr.name} at {fr.filename}:{fr.lineno})"
+        if fr.name == "_send_packet" or (fr.name == "write" and "serial" in fr.filename):
+            return f"blocked bus write ({fr.name} at {fr.filename}:{fr.lineno})"
+    inner = frames[-1]
+    if inner.name == "sleep" or (inner.line or "").startswith("time.sleep"):
+        return f"sleeping past the deadline ({inner.filename}:{inner.lineno})"
+    return f"stuck in {inner.name} ({inner.filename}:{inner.lineno})"
+
+
+def send_safe(action, servos, safe_pose):
+    for sid in (7, 8, 3, 4, 1, 2, 5, 6):
+        s = servos[sid]
+        if action == "torque_off":
+            s.disable_torque()
+            continue
+        lo, hi = s.get_angle_limits()
+        s.move(max(lo, min(hi, safe_pose[sid])), time=SAFE_MOVE_MS)
+
+
+def take_over(cause, stack, detected=None):
+    """拿总线、发安全指令、记下来；看门狗线程和 disarm（崩了的时候）都会走到这里"""
+    if _st["taken"]:
+        return _st["stall"]
+    t_detect = detected if detected is not None else time.monotonic()
+    got_lock = _st["lock"].acquire(timeout=TAKEOVER_TIMEOUT)
+    _st["owner"] = threading.get_ident()
+    _st["taken"] = True
+    if got_lock:
+        _st["lock"].release()
+    action = _st["action"] if _st["safe_pose"] or _st["action"] == "torque_off" else "torque_off"
+    error = None
+    try:
+        send_safe(action, _st["servos"], _st["safe_pose"])
+    except Exception as e:      # 总线真坏了也要把记录留下
+        error = f"{type(e).__name__}: {e}"
+    t_done = time.monotonic()
+    stall = {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "since_beat": t_detect - _st["beat"],
+        "takeover_ms": (t_done - t_detect) * 1000,
+        "got_lock": got_lock,
+        "action": action,
+        "action_error": error,
+        "cause": cause,
+        "stack": stack,
+        "duration": None,       # 恢复心跳 / disarm 的时候填
+    }
+    _st["stall"] = stall
+    _st["stalls"].append(stall)
+    evlog.error("watchdog", "watchdog: {cause}; no heartbeat for {since:.0f} ms, "
+                "{action} sent in {ms:.1f} ms\n{stack}",
+                cause=cause, since=stall["since_beat"] * 1000, action=action,
+                ms=stall["takeover_ms"], stack="".join(stack).rstrip())
+    return stall
+
+
+def watch_loop():
+    stop = _st["stop"]
+    while not stop.wait(CHECK_INTERVAL):     # Event.wait 走真时间（dryrun 也一样）
+        if _st["taken"]:
+            continue
+        now = time.monotonic()
+        if now - _st["beat"] > _st["timeout"]:
+            frames = main_stack(_st["main"])
+            take_over(guess_cause(frames, _st["beat"]), traceback.format_list(frames), now)
+
+
+# ========== 给循环用的 ==========
+
+def arm(servos, period, safe_pose=None, action=None, timeout=None):
+    """开始看；action 默认 SAFE_ACTION，safe_pose 不给就只能卸力"""
+    if not ENABLED or _st["armed"]:
+        return
+    if not isinstance(LX16A._controller, GuardedSerial):
+        LX16A._controller = GuardedSerial(LX16A._controller)
+    _st.update(servos=servos, period=period, safe_pose=safe_pose, action=action or SAFE_ACTION,
+               timeout=timeout or max(STALL_MIN, STALL_PERIODS * period),
+               main=threading.get_ident(), taken=False, owner=None, stall=None,
+               dropped=0, beat=time.monotonic(), armed=True)
+    gc.callbacks.append(_gc_callback)
+    _st["stop"].clear()
+    th = threading.Thread(target=watch_loop, name="watchdog", daemon=True)
+    th.start()
+    _st["thread"] = th
+
+
+def beat():
+    now = time.monotonic()
+    stall = _st["stall"]
+    if stall and stall["duration"] is None:
+        stall["duration"] = now - _st["beat"]      # 卡完又回来了
+    _st["beat"] = now
+
+
+def tripped():
+    return _st["taken"]
+
+
+def disarm():
+    """循环结束（放在 finally 里）；接管过就抛 StallError"""
+    if not _st["armed"]:
+        return
+    exc = sys.exc_info()[1]
+    if exc is not None and not isinstance(exc, (KeyboardInterrupt, StallError)) and not _st["taken"]:
+        take_over(f"crash: {type(exc).__name__}: {exc}",
+                  traceback.format_tb(exc.__traceback__)[-STACK_DEPTH:])
+    _st["stop"].set()
+    _st["thread"].join()
+    _st["armed"] = False
+    if _gc_callback in gc.callbacks:
+        gc.callbacks.remove(_gc_callback)
+
+    stall = _st["stall"]
+    if stall is None:
+        if isinstance(LX16A._controller, GuardedSerial):
+            LX16A._controller = LX16A._controller.inner
+        return
+    # 接管过：总线留在看门狗手里，别的线程照样写不进去
+    if stall["duration"] is None:
+        stall["duration"] = time.monotonic() - _st["beat"]
+    save_stall(stall)
+    if exc is None:
+        raise StallError(f"watchdog took over the bus: {stall['cause']}")
+
+
+def save_stall(stall, path=STALL_FILE):
+    with open(path, "a") as f:
+        f.write(json.dumps(stall, ensure_ascii=False) + "\n")
+
+
+def stall_summary():
+    if not _st["stalls"]:
+        return "  no stalls"
+    lines = []
+    for s in _st["stalls"]:
+        dur = f"{s['duration'] * 1000:.0f} ms" if s["duration"] is not None else "?"
+        lines.append(f"  {s['time']}  {s['cause']}: stalled {dur}, detected after "
+                     f"{s['since_beat'] * 1000:.0f} ms, {s['action']} in {s['takeover_ms']:.1f} ms")
+    lines.append(f"  {_st['dropped']} writes from the stalled loop dropped after takeover")
+    return "\n".join(lines)